@@ -1,9 +1,18 @@
 import os
 import sys
+import argparse
 import importlib.util
 from typing import List, Dict
 import time
 
+from elasticsearch import Elasticsearch
+
+from src.config import es_config
+from src.elasticsearch.index_generation import bump_generation
+from src.elasticsearch.index_versions import (
+    KEEP_VERSIONS, begin_build, discard_build, end_build, prune_versions, publish_build, rollback
+)
+
 def get_script_path(script_name: str) -> str:
     """Get the full path of a script based on its name"""
     script_dirs = {
@@ -40,20 +49,8 @@ def load_module(file_path: str) -> Dict:
         print(f"Error: {file_path} - {str(e)}")
         return None
 
-def main():
-    script_order = [
-        'delete_index.py',
-        'create_index_prof.py',
-        'create_index_data.py',
-        'create_index_p.py',
-        'pagerank_pipeline.py',
-        'bulk_index_prof.py',
-        'bulk_index_data.py',
-        'bulk_index_p.py'
-    ]
-    
-    print("\n=== ES Init ===")
-    
+def run_scripts(script_order: List[str]) -> bool:
+    """Load and run the main() of every script in order, stopping at the first failure"""
     modules = {}
     for script_name in script_order:
         file_path = get_script_path(script_name)
@@ -63,11 +60,11 @@ def main():
                 modules[script_name] = module
         else:
             print(f"Error: {script_name} not found")
-            return
+            return False
     
     if not modules:
         print("Error: No modules found")
-        return
+        return False
     
     for script_name in script_order:
         if script_name in modules:
@@ -78,14 +75,70 @@ def main():
                     print("✓ Done")
                 else:
                     print(f"Error: {script_name} has no main()")
-                    return
+                    return False
             except Exception as e:
                 print(f"Error: {script_name} failed - {str(e)}")
-                return
+                return False
         
         time.sleep(1)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the search indices")
+    parser.add_argument("--clean", action="store_true",
+                        help="Delete all indices first and build in place (search is down until the build ends)")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Point the aliases back to the previous generation and exit")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS,
+                        help="Generations to keep per alias after a rebuild, including the live one")
+    args = parser.parse_args()
+
+    es = Elasticsearch(
+        ["https://localhost:9200"],
+        basic_auth=("elastic", es_config.KEY),
+        verify_certs=False,
+        ssl_show_warn=False
+    )
+
+    if args.rollback:
+        if rollback(es):
+            bump_generation("build.py --rollback")
+        return
+
+    script_order = [
+        'create_index_prof.py',
+        'create_index_data.py',
+        'create_index_p.py',
+        'pagerank_pipeline.py',
+        'bulk_index_prof.py',
+        'bulk_index_data.py'
+    ]
+    # Both build modes import every page into a new index after the PageRank pipeline, so
+    # bulk_index_data.py already writes the current scores and no bulk_index_p.py pass is needed
+    
+    print("\n=== ES Init ===")
+    
+    if args.clean:
+        if not run_scripts(['delete_index.py'] + script_order):
+            return
+        bump_generation("build.py")
+        print("\n=== Complete ===")
+        return
+
+    # The live aliases keep serving the previous generation until the new one is complete
+    version = begin_build()
+    try:
+        if not run_scripts(script_order):
+            print(f"Error: Build {version} failed, the live indices are unchanged")
+            discard_build(es)
+            return
+        publish_build(es)
+    finally:
+        end_build()
+    prune_versions(es, keep=args.keep)
     
+    bump_generation("build.py")
     print("\n=== Complete ===")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
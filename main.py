@@ -1,20 +1,21 @@
 from flask import Flask, request, render_template, Response, jsonify, redirect, url_for
 from src.elasticsearch.search_content import search_webpages
+from src.elasticsearch.autocomplete_index import AutocompleteEngine
+from src.elasticsearch.index_catalog import IndexCatalog
+from src.elasticsearch.index_generation import GenerationWatcher
+from src.elasticsearch.result_cache import ResultCache
+from src.elasticsearch.search_cursor import decode_cursor, run_plan
+from src.elasticsearch.search_service import (
+    IDX_SEARCH_MAP, MAX_RESULTS_SIZE, MSEARCH_MAX_QUERIES, PAGE_SIZE, apply_result_mode, build_fusion_query,
+    build_msearch_request, format_msearch_results, scope_topics, search_plan
+)
+from src.elasticsearch.snapshot_store import SnapshotStore
+from src.pagerank.pagerank_table import PageRankTable
 from src.config import es_config
 from elasticsearch import Elasticsearch
 from urllib.parse import unquote
-import json
-import os
 import time
 
-IDX_SEARCH_MAP = {
-    "webpages_uiuc": "UIUC",
-    "webpages_uiuc_grainger": "Grainger College",
-    "webpages_uiuc_cs": "CS Department",
-    "webpages_uiuc_ece": "ECE Department",
-    "uiuc_professors": "Faculty"
-}
-
 app = Flask(__name__, 
     template_folder='static/templates',
     static_folder='static'
@@ -27,71 +28,35 @@ es = Elasticsearch(
     ssl_show_warn=False
 )
 
+INDEX_CATALOG_REFRESH_INTERVAL = 60  # seconds
+index_catalog = IndexCatalog(
+    es,
+    IDX_SEARCH_MAP,
+    refresh_interval=INDEX_CATALOG_REFRESH_INTERVAL,
+    generation=GenerationWatcher()
+).start()
+
 def get_available_indices():
-    """Get all available indices from Elasticsearch"""
-    try:
-        indices = es.indices.get_alias().keys()
-        print(f"Available indices: {list(indices)}")  # Add debug info
-        
-        formatted_indices = {}
-        for index in indices:
-            if index.startswith('.'):
-                continue
-                
-            if index in IDX_SEARCH_MAP:
-                formatted_indices[index] = IDX_SEARCH_MAP[index]
-            elif index.startswith("webpages_"):
-                name = index.replace("webpages_", "").title()
-                formatted_indices[index] = f"{name} Website"
-            elif index == "uiuc_professors":
-                formatted_indices[index] = "Faculty"
-        return formatted_indices
-    except Exception as e:
-        print(f"Error getting indices: {str(e)}")
-        return {}
-
-INDICES = get_available_indices()
-PAGE_SIZE = 15
-PAGERANK_SCORES_FILE = os.path.join(os.path.dirname(__file__), "data", "pagerank", "pagerank_scores.json")
-pagerank_scores = {}
-
-def load_pagerank_scores():
-    """Load PageRank scores from JSON file"""
-    global pagerank_scores
-    try:
-        if os.path.exists(PAGERANK_SCORES_FILE):
-            with open(PAGERANK_SCORES_FILE, "r", encoding="utf-8") as f:
-                pagerank_scores = json.load(f)
-            print(f"[INFO] Successfully loaded PageRank scores from {PAGERANK_SCORES_FILE}")
-            print(f"[INFO] Loaded {len(pagerank_scores)} PageRank scores")
-        else:
-            print(f"[WARNING] PageRank scores file not found at {PAGERANK_SCORES_FILE}")
-            pagerank_scores = {}
-    except Exception as e:
-        print(f"[ERROR] Failed to load PageRank scores: {str(e)}")
-        pagerank_scores = {}
+    """Get the cached snapshot of available indices"""
+    return index_catalog.snapshot()
+
+# "cursor" pages past the first 10,000 results with a point-in-time and search_after;
+# "offset" only pages with from/size, which fails past that window
+PAGINATION_MODE = "cursor"
+pagerank_table = PageRankTable()
+SNAPSHOT_MAX_AGE = 86400  # seconds
+snapshot_store = SnapshotStore()
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 300  # seconds
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_SIZE,
+    ttl=RESULT_CACHE_TTL,
+    generation=GenerationWatcher()
+)
 
 def get_pagerank_score(url):
-    """Get PageRank score from Elasticsearch"""
-    try:
-        response = es.search(
-            index="pagerank",
-            body={
-                "query": {
-                    "term": {
-                        "url": url
-                    }
-                },
-                "_source": ["pagerank_score"]
-            }
-        )
-        hits = response.get("hits", {}).get("hits", [])
-        if hits:
-            return hits[0]["_source"]["pagerank_score"]
-        return 0.0
-    except Exception as e:
-        print(f"Error getting PageRank score: {str(e)}")
-        return 0.0
+    """Get PageRank score from the memory-mapped PageRank table"""
+    return pagerank_table.get(url)
 
 @app.route("/autocomplete", methods=["GET"])
 def autocomplete():
@@ -100,23 +65,30 @@ def autocomplete():
     if not query_term:
         return jsonify([])
 
+    suggestions = autocomplete_engine.suggest(query_term)
+    if suggestions is None:
+        # Prefix index is still loading
+        suggestions = autocomplete_from_es(query_term)
+    return jsonify(suggestions)
+
+def autocomplete_from_es(query_term):
+    """Fallback autocomplete with a prefix query on the title field"""
     query_body = {
         "query": {"prefix": {"title": query_term}},
         "size": 10,
         "_source": ["title"],
     }
 
-    response = es.search(index=list(INDICES), body=query_body)
+    response = es.search(index=list(get_available_indices()), body=query_body)
     hits = response.get("hits", {}).get("hits", [])
 
-    # Remove duplicate results
-    suggestions = set()
+    # Remove duplicate results, keeping the ranked order
+    suggestions = []
     for hit in hits:
-        if "title" in hit["_source"]:
-            suggestions.add(hit["_source"]["title"])
-    
-    suggestions = list(suggestions)[:10]
-    return jsonify(suggestions)
+        title = hit["_source"].get("title")
+        if title and title not in suggestions:
+            suggestions.append(title)
+    return suggestions[:10]
 
 @app.route("/snapshot")
 def snapshot():
@@ -126,16 +98,19 @@ def snapshot():
         return "URL parameter is missing", 404
 
     decoded_url = unquote(url)
-    query_body = {"query": {"term": {"url": decoded_url}}, "_source": ["raw_html"]}
-    response = es.search(index=list(INDICES), body=query_body)
-    hits_data = response.get("hits", {})
-    hits = hits_data.get("hits", [])
-    if hits:
-        raw_html = hits[0]["_source"].get("raw_html", "No content available")
-        return Response(raw_html, mimetype="text/html; charset=utf-8")
-    else:
+    record = snapshot_store.lookup(decoded_url)
+    if record is None:
         return "No snapshot available for this URL", 404
 
+    etag = snapshot_store.etag(record)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot_store.stream(record), mimetype="text/html; charset=utf-8")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={SNAPSHOT_MAX_AGE}"
+    return response
+
 def calculate_search_time(func):
     """Decorator to calculate search time"""
     def wrapper(*args, **kwargs):
@@ -149,7 +124,7 @@ def calculate_search_time(func):
     return wrapper
 
 @calculate_search_time
-def standard_search(es, query_term, results_size=1000):
+def standard_search(es, query_term, results_size=MAX_RESULTS_SIZE):
     """Perform standard search across all indices"""
     query_body = {
         "query": {
@@ -158,38 +133,43 @@ def standard_search(es, query_term, results_size=1000):
                 "fields": ["title", "content", "anchor_texts"]
             }
         },
-        "size": results_size
+        "size": min(results_size, MAX_RESULTS_SIZE)
     }
-    response = es.search(index=list(INDICES), body=query_body)
+    apply_result_mode(query_body, "standard")
+    response = es.search(index=list(get_available_indices()), body=query_body)
     return dict(response)
 
 @calculate_search_time
-def phrase_search(es, query_term, results_size=1000):
+def phrase_search(es, query_term, results_size=MAX_RESULTS_SIZE):
     """Perform phrase search for exact matches"""
     query_body = {
         "query": {"match_phrase": {"content": {"query": query_term, "slop": 0}}},
-        "size": results_size,
+        "size": min(results_size, MAX_RESULTS_SIZE),
     }
-    response = es.search(index=list(INDICES), body=query_body)
+    apply_result_mode(query_body, "phrase")
+    response = es.search(index=list(get_available_indices()), body=query_body)
     return dict(response)
 
 @calculate_search_time
-def index_search(es, query_term, target_indices, results_size=1000):
+def index_search(es, query_term, target_indices, results_size=MAX_RESULTS_SIZE):
     """Search within specific indices"""
+    match_query = {
+        "multi_match": {
+            "query": query_term,
+            "fields": ["title", "content", "anchor_texts"],
+        }
+    }
     query_body = {
-        "query": {
-            "multi_match": {
-                "query": query_term,
-                "fields": ["title", "content", "anchor_texts"],
-            }
-        },
-        "size": results_size,
+        # Rank with the topic-sensitive PageRank of the selected indices
+        "query": build_fusion_query(match_query, scope_topics("index", target_indices)),
+        "size": min(results_size, MAX_RESULTS_SIZE),
     }
+    apply_result_mode(query_body, "index")
     response = es.search(index=target_indices, body=query_body)
     return dict(response)
 
 @calculate_search_time
-def wildcard_search(es, query_term, results_size=1000):
+def wildcard_search(es, query_term, results_size=MAX_RESULTS_SIZE):
     """Perform wildcard search with pattern matching"""
     query_body = {
         "query": {
@@ -200,23 +180,16 @@ def wildcard_search(es, query_term, results_size=1000):
                 "analyze_wildcard": True
             }
         },
-        "size": results_size,
+        "size": min(results_size, MAX_RESULTS_SIZE),
     }
-    response = es.search(index=list(INDICES), body=query_body)
-    return dict(response)
-
-@calculate_search_time
-def execute_search(es, query_body, indices):
-    """Execute search and return results"""
-    response = es.search(index=indices, body=query_body)
+    apply_result_mode(query_body, "wildcard")
+    response = es.search(index=list(get_available_indices()), body=query_body)
     return dict(response)
 
 @app.route("/", methods=["GET"])
 def home():
     """Render home page with search form"""
-    global INDICES
-    INDICES = get_available_indices()
-    return render_template("search.html", message=None, indices=INDICES)
+    return render_template("search.html", message=None, indices=get_available_indices())
 
 @app.route("/history")
 def history():
@@ -240,159 +213,23 @@ def search():
     if not query_term:
         return render_template("search.html", message="Please enter a search term")
 
-    start = (page - 1) * PAGE_SIZE
+    if query_type == "index" and not selected_indices:
+        return render_template("search.html", message="Please select at least one index")
 
-    # Base query structure with scoring
-    query_body = {
-        "track_scores": True,
-        "query": {
-            "function_score": {
-                "query": {
-                    "multi_match": {
-                        "query": query_term,
-                        "fields": ["title^3", "content^2", "anchor_texts"],
-                        "type": "best_fields",
-                        "tie_breaker": 0.3
-                    }
-                },
-                "functions": [
-                    {
-                        "filter": {"match_all": {}},
-                        "script_score": {
-                            "script": {
-                                "source": """
-                                double es_score = _score;
-                                double pagerank = 0.0;
-                                
-                                try {
-                                    def pagerank_doc = doc['pagerank_score'];
-                                    if (pagerank_doc != null) {
-                                        pagerank = pagerank_doc.value;
-                                    }
-                                } catch (Exception e) {}
-                                
-                                double weighted_pr = pagerank * 100.0;
-                                double final_score = (weighted_pr * 0.1 + es_score * 0.9);
-                                
-                                return final_score;
-                                """
-                            }
-                        }
-                    }
-                ],
-                "boost_mode": "replace"
-            }
-        },
-        "size": PAGE_SIZE,
-        "from": start
-    }
-
-    # Add collapse field only for non-professor searches
-    if query_type != "professor":
-        query_body["collapse"] = {
-            "field": "url",
-            "inner_hits": {
-                "name": "most_relevant",
-                "size": 1,
-                "sort": [{"_score": "desc"}]
-            }
-        }
+    indices = get_available_indices()
 
-    # Execute search based on query type
-    if query_type == "professor":
-        # Professor search using professors index
-        query_body["query"]["function_score"]["query"] = {
-            "multi_match": {
-                "query": query_term,
-                "fields": ["fullName^3", "department^2"],
-                "type": "best_fields",
-                "tie_breaker": 0.3
-            }
-        }
-        response = execute_search(es, query_body, ["uiuc_professors"])
-    elif query_type == "index":
-        if not selected_indices:
-            return render_template("search.html", message="Please select at least one index")
-        response = execute_search(es, query_body, selected_indices)
-    elif query_type == "wildcard":
-        query_body["query"]["function_score"]["query"] = {
-            "query_string": {
-                "query": query_term,
-                "fields": ["title^3", "content^2", "anchor_texts"],
-                "default_operator": "AND",
-                "analyze_wildcard": True
-            }
-        }
-        response = execute_search(es, query_body, list(INDICES))
-    else:
-        response = execute_search(es, query_body, list(INDICES))
-
-    if not response:
-        return render_template("search.html", message="Search error, please try again")
-
-    hits_data = response.get("hits", {})
-    total_data = hits_data.get("total", {})
-    total_results = total_data.get("value", 0)
-    hits = hits_data.get("hits", [])
-    search_time = response.get('search_time', 0)
-
-    # Calculate total pages and adjust if needed
-    total_pages = (total_results + PAGE_SIZE - 1) // PAGE_SIZE
-    if page > total_pages:
-        page = total_pages
-        start = (page - 1) * PAGE_SIZE
-        # Re-execute search with corrected page number
-        query_body["from"] = start
-        response = execute_search(es, query_body, list(INDICES))
-        hits_data = response.get("hits", {})
-        hits = hits_data.get("hits", [])
-
-    # Process results based on search type
-    if query_type == "professor":
-        # Check for duplicate professor names
-        seen_names = set()
-        results = []
-        for hit in hits:
-            name = hit["_source"].get("fullName", "")
-            if name not in seen_names:
-                seen_names.add(name)
-                results.append({
-                    "title": name,
-                    "department": hit["_source"].get("department", ""),
-                    "rating": hit["_source"].get("avgRating", 0.0),
-                    "reviews": hit["_source"].get("numRatings", 0),
-                    "difficulty": hit["_source"].get("avgDifficulty", 0.0),
-                    "would_take_again": "No Data" if hit["_source"].get("wouldTakeAgainPercent", 0.0) == -1 
-                                      else hit["_source"].get("wouldTakeAgainPercent", 0.0) / 100.0,
-                    "final_score": hit["_score"],
-                    "tags": hit["_source"].get("tags", [])
-                })
-    else:
-        # Check for duplicate URLs
-        seen_urls = set()
-        results = []
-        for hit in hits:
-            url = hit["_source"].get("url", "")
-            if url not in seen_urls:
-                seen_urls.add(url)
-                result = {
-                    "title": hit["_source"].get("title", ""),
-                    "url": url,
-                    "relevance_score": hit["_score"],
-                    "pagerank": pagerank_scores.get(url, 0.0),
-                    "final_score": hit["_score"],
-                    "snippet": hit["_source"].get("content", "")[:200] + "...",
-                    "index": hit["_index"],
-                    "index_name": INDICES.get(hit["_index"], hit["_index"])
-                }
-                pr_score = result["pagerank"]
-                es_score = result["relevance_score"]
-                weighted_pr = pr_score * 100.0
-                result["final_score"] = (weighted_pr * 0.1 + es_score * 0.9)
-                results.append(result)
-
-    results.sort(key=lambda x: x["final_score"], reverse=True)
+    start_time = time.time()
+    plan = search_plan(query_term, query_type, selected_indices, page, indices, pagerank_table.get, result_cache,
+                       PAGINATION_MODE, decode_cursor(request.args.get("cursor")))
+    result_page = run_plan(es, plan)
+    return render_search_results(
+        query_term, query_type, selected_indices, indices,
+        search_time=time.time() - start_time, **result_page
+    )
 
+def render_search_results(query_term, query_type, selected_indices, indices, results, total_results, page, search_time,
+                          cursors=None):
+    """Render a result page for professor or webpage searches"""
     # Select template based on search type
     template = "rmp_results.html" if query_type == "professor" else "results.html"
 
@@ -404,9 +241,10 @@ def search():
         total_results=total_results,
         page=page,
         page_size=PAGE_SIZE,
-        indices=INDICES,
+        indices=indices,
         selected_indices=selected_indices,
-        search_time=search_time
+        search_time=search_time,
+        cursors=cursors or {}
     )
 
 @app.route("/api/search_content", methods=["GET"])
@@ -418,13 +256,41 @@ def search_content():
     results = search_webpages(query)
     return jsonify({"results": results})
 
+@app.route("/api/msearch", methods=["POST"])
+def msearch():
+    """API endpoint to run a batch of searches in one _msearch round trip"""
+    queries = request.get_json(silent=True)
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "Expected a JSON array of queries"}), 400
+    if len(queries) > MSEARCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {MSEARCH_MAX_QUERIES} queries per request"}), 400
+
+    indices = get_available_indices()
+    entries, searches = build_msearch_request(queries, indices)
+
+    start_time = time.time()
+    responses = es.msearch(searches=searches)["responses"] if searches else []
+    search_time = time.time() - start_time
+
+    results = format_msearch_results(entries, responses, indices, pagerank_table.get)
+    return jsonify({"results": results, "search_time": search_time})
+
 @app.route("/api/indices", methods=["GET"])
 def get_indices():
     """API endpoint to get available indices"""
-    indices = get_available_indices()
-    return jsonify(indices)
-
-load_pagerank_scores()
+    return jsonify(dict(get_available_indices()))
+
+@app.route("/api/cache_stats", methods=["GET"])
+def cache_stats():
+    """API endpoint to get result cache hit/miss counters"""
+    return jsonify(result_cache.stats())
+
+autocomplete_engine = AutocompleteEngine(
+    es,
+    get_available_indices,
+    pagerank_table.get,
+    generation=GenerationWatcher()
+).start()
 
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5000, debug=True)
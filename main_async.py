@@ -0,0 +1,251 @@
+"""
+Async (ASGI) serving mode for the search front end
+
+Same routes and templates as main.py, but request handlers await an
+AsyncElasticsearch client, so one process can keep hundreds of searches in
+flight instead of holding a worker thread per Elasticsearch round trip.
+
+Run with an ASGI server, for example:
+    uvicorn main_async:app --host 127.0.0.1 --port 8000
+"""
+import asyncio
+import functools
+import time
+from urllib.parse import unquote
+
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from quart import Quart, Response, jsonify, render_template, request
+
+from src.config import es_config
+from src.elasticsearch.autocomplete_index import AutocompleteEngine
+from src.elasticsearch.index_catalog import IndexCatalog
+from src.elasticsearch.index_generation import GenerationWatcher
+from src.elasticsearch.result_cache import ResultCache
+from src.elasticsearch.search_content import search_webpages
+from src.elasticsearch.search_cursor import async_run_plan, decode_cursor
+from src.elasticsearch.search_service import (
+    IDX_SEARCH_MAP, MSEARCH_MAX_QUERIES, PAGE_SIZE, build_msearch_request, format_msearch_results, search_plan
+)
+from src.elasticsearch.snapshot_store import SnapshotStore
+from src.pagerank.pagerank_table import PageRankTable
+
+ES_HOSTS = ["https://localhost:9200"]
+# Connection pool per Elasticsearch node; bounds the number of in-flight searches
+ES_CONNECTIONS_PER_NODE = 256
+ES_REQUEST_TIMEOUT = 30  # seconds
+
+# "cursor" pages past the first 10,000 results with a point-in-time and search_after;
+# "offset" only pages with from/size, which fails past that window
+PAGINATION_MODE = "cursor"
+INDEX_CATALOG_REFRESH_INTERVAL = 60  # seconds
+SNAPSHOT_MAX_AGE = 86400  # seconds
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 300  # seconds
+
+app = Quart(__name__,
+    template_folder='static/templates',
+    static_folder='static'
+)
+
+aes = AsyncElasticsearch(
+    ES_HOSTS,
+    basic_auth=("elastic", es_config.KEY),
+    verify_certs=False,
+    ssl_show_warn=False,
+    connections_per_node=ES_CONNECTIONS_PER_NODE,
+    request_timeout=ES_REQUEST_TIMEOUT,
+    retry_on_timeout=True,
+    max_retries=2
+)
+
+# Background components (catalog refresh, autocomplete build) run in their own
+# threads and keep using a blocking client
+es = Elasticsearch(
+    ES_HOSTS,
+    basic_auth=("elastic", es_config.KEY),
+    verify_certs=False,
+    ssl_show_warn=False
+)
+
+index_catalog = IndexCatalog(
+    es,
+    IDX_SEARCH_MAP,
+    refresh_interval=INDEX_CATALOG_REFRESH_INTERVAL,
+    generation=GenerationWatcher()
+).start()
+snapshot_store = SnapshotStore()
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_SIZE,
+    ttl=RESULT_CACHE_TTL,
+    generation=GenerationWatcher()
+)
+pagerank_table = PageRankTable()
+autocomplete_engine = AutocompleteEngine(
+    es,
+    # suggest() runs on the event loop, so it must not wait for the first catalog load
+    functools.partial(index_catalog.snapshot, wait=False),
+    pagerank_table.get,
+    generation=GenerationWatcher()
+).start()
+
+@app.after_serving
+async def close_clients():
+    await aes.close()
+
+async def available_indices():
+    """Index catalog snapshot; the first load is awaited in a worker thread instead of blocking the loop"""
+    if not index_catalog.loaded:
+        return await asyncio.to_thread(index_catalog.snapshot)
+    return index_catalog.snapshot(wait=False)
+
+@app.route("/autocomplete", methods=["GET"])
+async def autocomplete():
+    """Handle autocomplete requests for search suggestions"""
+    query_term = request.args.get("q", "").strip()
+    if not query_term:
+        return jsonify([])
+
+    suggestions = autocomplete_engine.suggest(query_term)
+    if suggestions is None:
+        # Prefix index is still loading
+        response = await aes.search(
+            index=list(await available_indices()),
+            body={"query": {"prefix": {"title": query_term}}, "size": 10, "_source": ["title"]}
+        )
+        suggestions = []
+        for hit in response.get("hits", {}).get("hits", []):
+            title = hit["_source"].get("title")
+            if title and title not in suggestions:
+                suggestions.append(title)
+    return jsonify(suggestions[:10])
+
+@app.route("/snapshot")
+async def snapshot():
+    """Get cached snapshot of a webpage"""
+    url = request.args.get("url")
+    if not url:
+        return "URL parameter is missing", 404
+
+    # Reopening the offset index after an import and reading blobs are file I/O, kept off the event loop
+    record = await asyncio.to_thread(snapshot_store.lookup, unquote(url))
+    if record is None:
+        return "No snapshot available for this URL", 404
+
+    etag = snapshot_store.etag(record)
+    if request.if_none_match.contains(etag):
+        response = Response("", status=304)
+    else:
+        async def body():
+            chunks = snapshot_store.stream(record)
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        response = Response(body(), mimetype="text/html; charset=utf-8")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={SNAPSHOT_MAX_AGE}"
+    return response
+
+@app.route("/", methods=["GET"])
+async def home():
+    """Render home page with search form"""
+    return await render_template("search.html", message=None, indices=await available_indices())
+
+@app.route("/history")
+async def history():
+    """Render search history page"""
+    return await render_template("history.html")
+
+@app.route("/search", methods=["GET", "POST"])
+async def search():
+    """Handle search requests and return results"""
+    if request.method == "POST":
+        form = await request.form
+        query_term = form.get("q", "").strip()
+        query_type = form.get("type", "standard")
+        selected_indices = form.getlist("selected_indices")
+    else:
+        query_term = request.args.get("q", "").strip()
+        query_type = request.args.get("type", "standard")
+        selected_indices = request.args.getlist("selected_indices")
+
+    page = int(request.args.get("page", 1))
+
+    if not query_term:
+        return await render_template("search.html", message="Please enter a search term")
+
+    if query_type == "index" and not selected_indices:
+        return await render_template("search.html", message="Please select at least one index")
+
+    indices = await available_indices()
+
+    start_time = time.time()
+    plan = search_plan(query_term, query_type, selected_indices, page, indices, pagerank_table.get, result_cache,
+                       PAGINATION_MODE, decode_cursor(request.args.get("cursor")))
+    result_page = await async_run_plan(aes, plan)
+    return await render_search_results(
+        query_term, query_type, selected_indices, indices,
+        search_time=time.time() - start_time, **result_page
+    )
+
+async def render_search_results(query_term, query_type, selected_indices, indices, results, total_results, page,
+                                search_time, cursors=None):
+    """Render a result page for professor or webpage searches"""
+    template = "rmp_results.html" if query_type == "professor" else "results.html"
+
+    return await render_template(
+        template,
+        query=query_term,
+        query_type=query_type,
+        results=results,
+        total_results=total_results,
+        page=page,
+        page_size=PAGE_SIZE,
+        indices=indices,
+        selected_indices=selected_indices,
+        search_time=search_time,
+        cursors=cursors or {}
+    )
+
+@app.route("/api/search_content", methods=["GET"])
+async def search_content():
+    """API endpoint for content search"""
+    query = request.args.get("q")
+    if not query:
+        return jsonify({"error": "Missing query parameter"}), 400
+    # search_content.py owns its own blocking client, keep it off the event loop
+    results = await asyncio.to_thread(search_webpages, query)
+    return jsonify({"results": results})
+
+@app.route("/api/msearch", methods=["POST"])
+async def msearch():
+    """API endpoint to run a batch of searches in one _msearch round trip"""
+    queries = await request.get_json(silent=True)
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "Expected a JSON array of queries"}), 400
+    if len(queries) > MSEARCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {MSEARCH_MAX_QUERIES} queries per request"}), 400
+
+    indices = await available_indices()
+    entries, searches = build_msearch_request(queries, indices)
+
+    start_time = time.time()
+    responses = (await aes.msearch(searches=searches))["responses"] if searches else []
+    search_time = time.time() - start_time
+
+    results = format_msearch_results(entries, responses, indices, pagerank_table.get)
+    return jsonify({"results": results, "search_time": search_time})
+
+@app.route("/api/indices", methods=["GET"])
+async def get_indices():
+    """API endpoint to get available indices"""
+    return jsonify(dict(await available_indices()))
+
+@app.route("/api/cache_stats", methods=["GET"])
+async def cache_stats():
+    """API endpoint to get result cache hit/miss counters"""
+    return jsonify(result_cache.stats())
+
+if __name__ == "__main__":
+    app.run(host="127.0.0.1", port=8000)
@@ -0,0 +1,5 @@
+import hashlib
+
+def url_hash(url):
+    """64-bit key of a URL, shared by the PageRank table, the snapshot store and the webpage document ids"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
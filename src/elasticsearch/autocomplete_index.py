@@ -0,0 +1,180 @@
+import heapq
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from elasticsearch import helpers
+
+MAX_CHAR = "\U0010ffff"
+# A failed or empty build is retried after RETRY_BACKOFF seconds, doubling up to MAX_RETRY_BACKOFF
+RETRY_BACKOFF = 5.0
+MAX_RETRY_BACKOFF = 300.0
+_WORD_START = re.compile(r"(?:^|(?<=\s))\S")
+
+def normalize(text):
+    """Lowercase and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+class PrefixIndex:
+    """
+    Immutable prefix index over weighted suggestions
+
+    Every suggestion is indexed once per word, so "comp" matches "Department of
+    Computer Science" like the analyzed prefix query did. Keys live in one sorted
+    list; prefixes whose key range is larger than `scan_limit` get their top-k
+    precomputed, every other prefix is answered by scanning at most `scan_limit`
+    keys. Suggestions come back ordered by weight, then alphabetically.
+    """
+
+    def __init__(self, entries, k=10, scan_limit=256, max_key_length=64):
+        self.k = k
+        self.scan_limit = scan_limit
+        self.max_key_length = max_key_length
+
+        best = {}
+        for text, weight in entries:
+            text = " ".join(text.split())
+            if text and weight > best.get(text, -1.0):
+                best[text] = weight
+        # Suggestion ids are ranks, so smaller id = better suggestion
+        self.suggestions = sorted(best, key=lambda text: (-best[text], text.lower(), text))
+
+        pairs = []
+        for rank, text in enumerate(self.suggestions):
+            key = normalize(text)
+            for match in _WORD_START.finditer(key):
+                pairs.append((key[match.start():match.start() + max_key_length], rank))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.ids = array("I", (rank for _, rank in pairs))
+
+        self.top = {}
+        if len(self.keys) > scan_limit:
+            self._precompute("", 0, len(self.keys))
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    def _top_ids(self, lo, hi, k):
+        return heapq.nsmallest(k, set(self.ids[lo:hi]))
+
+    def _precompute(self, prefix, lo, hi):
+        depth = len(prefix)
+        pos = lo
+        while pos < hi:
+            key = self.keys[pos]
+            if len(key) == depth:
+                pos += 1
+                continue
+            child = prefix + key[depth]
+            end = bisect_left(self.keys, child + MAX_CHAR, pos, hi)
+            if end - pos > self.scan_limit:
+                self.top[child] = tuple(self._top_ids(pos, end, self.k))
+                self._precompute(child, pos, end)
+            pos = end
+
+    def suggest(self, prefix, k=None):
+        """Return up to k suggestions starting with prefix (at any word)"""
+        k = k or self.k
+        prefix = normalize(prefix)[:self.max_key_length]
+        if not prefix:
+            return []
+        ids = self.top.get(prefix)
+        if ids is None or k > self.k:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + MAX_CHAR, lo)
+            ids = self._top_ids(lo, hi, k)
+        return [self.suggestions[i] for i in ids[:k]]
+
+class AutocompleteEngine:
+    """
+    Serves suggestions from an in-memory PrefixIndex
+
+    The index is built in a background thread from the indexed webpage titles
+    (weighted by PageRank) and professor names, and rebuilt whenever the index
+    generation or the set of indices in the catalog changes. A build that fails
+    or finds no indices is not published and is retried with exponential
+    backoff. suggest() returns None until the first build finishes.
+    """
+
+    def __init__(self, es, indices_provider, pagerank_lookup, generation=None, k=10):
+        self.es = es
+        self.indices_provider = indices_provider
+        self.pagerank_lookup = pagerank_lookup
+        self.generation = generation
+        self.k = k
+        self.index = None
+        self._generation = None
+        self._indices = None
+        self._loading = threading.Lock()
+        self._retry_at = 0.0
+        self._backoff = RETRY_BACKOFF
+
+    def _current_indices(self):
+        return tuple(sorted(self.indices_provider()))
+
+    def _entries(self, indices):
+        webpage_indices = [index for index in indices if not index.endswith("_professors")]
+        professor_indices = [index for index in indices if index.endswith("_professors")]
+
+        if webpage_indices:
+            query = {"query": {"match_all": {}}, "_source": ["title", "url"]}
+            for hit in helpers.scan(self.es, index=webpage_indices, query=query):
+                source = hit["_source"]
+                if source.get("title"):
+                    yield source["title"], self.pagerank_lookup(source.get("url", ""))
+        if professor_indices:
+            query = {"query": {"match_all": {}}, "_source": ["fullName"]}
+            for hit in helpers.scan(self.es, index=professor_indices, query=query):
+                if hit["_source"].get("fullName"):
+                    yield hit["_source"]["fullName"], 0.0
+
+    def _retry_later(self, reason):
+        self._retry_at = time.time() + self._backoff
+        print(f"[WARNING] {reason}, retrying the autocomplete build in {self._backoff:.0f}s")
+        self._backoff = min(self._backoff * 2, MAX_RETRY_BACKOFF)
+
+    def load(self):
+        """Build a new prefix index and swap it in"""
+        if not self._loading.acquire(blocking=False):
+            return
+        try:
+            generation = self.generation.current() if self.generation else None
+            indices = self._current_indices()
+            if not indices:
+                # Elasticsearch is slow or down, an empty index would hide the search fallback
+                self._retry_later("Index catalog is empty")
+                return
+            index = PrefixIndex(self._entries(indices), k=self.k)
+            self.index = index
+            self._generation = generation
+            self._indices = indices
+            self._backoff = RETRY_BACKOFF
+            print(f"[INFO] Autocomplete index loaded with {len(index)} suggestions")
+        except Exception as e:
+            self._retry_later(f"Failed to build autocomplete index: {str(e)}")
+        finally:
+            self._loading.release()
+
+    def start(self):
+        """Build the index in the background"""
+        threading.Thread(target=self.load, name="autocomplete-loader", daemon=True).start()
+        return self
+
+    def stale(self):
+        """Whether the index is missing or was built from an older generation or catalog"""
+        if self.index is None:
+            return True
+        if self.generation is not None and self.generation.current() != self._generation:
+            return True
+        return self._current_indices() != self._indices
+
+    def suggest(self, prefix):
+        """Return ranked suggestions, or None if the index is not loaded yet"""
+        if not self._loading.locked() and time.time() >= self._retry_at and self.stale():
+            self.start()
+        if self.index is None:
+            return None
+        return self.index.suggest(prefix, self.k)
@@ -0,0 +1,199 @@
+import json
+import queue
+import random
+import threading
+import time
+
+from elasticsearch import ApiError
+from elasticsearch.helpers import expand_action
+
+BULK_WORKERS = 4
+# Chunks are cut at whichever limit is reached first
+MAX_CHUNK_BYTES = 10 * 2**20
+MAX_CHUNK_DOCS = 1000
+# 429 (queue full / circuit breaker) retries, backoff doubles from INITIAL_BACKOFF up to MAX_BACKOFF seconds
+MAX_RETRIES = 6
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# Failed items kept on BulkStats.errors for logging
+MAX_ERRORS = 10
+
+class BulkStats:
+    """Counters of one bulk_index() run, updated by the worker threads"""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.rejected = 0   # items that failed for good, including 429s out of retries
+        self.retried = 0    # items resent after a 429
+        self.requests = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.errors = []
+        self.rejected_ids = []  # _id of every rejected item that had one
+        self._lock = threading.Lock()
+
+    @property
+    def docs_per_second(self):
+        return self.succeeded / self.seconds if self.seconds else 0.0
+
+    def _add(self, succeeded=0, rejected=0, retried=0, requests=0, size=0, errors=(), rejected_ids=()):
+        with self._lock:
+            self.succeeded += succeeded
+            self.rejected += rejected
+            self.retried += retried
+            self.requests += requests
+            self.bytes += size
+            self.errors.extend(errors[:MAX_ERRORS - len(self.errors)])
+            self.rejected_ids.extend(rejected_ids)
+
+    def summary(self):
+        return {
+            "succeeded": self.succeeded,
+            "rejected": self.rejected,
+            "retried": self.retried,
+            "requests": self.requests,
+            "mb": self.bytes / 2**20,
+            "seconds": self.seconds,
+            "docs_per_second": self.docs_per_second
+        }
+
+    def log(self, label):
+        print(f"[INFO] {label}: {self.succeeded} docs in {self.seconds:.1f}s ({self.docs_per_second:.0f} docs/s), "
+              f"{self.rejected} rejected, {self.retried} retried after 429, "
+              f"{self.requests} requests, {self.bytes / 2**20:.1f} MB")
+        for error in self.errors:
+            print(f"[WARNING] Rejected: {error}")
+
+def serialize_actions(client, actions):
+    """Yield (bulk lines, byte size) of every action, serialized once with the client's JSON serializer"""
+    serializer = client.transport.serializers.get_serializer("application/json")
+    for action in actions:
+        header, data = expand_action(action)
+        lines = [serializer.dumps(header)]
+        if data is not None:
+            lines.append(data if isinstance(data, bytes) else serializer.dumps(data))
+        yield lines, sum(len(line) + 1 for line in lines)
+
+def chunk_actions(serialized, max_chunk_bytes=MAX_CHUNK_BYTES, max_chunk_docs=MAX_CHUNK_DOCS):
+    """Group serialized actions into chunks of at most max_chunk_docs items and max_chunk_bytes bytes"""
+    chunk, size = [], 0
+    for lines, item_size in serialized:
+        # A single oversized document still goes out, alone
+        if chunk and (len(chunk) >= max_chunk_docs or size + item_size > max_chunk_bytes):
+            yield chunk, size
+            chunk, size = [], 0
+        chunk.append(lines)
+        size += item_size
+    if chunk:
+        yield chunk, size
+
+def _action_id(lines):
+    header = json.loads(lines[0])
+    return next(iter(header.values())).get("_id")
+
+def _item_ok(op_type, result):
+    status = result.get("status", 500)
+    # Deleting a document that is already gone is what was asked for
+    return 200 <= status < 300 or (op_type == "delete" and status == 404)
+
+def send_chunk(client, chunk, size, stats, max_retries=MAX_RETRIES,
+               initial_backoff=INITIAL_BACKOFF, max_backoff=MAX_BACKOFF, progress=None):
+    """
+    Send one chunk, resending the items rejected with 429 after an exponential backoff
+
+    Args:
+        client: Elasticsearch client
+        chunk: Serialized actions from chunk_actions()
+        size: Byte size of the chunk
+        stats: BulkStats to update
+        progress: Optional tqdm-like object, advanced per finished item
+    """
+    for attempt in range(max_retries + 1):
+        stats._add(requests=1, size=size)
+        try:
+            response = client.bulk(operations=[line for lines in chunk for line in lines])
+            items = response["items"]
+        except ApiError as e:
+            if e.meta.status != 429 or attempt == max_retries:
+                stats._add(rejected=len(chunk), errors=[f"{e.meta.status}: {str(e)}"],
+                           rejected_ids=[doc_id for doc_id in map(_action_id, chunk) if doc_id])
+                if progress is not None:
+                    progress.update(len(chunk))
+                return
+            retry = chunk
+        else:
+            retry, succeeded, rejected, errors, rejected_ids = [], 0, 0, [], []
+            for lines, item in zip(chunk, items):
+                op_type, result = next(iter(item.items()))
+                if _item_ok(op_type, result):
+                    succeeded += 1
+                elif result.get("status") == 429 and attempt < max_retries:
+                    retry.append(lines)
+                else:
+                    rejected += 1
+                    errors.append({op_type: result})
+                    if result.get("_id"):
+                        rejected_ids.append(result["_id"])
+            stats._add(succeeded=succeeded, rejected=rejected, errors=errors, rejected_ids=rejected_ids)
+            if progress is not None:
+                progress.update(succeeded + rejected)
+            if not retry:
+                return
+        stats._add(retried=len(retry))
+        delay = min(max_backoff, initial_backoff * 2**attempt)
+        # Jitter keeps the workers from hitting the cluster again in lockstep
+        time.sleep(delay * random.uniform(0.5, 1.0))
+        chunk, size = retry, sum(len(line) + 1 for lines in retry for line in lines)
+
+def bulk_index(client, actions, workers=BULK_WORKERS, max_chunk_bytes=MAX_CHUNK_BYTES,
+               max_chunk_docs=MAX_CHUNK_DOCS, max_retries=MAX_RETRIES, initial_backoff=INITIAL_BACKOFF,
+               max_backoff=MAX_BACKOFF, progress=None):
+    """
+    Send bulk actions with parallel worker threads
+
+    Actions are serialized and chunked by size on the calling thread and
+    handed to the workers through a bounded queue, so a slow or throttling
+    cluster pauses the producer instead of buffering the whole input.
+    Items rejected with 429 are retried with exponential backoff, every
+    other failed item is counted and kept on stats.errors.
+
+    Args:
+        client: Elasticsearch client
+        actions: Iterable of helpers-style action dicts (_op_type, _index, _id, _source / doc)
+        workers: Concurrent bulk requests
+        max_chunk_bytes: Request body size limit
+        max_chunk_docs: Items per request limit
+        max_retries: Resends of items rejected with 429
+        progress: Optional tqdm-like object, advanced per finished item
+    Returns:
+        BulkStats: Throughput and error counters
+    """
+    stats = BulkStats()
+    start_time = time.time()
+    chunks = queue.Queue(maxsize=2 * workers)
+
+    def worker():
+        while True:
+            task = chunks.get()
+            if task is None:
+                return
+            chunk, size = task
+            try:
+                send_chunk(client, chunk, size, stats, max_retries, initial_backoff, max_backoff, progress)
+            except Exception as e:
+                stats._add(rejected=len(chunk), errors=[f"{type(e).__name__}: {str(e)}"],
+                           rejected_ids=[doc_id for doc_id in map(_action_id, chunk) if doc_id])
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    try:
+        for task in chunk_actions(serialize_actions(client, actions), max_chunk_bytes, max_chunk_docs):
+            chunks.put(task)
+    finally:
+        for _ in threads:
+            chunks.put(None)
+        for thread in threads:
+            thread.join()
+        stats.seconds = time.time() - start_time
+    return stats
@@ -1,4 +1,3 @@
-import json
 from elasticsearch import Elasticsearch, helpers
 from tqdm import tqdm
 import sys
@@ -6,6 +5,15 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.bulk_engine import bulk_index
+from src.elasticsearch.bulk_load import bulk_load_mode
+from src.elasticsearch.index_generation import bump_generation
+from src.elasticsearch.index_manifest import ManifestUpdate, document_key, load_manifest, save_manifest
+from src.elasticsearch.index_versions import target_indices
+from src.elasticsearch.page_stream import PAGE_FILE_EXTENSIONS, iter_pages
+from src.elasticsearch.snapshot_store import SnapshotWriter
+from src.pagerank.pagerank_artifact import load_artifact, pagerank_fields
 
 es = Elasticsearch(
     ["https://localhost:9200"],
@@ -16,59 +24,139 @@ es = Elasticsearch(
 
 base_folder = "data/raw/website"
 
-# Get subfolders that match existing indices
-existing_indices = es.indices.get_alias().keys()
-subfolders = []
-for index in existing_indices:
-    if index.startswith("webpages_"):
-        folder_name = index.replace("webpages_", "")
-        folder_path = os.path.join(base_folder, folder_name)
-        if os.path.exists(folder_path):
-            subfolders.append(folder_name)
-
-if not subfolders:
-    print("No matching folders found")
-    exit()
-
-print(f"Found {len(subfolders)} folders to process")
-
-for subfolder in subfolders:
-    index_name = f"webpages_{subfolder}"
-    json_folder = os.path.join(base_folder, subfolder)
-    json_files = [f for f in os.listdir(json_folder) if f.endswith('.json')]
-    
-    print(f"\nProcessing: {subfolder}")
-    print(f"Found {len(json_files)} JSON files")
-    
-    total_docs = 0
-    for json_file in tqdm(json_files, desc=f"Importing {subfolder}"):
-        file_path = os.path.join(json_folder, json_file)
-        
+def load_pagerank_tables():
+    """PageRank lookup table and per-topic tables, or (None, {}) without an artifact"""
+    # PageRank is stored on each page as a rank_feature so search can fuse it natively
+    artifact = load_artifact(verify=True)
+    if artifact is None:
+        print("Importing without PageRank scores")
+        return None, {}
+    pagerank_table = artifact.lookup()
+    # Topic-sensitive PageRank, one table per webpages_<topic> index
+    topic_tables = {topic: artifact.lookup(topic) for topic in artifact.topics}
+    print(f"Loaded {len(artifact)} PageRank scores, topics: {', '.join(topic_tables) or 'none'}")
+    return pagerank_table, topic_tables
+
+def page_document(page, pagerank_table, topic_tables):
+    """Index source of one crawled page"""
+    source = {
+        "title": page.get("title", ""),
+        "url": page.get("url", ""),
+        "anchor_texts": page.get("anchor_texts", []),
+        "content": page.get("content", ""),
+        "outlinks": page.get("outlinks", [])
+    }
+    url = source["url"]
+    score = pagerank_table.get(url) if pagerank_table else 0.0
+    source.update(pagerank_fields(score, {topic: table.get(url) for topic, table in topic_tables.items()}))
+    return source
+
+def unseen_ids(index_name, update):
+    """Ids in the index that this import did not produce: pages gone from the crawl and legacy random ids"""
+    hits = helpers.scan(es, index=index_name, query={"query": {"match_all": {}}}, _source=False, size=5000)
+    for hit in hits:
+        if not update.produced(hit["_id"]):
+            yield hit["_id"]
+
+def page_actions(index_name, file_paths, snapshots, pagerank_table, topic_tables, update, sweep=False):
+    """
+    Index actions for the new and changed pages of the crawl files, then deletes for vanished ones
+
+    Pages are decoded one at a time and indexed under document_id(url), so
+    re-importing overwrites instead of duplicating. A file that fails to
+    parse is reported and skipped from that point on, pages decoded before
+    the error are still indexed, but nothing is deleted in that run.
+    Deleted pages are also dropped from the snapshot store.
+
+    Args:
+        update: ManifestUpdate against the previous import of the index
+        sweep: Without a valid manifest, scan the index after the import for
+               documents this import did not produce and delete those
+    """
+    for file_path in tqdm(file_paths, desc=f"Importing {index_name}"):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                pages = json.load(f)
-            
-            actions = []
-            for page in pages:
-                doc = {
-                    "_index": index_name,
-                    "_source": {
-                        "title": page.get("title", ""),
-                        "url": page.get("url", ""),
-                        "anchor_texts": page.get("anchor_texts", []),
-                        "content": page.get("content", ""),
-                        "outlinks": page.get("outlinks", [])
-                    }
-                }
-                actions.append(doc)
-            
-            if actions:
-                helpers.bulk(es, actions)
-                total_docs += len(actions)
-                
+            for page in iter_pages(file_path):
+                # Raw HTML goes to the on-disk snapshot store instead of Elasticsearch
+                snapshots.add(page.get("url", ""), page.get("raw_html", ""))
+                source = page_document(page, pagerank_table, topic_tables)
+                doc_id = update.check(source)
+                if doc_id is not None:
+                    yield {"_index": index_name, "_id": doc_id, "_source": source}
         except Exception as e:
-            print(f"\nError processing {json_file}: {str(e)}")
-    
-    print(f"\nCompleted {subfolder}: {total_docs} documents imported")
+            update.complete = False
+            print(f"\nError processing {os.path.basename(file_path)}: {str(e)}")
+
+    deleted = update.deleted_ids()
+    if sweep and update.complete:
+        deleted = list(unseen_ids(index_name, update))
+    update.log(index_name, len(deleted))
+    for doc_id in deleted:
+        # Ids are URL hashes, so the snapshot of a vanished page goes with it
+        key = document_key(doc_id)
+        if key is not None:
+            snapshots.remove(key)
+        yield {"_op_type": "delete", "_index": index_name, "_id": doc_id}
+
+def previous_import(index_name):
+    """
+    Manifest of the last import into an index
+
+    Returns:
+        tuple: (index uuid, IndexManifest or None, whether the index needs a sweep
+               for documents the manifest does not know about)
+    """
+    index_uuid = es.indices.get_settings(index=index_name)[index_name]["settings"]["index"]["uuid"]
+    doc_count = es.count(index=index_name)["count"]
+    manifest = load_manifest(index_name, index_uuid, doc_count)
+    # The index keeps serving while it is re-imported: every page is resent under its
+    # deterministic id and only what the import did not produce is deleted afterwards
+    sweep = manifest is None and doc_count > 0
+    if sweep:
+        print(f"[WARNING] No valid manifest for {index_name}, resending all pages and sweeping "
+              f"its {doc_count} documents afterwards")
+    return index_uuid, manifest, sweep
+
+def matching_subfolders():
+    """Crawl folders that have a webpages_<folder> alias, with the physical index to import into"""
+    subfolders = {}
+    for alias, index_name in target_indices(es, lambda alias: alias.startswith("webpages_")).items():
+        folder_name = alias.replace("webpages_", "")
+        if os.path.exists(os.path.join(base_folder, folder_name)):
+            subfolders[folder_name] = index_name
+    return subfolders
+
+def main():
+    pagerank_table, topic_tables = load_pagerank_tables()
+
+    # Get subfolders that match existing indices
+    subfolders = matching_subfolders()
+    if not subfolders:
+        print("No matching folders found")
+        return
+
+    print(f"Found {len(subfolders)} folders to process")
+
+    snapshots = SnapshotWriter()
+    for subfolder, index_name in subfolders.items():
+        json_folder = os.path.join(base_folder, subfolder)
+        file_paths = [os.path.join(json_folder, f) for f in os.listdir(json_folder) if f.endswith(PAGE_FILE_EXTENSIONS)]
+
+        print(f"\nProcessing: {subfolder}")
+        print(f"Found {len(file_paths)} JSON files")
+
+        # Manifests belong to the physical index, so a new generation starts with a full import
+        index_uuid, manifest, sweep = previous_import(index_name)
+        update = ManifestUpdate(manifest)
+        # Pages are decoded as the bulk queue drains, so memory stays flat however large a crawl file is
+        with bulk_load_mode(es, index_name):
+            actions = page_actions(index_name, file_paths, snapshots, pagerank_table, topic_tables, update, sweep)
+            stats = bulk_index(es, actions)
+        stats.log(f"Completed {subfolder}")
+        save_manifest(index_name, index_uuid, update.entries(stats.rejected_ids))
+
+    snapshots.close()
+    bump_generation("bulk_index_data.py")
+    print("\nAll folders processed!")
 
-print("\nAll folders processed!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
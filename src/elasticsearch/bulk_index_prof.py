@@ -1,11 +1,16 @@
 import json
-from elasticsearch import Elasticsearch, helpers
+from elasticsearch import Elasticsearch
 from tqdm import tqdm
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.bulk_engine import bulk_index
+from src.elasticsearch.bulk_load import bulk_load_mode
+from src.elasticsearch.index_generation import bump_generation
+from src.elasticsearch.index_versions import target_indices
 
 es = Elasticsearch(
     ["https://localhost:9200"],
@@ -16,42 +21,18 @@ es = Elasticsearch(
 
 base_folder = "data/raw/rmp"
 
-# Get subfolders that match existing indices
-existing_indices = es.indices.get_alias().keys()
-subfolders = []
-for index in existing_indices:
-    if index.endswith("_professors"):
-        folder_name = index.replace("_professors", "")
-        folder_path = os.path.join(base_folder, folder_name)
-        if os.path.exists(folder_path):
-            subfolders.append(folder_name)
-
-if not subfolders:
-    print("No matching folders found")
-    exit()
-
-print(f"Found {len(subfolders)} folders to process")
-
-for subfolder in subfolders:
-    index_name = f"{subfolder}_professors"
-    json_folder = os.path.join(base_folder, subfolder)
-    json_files = [f for f in os.listdir(json_folder) if f.endswith('.json')]
-    
-    print(f"\nProcessing: {subfolder}")
-    print(f"Found {len(json_files)} JSON files")
-    
-    total_docs = 0
-    for json_file in tqdm(json_files, desc=f"Importing {subfolder}"):
+def professor_actions(index_name, json_folder, json_files):
+    """Index actions for every professor of the RateMyProfessor files"""
+    for json_file in tqdm(json_files, desc=f"Importing {index_name}"):
         file_path = os.path.join(json_folder, json_file)
-        
+
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
-            actions = []
+
             for professor_item in data["professors"]:
                 prof = professor_item["professor"]
-                doc = {
+                yield {
                     "_index": index_name,
                     "_source": {
                         "id": prof["id"],
@@ -66,15 +47,38 @@ for subfolder in subfolders:
                         "tags": prof.get("tags", [])
                     }
                 }
-                actions.append(doc)
-            
-            if actions:
-                helpers.bulk(es, actions)
-                total_docs += len(actions)
-                
+
         except Exception as e:
             print(f"\nError processing {json_file}: {str(e)}")
-    
-    print(f"\nCompleted {subfolder}: {total_docs} documents imported")
 
-print("\nAll folders processed!")
\ No newline at end of file
+def main():
+    # Get subfolders that match existing indices, by alias; during a rebuild the new generation
+    subfolders = {}
+    for alias, index_name in target_indices(es, lambda alias: alias.endswith("_professors")).items():
+        folder_name = alias.replace("_professors", "")
+        folder_path = os.path.join(base_folder, folder_name)
+        if os.path.exists(folder_path):
+            subfolders[folder_name] = index_name
+
+    if not subfolders:
+        print("No matching folders found")
+        return
+
+    print(f"Found {len(subfolders)} folders to process")
+
+    for subfolder, index_name in subfolders.items():
+        json_folder = os.path.join(base_folder, subfolder)
+        json_files = [f for f in os.listdir(json_folder) if f.endswith('.json')]
+
+        print(f"\nProcessing: {subfolder}")
+        print(f"Found {len(json_files)} JSON files")
+
+        with bulk_load_mode(es, index_name):
+            stats = bulk_index(es, professor_actions(index_name, json_folder, json_files))
+        stats.log(f"Completed {subfolder}")
+
+    bump_generation("bulk_index_prof.py")
+    print("\nAll folders processed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_versions import build_version
+
+# Create indices and run the importers in bulk-load mode
+BULK_LOAD = True
+# Settings while loading: no periodic refresh, no replicas to copy every batch to
+BULK_LOAD_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0}
+# Force-merge to this many segments after a load, None to skip (worth it for indices that are rebuilt, not updated)
+FORCE_MERGE_SEGMENTS = None
+# A force merge blocks until done, well beyond the default request timeout
+FORCE_MERGE_TIMEOUT = 3600
+
+def create_settings(bulk_load=BULK_LOAD):
+    """Index settings for indices.create(), bulk-load settings when bulk_load is set"""
+    return {"index": dict(BULK_LOAD_SETTINGS)} if bulk_load else {}
+
+def _index_settings(es, index_name):
+    return es.indices.get_settings(index=index_name)[index_name]["settings"]["index"]
+
+def in_bulk_load(settings):
+    """Whether index settings are still the bulk-load settings of create_settings()"""
+    return all(str(settings.get(key)) == str(value) for key, value in BULK_LOAD_SETTINGS.items())
+
+def live_settings(es, index_name, current=None):
+    """
+    Settings to restore after a load
+
+    An index that was already in bulk-load mode (e.g. created with
+    create_settings()) is reset to the cluster defaults.
+    """
+    current = _index_settings(es, index_name) if current is None else current
+    restore = {}
+    for key, bulk_value in BULK_LOAD_SETTINGS.items():
+        value = current.get(key)
+        restore[key] = None if value is None or str(value) == str(bulk_value) else value
+    return restore
+
+@contextmanager
+def bulk_load_mode(es, indices, enabled=BULK_LOAD, force_merge_segments=FORCE_MERGE_SEGMENTS):
+    """
+    Bulk-load settings on new indices for the duration of an import
+
+    Only indices that are being built qualify: the generation of a running
+    rebuild, or an index still carrying the settings of create_settings().
+    Incremental imports into live indices keep their replicas and refresh.
+    On exit the previous refresh interval and replica count are restored,
+    the indices are refreshed so the import becomes searchable and are
+    optionally force-merged. Settings are restored even if the import fails.
+
+    Args:
+        es: Elasticsearch client
+        indices: Index name or list of index names
+        enabled: False runs the import with the current settings
+        force_merge_segments: Optional max_num_segments of a force merge after the load
+    """
+    indices = [indices] if isinstance(indices, str) else list(indices)
+    restore = {}
+    if enabled:
+        for index_name in indices:
+            current = _index_settings(es, index_name)
+            if build_version() is not None or in_bulk_load(current):
+                restore[index_name] = live_settings(es, index_name, current)
+    if not restore:
+        yield
+        return
+
+    indices = list(restore)
+    es.indices.put_settings(index=indices, settings={"index": BULK_LOAD_SETTINGS})
+    try:
+        yield
+    finally:
+        start_time = time.time()
+        for index_name, settings in restore.items():
+            es.indices.put_settings(index=index_name, settings={"index": settings})
+        es.indices.refresh(index=indices)
+        if force_merge_segments:
+            es.options(request_timeout=FORCE_MERGE_TIMEOUT).indices.forcemerge(
+                index=indices, max_num_segments=force_merge_segments
+            )
+        print(f"[INFO] Restored live settings on {', '.join(indices)} in {time.time() - start_time:.1f}s")
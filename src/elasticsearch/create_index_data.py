@@ -4,6 +4,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.bulk_load import create_settings
+from src.elasticsearch.index_versions import create_index
 
 
 es = Elasticsearch(
@@ -14,7 +17,6 @@ es = Elasticsearch(
 )
 
 base_folder = "data/raw/website"
-subfolders = [f for f in os.listdir(base_folder) if os.path.isdir(os.path.join(base_folder, f))]
 
 mapping = {
     "mappings": {
@@ -23,15 +25,25 @@ mapping = {
             "url":          { "type": "keyword" },
             "anchor_texts": { "type": "text", "analyzer": "english" },
             "content":      { "type": "text", "analyzer": "english" },
-            "outlinks":     { "type": "keyword" }
+            "outlinks":     { "type": "keyword" },
+            "pagerank":     { "type": "rank_feature" },
+            "pagerank_topics": { "type": "rank_features" },
+            "pagerank_score": { "type": "float" }
         }
     }
 }
 
-for subfolder in subfolders:
-    index_name = f"webpages_{subfolder}"
-    print(f"Creating index: {index_name}")
-    es.indices.create(index=index_name, body=mapping)
-    print(f"Index '{index_name}' created successfully")
+def main():
+    subfolders = [f for f in os.listdir(base_folder) if os.path.isdir(os.path.join(base_folder, f))]
+    for subfolder in subfolders:
+        alias = f"webpages_{subfolder}"
+        print(f"Creating index: {alias}")
+        # Created in bulk-load mode, bulk_index_data.py restores the live settings after the import
+        index_name = create_index(es, alias, {**mapping, "settings": create_settings()})
+        if index_name:
+            print(f"Index '{index_name}' created successfully")
 
-print("\nAll indices created successfully!")
\ No newline at end of file
+    print("\nAll indices created successfully!")
+
+if __name__ == "__main__":
+    main()
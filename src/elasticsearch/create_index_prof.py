@@ -4,6 +4,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.bulk_load import create_settings
+from src.elasticsearch.index_versions import create_index
 
 es = Elasticsearch(
     ["https://localhost:9200"],
@@ -14,9 +17,11 @@ es = Elasticsearch(
 
 def create_professor_index(department):
     """Create professor index for a specific department"""
-    index_name = f"{department}_professors"
+    alias = f"{department}_professors"
     
     mapping = {
+        # Created in bulk-load mode, bulk_index_prof.py restores the live settings after the import
+        "settings": create_settings(),
         "mappings": {
             "properties": {
                 "id": { "type": "integer" },
@@ -33,8 +38,9 @@ def create_professor_index(department):
         }
     }
 
-    es.indices.create(index=index_name, body=mapping)
-    print(f"Created index: {index_name}")
+    index_name = create_index(es, alias, mapping)
+    if index_name:
+        print(f"Created index: {index_name}")
 
 def main():
     # Get the path to the data directory
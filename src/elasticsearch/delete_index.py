@@ -42,5 +42,8 @@ def delete_all():
     except Exception as e:
         print(f"Error: {str(e)}")
 
+def main():
+    delete_all()
+
 if __name__ == "__main__":
-    delete_all() 
\ No newline at end of file
+    main() 
\ No newline at end of file
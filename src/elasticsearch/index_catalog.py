@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_versions import index_layout, searchable_names
+
+EMPTY_CATALOG = MappingProxyType({})
+
+def format_index_names(index_names, name_map):
+    """Map user index names to display names, skipping system indices"""
+    formatted_indices = {}
+    for index in index_names:
+        if index.startswith('.'):
+            continue
+
+        if index in name_map:
+            formatted_indices[index] = name_map[index]
+        elif index.startswith("webpages_"):
+            name = index.replace("webpages_", "").title()
+            formatted_indices[index] = f"{name} Website"
+        elif index == "uiuc_professors":
+            formatted_indices[index] = "Faculty"
+    return formatted_indices
+
+class IndexCatalog:
+    """
+    Background-refreshed catalog of searchable indices
+
+    A daemon thread reloads the index list every `refresh_interval` seconds, or
+    immediately after `invalidate()` / an index generation change. Request
+    handlers only read `snapshot()`, an immutable mapping of index name to
+    display name, so serving a page costs no Elasticsearch call.
+    """
+
+    def __init__(self, es, name_map, refresh_interval=60, generation=None, first_load_timeout=5.0):
+        self.es = es
+        self.name_map = dict(name_map)
+        self.refresh_interval = refresh_interval
+        self.generation = generation
+        self.first_load_timeout = first_load_timeout
+        self._snapshot = EMPTY_CATALOG
+        self._generation = generation.current() if generation else None
+        self._loaded = threading.Event()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.last_refresh = None
+        self.refresh_count = 0
+
+    def refresh(self):
+        """Reload the index list from Elasticsearch and publish a new snapshot"""
+        try:
+            # Aliases only, a generation that is being rebuilt stays invisible until it is swapped in
+            index_names = searchable_names(index_layout(self.es))
+            self._snapshot = MappingProxyType(format_index_names(index_names, self.name_map))
+            self.last_refresh = time.time()
+            self.refresh_count += 1
+        except Exception as e:
+            # Keep serving the previous snapshot
+            print(f"Error getting indices: {str(e)}")
+        finally:
+            self._loaded.set()
+        return self._snapshot
+
+    @property
+    def loaded(self):
+        """Whether the first refresh has finished"""
+        return self._loaded.is_set()
+
+    def snapshot(self, wait=True):
+        """
+        Return the current immutable index catalog
+
+        Args:
+            wait: Before the first refresh has finished, wait for it (up to
+                  first_load_timeout). False returns the empty catalog instead,
+                  for callers that must not block (an asyncio event loop).
+        """
+        if self.generation is not None:
+            current = self.generation.current()
+            if current != self._generation:
+                self._generation = current
+                self.invalidate()
+        if not self._loaded.is_set() and wait:
+            if self._thread is None:
+                return self.refresh()
+            self._loaded.wait(self.first_load_timeout)
+        return self._snapshot
+
+    def invalidate(self):
+        """Ask the background thread to refresh now"""
+        self._wake.set()
+
+    def start(self):
+        """Start the background refresh thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-catalog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refresh()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+import time
+
+GENERATION_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "index_generation.json"
+)
+
+def read_generation(path=GENERATION_FILE):
+    """Read the current index generation number (0 if no import has run yet)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("generation", 0))
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def bump_generation(reason="", path=GENERATION_FILE):
+    """
+    Advance the index generation after the indexed data has changed
+
+    Called at the end of build.py and of every bulk import so that in-process
+    caches in the web server know their contents are stale.
+
+    Args:
+        reason: Short description of what changed (stored for debugging)
+        path: Generation marker file
+    Returns:
+        int: The new generation number
+    """
+    generation = read_generation(path) + 1
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "generation": generation,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "reason": reason
+        }, f)
+    os.replace(tmp_path, path)
+    print(f"[INFO] Index generation is now {generation}")
+    return generation
+
+class GenerationWatcher:
+    """Cheap change detection for the generation marker (one stat() per call)"""
+
+    def __init__(self, path=GENERATION_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._generation = 0
+
+    def current(self):
+        """Return the current generation, re-reading the file only if it changed"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._generation = read_generation(self.path) if mtime is not None else 0
+            return self._generation
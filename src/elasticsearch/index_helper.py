@@ -1,9 +1,15 @@
 from elasticsearch import Elasticsearch
 import sys
 import os
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_manifest import load_manifest, save_manifest
+from src.elasticsearch.index_versions import (
+    VERSION_FORMAT, drop_versions, index_layout, target_indices, versioned_name
+)
 
 es = Elasticsearch(
     ["https://localhost:9200"],
@@ -94,10 +100,12 @@ def show_indices():
             print("No user indices found")
             return
         
+        layout = index_layout(es)
         print("\nAvailable Indices:")
         print("-" * 50)
         for index in indices:
-            print(index)
+            aliases = layout.get(index)
+            print(f"{index} (alias: {', '.join(aliases)})" if aliases else index)
         print("-" * 50)
         
     except Exception as e:
@@ -155,43 +163,55 @@ def delete_indices():
         print(f"Error: {str(e)}")
 
 def rename_index():
-    """Rename an index"""
+    """Rename an index by cloning it into a generation of the new alias"""
     try:
-        indices = get_user_indices()
-        
-        if not indices:
+        aliases = target_indices(es)
+
+        if not aliases:
             print("No user indices found")
             return
-        
-        print("\nAvailable indices:")
-        for i, index in enumerate(indices, 1):
-            print(f"{i}. {index}")
-        
-        index_num = input("\nSelect index number to rename: ")
+
+        names = list(aliases)
+        print("\nAvailable aliases:")
+        for i, alias in enumerate(names, 1):
+            print(f"{i}. {alias} -> {aliases[alias]}")
+
+        index_num = input("\nSelect alias number to rename: ")
         try:
             index_num = int(index_num)
-            if 1 <= index_num <= len(indices):
-                old_name = indices[index_num - 1]
+            if 1 <= index_num <= len(names):
+                old_name = names[index_num - 1]
                 new_name = input(f"Enter new name for '{old_name}': ")
-                
-                if new_name in indices:
-                    print("Error: Index with this name already exists")
+
+                if es.indices.exists(index=new_name):
+                    print("Error: Index or alias with this name already exists")
                     return
-                
+
                 confirm = input(f"Rename '{old_name}' to '{new_name}'? (y/n): ")
                 if confirm.lower() == 'y':
-                    # Create new index with same mapping
-                    mapping = es.indices.get_mapping(index=old_name)
-                    es.indices.create(index=new_name, body=mapping[old_name])
-                    
-                    # Reindex data
-                    es.reindex(body={
-                        "source": {"index": old_name},
-                        "dest": {"index": new_name}
-                    })
-                    
-                    # Delete old index
-                    es.indices.delete(index=old_name)
+                    source = aliases[old_name]
+                    target = versioned_name(new_name, time.strftime(VERSION_FORMAT))
+                    # A clone hard-links the segments instead of reindexing, it only needs the source read-only
+                    es.indices.add_block(index=source, block="write")
+                    try:
+                        es.indices.clone(index=source, target=target, settings={"index.blocks.write": None})
+                        # The old name disappears and the new one appears in the same step
+                        es.indices.update_aliases(actions=[
+                            {"add": {"index": target, "alias": new_name}},
+                            {"remove_index": {"index": source}}
+                        ])
+                    except Exception:
+                        # Leave the old alias as it was: writable and without a half-made clone
+                        if es.indices.exists(index=target):
+                            es.indices.delete(index=target)
+                        es.indices.put_settings(index=source, settings={"index.blocks.write": None})
+                        raise
+                    index_uuid = es.indices.get_settings(index=target)[target]["settings"]["index"]["uuid"]
+                    manifest = load_manifest(source)
+                    if manifest is not None:
+                        save_manifest(target, index_uuid, manifest.entries)
+                    # Older generations of the old name cannot be rolled back to any more
+                    drop_versions(es, old_name)
                     print("Index renamed successfully")
                 else:
                     print("Cancelled")
@@ -199,7 +219,7 @@ def rename_index():
                 print("Invalid index number")
         except ValueError:
             print("Invalid input")
-            
+
     except Exception as e:
         print(f"Error renaming index: {str(e)}")
 
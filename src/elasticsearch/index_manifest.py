@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+from array import array
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.common.url_hash import url_hash
+
+MANIFEST_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "index_manifest"
+)
+MANIFEST_VERSION = 1
+ENTRY_DTYPE = np.dtype([("id", "<u8"), ("digest", "u1", (16,))])
+# Crawled fields covered by the content hash; PageRank fields are refreshed by bulk_index_p.py
+CONTENT_FIELDS = ("title", "url", "anchor_texts", "content", "outlinks")
+
+def document_id(url):
+    """Deterministic document id of a URL, the url_hash() key shared with the PageRank table and snapshot store"""
+    return f"{url_hash(url):016x}"
+
+def document_key(doc_id):
+    """url_hash() key of a document id, None for ids document_id() did not produce"""
+    if len(doc_id) != 16:
+        return None
+    try:
+        return int(doc_id, 16)
+    except ValueError:
+        return None
+
+def content_digest(source):
+    """16-byte hash of the crawled fields of a document"""
+    content = {field: source.get(field) for field in CONTENT_FIELDS}
+    data = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class IndexManifest:
+    """Content digests of the documents of one index, sorted by URL hash"""
+
+    def __init__(self, index_name, index_uuid, entries):
+        self.index_name = index_name
+        self.index_uuid = index_uuid
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def ids(self):
+        return self.entries["id"]
+
+    def digest(self, key):
+        """Digest of a URL hash, or None if the document is not in the index"""
+        ids = self.entries["id"]
+        pos = int(ids.searchsorted(np.uint64(key)))
+        if pos < len(ids) and ids[pos] == key:
+            return self.entries["digest"][pos].tobytes()
+        return None
+
+def load_manifest(index_name, index_uuid=None, doc_count=None, manifest_dir=MANIFEST_DIR):
+    """
+    Load the manifest of an index
+
+    Args:
+        index_name: Index the manifest belongs to
+        index_uuid: Current uuid of the index, a recreated index invalidates the manifest
+        doc_count: Current document count, a mismatch invalidates the manifest
+        manifest_dir: Directory of all manifests
+    Returns:
+        IndexManifest: The manifest, or None if there is no valid one
+    """
+    path = os.path.join(manifest_dir, index_name)
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        entries = np.load(os.path.join(path, "entries.npy"), mmap_mode="r")
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Ignoring unreadable index manifest of {index_name}: {str(e)}")
+        return None
+    if meta.get("version") != MANIFEST_VERSION or entries.dtype != ENTRY_DTYPE:
+        print(f"[INFO] Index manifest of {index_name} is outdated")
+        return None
+    if index_uuid is not None and meta.get("index_uuid") != index_uuid:
+        print(f"[INFO] {index_name} was recreated since its manifest was written")
+        return None
+    if doc_count is not None and doc_count != len(entries):
+        print(f"[WARNING] {index_name} holds {doc_count} documents, its manifest {len(entries)}")
+        return None
+    return IndexManifest(index_name, meta.get("index_uuid"), entries)
+
+def save_manifest(index_name, index_uuid, entries, manifest_dir=MANIFEST_DIR):
+    """Write the manifest of an index, replacing the previous one"""
+    path = os.path.join(manifest_dir, index_name)
+    tmp_dir = path + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "entries.npy"), entries)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "index_uuid": index_uuid, "documents": len(entries)}, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_dir, path)
+    print(f"[INFO] Index manifest with {len(entries)} documents saved to: {path}")
+
+class ManifestUpdate:
+    """
+    Compare the documents of one import against the previous manifest
+
+    check() decides per page whether it has to be sent, deleted_ids() lists
+    the documents of the previous import that were not seen again, and
+    entries() builds the next manifest. A URL seen twice in one import keeps
+    its first document, as parallel bulk requests give no last-write order.
+    """
+
+    def __init__(self, previous=None):
+        self.previous = previous
+        self.complete = True  # cleared when a crawl file could not be read to the end
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self._seen = set()
+        self._ids = array("Q")
+        self._digests = bytearray()
+
+    def check(self, source):
+        """Document id of a page source, or None if it does not need to be sent"""
+        key = url_hash(source.get("url", ""))
+        if key in self._seen:
+            self.duplicates += 1
+            return None
+        self._seen.add(key)
+        digest = content_digest(source)
+        self._ids.append(key)
+        self._digests += digest
+        old = self.previous.digest(key) if self.previous is not None else None
+        if old is None:
+            self.new += 1
+        elif old == digest:
+            self.unchanged += 1
+            return None
+        else:
+            self.changed += 1
+        return f"{key:016x}"
+
+    def produced(self, doc_id):
+        """Whether a document id belongs to a page of this import"""
+        key = document_key(doc_id)
+        return key is not None and key in self._seen
+
+    def _current(self):
+        entries = np.empty(len(self._ids), dtype=ENTRY_DTYPE)
+        entries["id"] = np.frombuffer(self._ids, dtype="<u8") if len(self._ids) else []
+        entries["digest"] = np.frombuffer(bytes(self._digests), dtype=np.uint8).reshape(-1, 16)
+        return entries
+
+    def _gone(self):
+        if self.previous is None or not len(self.previous):
+            return np.empty(0, dtype=ENTRY_DTYPE)
+        seen = np.frombuffer(self._ids, dtype="<u8") if len(self._ids) else np.empty(0, dtype="<u8")
+        return self.previous.entries[~np.isin(self.previous.ids, seen)]
+
+    def deleted_ids(self):
+        """Ids of previously indexed documents missing from this import (none if the import was incomplete)"""
+        if not self.complete:
+            return []
+        return [f"{key:016x}" for key in self._gone()["id"].tolist()]
+
+    def entries(self, rejected_ids=()):
+        """
+        Manifest entries after the import
+
+        Rejected writes keep their previous digest (or are dropped if they
+        were new) and rejected deletes stay, so the next import retries them.
+        """
+        current = self._current()
+        if not self.complete:
+            current = np.concatenate([current, self._gone()])
+        # Ids document_id() did not produce (legacy ids deleted by a sweep) have no manifest entry
+        rejected = [key for key in map(document_key, rejected_ids) if key is not None]
+        if rejected:
+            rejected = np.array(rejected, dtype="<u8")
+            current = current[~np.isin(current["id"], rejected)]
+            if self.previous is not None:
+                previous = np.asarray(self.previous.entries)
+                current = np.concatenate([current, previous[np.isin(previous["id"], rejected)]])
+        return np.sort(current, order="id")
+
+    def log(self, index_name, deleted):
+        print(f"[INFO] {index_name}: {self.new} new, {self.changed} changed, {self.unchanged} unchanged, "
+              f"{deleted} deleted, {self.duplicates} duplicate URLs skipped")
@@ -0,0 +1,261 @@
+import os
+import re
+import shutil
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_manifest import MANIFEST_DIR
+
+# Physical indices are <alias>_v<timestamp>, search and the importers address them through <alias>
+VERSION_FORMAT = "%Y%m%d%H%M%S"
+VERSIONED_INDEX = re.compile(r"^(?P<alias>.+)_v(?P<version>\d{14})$")
+# Generations kept per alias: the live one and the previous one for rollback
+KEEP_VERSIONS = 2
+
+# Version the current build.py run writes into, None outside a rebuild
+_build_version = None
+
+def versioned_name(alias, version):
+    """Physical index name of one generation of an alias"""
+    return f"{alias}_v{version}"
+
+def logical_name(index_name):
+    """Alias of a physical index name, unversioned names are their own alias"""
+    match = VERSIONED_INDEX.match(index_name)
+    return match["alias"] if match else index_name
+
+def begin_build(version=None):
+    """
+    Start a rebuild, create scripts and importers target the new generation until end_build()
+
+    Returns:
+        str: The version suffix of the new indices
+    """
+    global _build_version
+    _build_version = version or time.strftime(VERSION_FORMAT)
+    print(f"[INFO] Building index version {_build_version}")
+    return _build_version
+
+def end_build():
+    """Stop targeting the rebuild, importers write to the live indices again"""
+    global _build_version
+    _build_version = None
+
+def build_version():
+    """Version of the running rebuild, or None"""
+    return _build_version
+
+def index_layout(es):
+    """Aliases of every user index, as {index: [alias, ...]}"""
+    return {
+        index: sorted(info.get("aliases", {}))
+        for index, info in es.indices.get_alias().items()
+        if not index.startswith(".")
+    }
+
+def searchable_names(layout):
+    """
+    Index names search may query
+
+    A versioned index is only reachable through its aliases, so a
+    generation that is still being built or was swapped out stays hidden.
+    Unversioned indices from before the alias scheme are listed as they are.
+    """
+    names = set()
+    for index, aliases in layout.items():
+        if VERSIONED_INDEX.match(index):
+            names.update(alias for alias in aliases if not alias.startswith("."))
+        else:
+            names.add(index)
+    return sorted(names)
+
+def target_indices(es, predicate=None):
+    """
+    Physical indices to write to, by alias
+
+    During a rebuild these are the indices of the new generation, otherwise
+    the generation each alias points to (or an unversioned index).
+
+    Args:
+        es: Elasticsearch client
+        predicate: Optional filter on the alias name
+    Returns:
+        dict: {alias: physical index name}, sorted by alias
+    """
+    targets = {}
+    for index, aliases in index_layout(es).items():
+        match = VERSIONED_INDEX.match(index)
+        if _build_version is not None:
+            if match and match["version"] == _build_version:
+                targets[match["alias"]] = index
+        elif match is None:
+            targets.setdefault(index, index)
+        elif match["alias"] in aliases:
+            targets[match["alias"]] = index
+    return {alias: targets[alias] for alias in sorted(targets) if predicate is None or predicate(alias)}
+
+def create_index(es, alias, body):
+    """
+    Create a new generation of an alias
+
+    During a rebuild the index is created without the alias and published
+    by swap_aliases() once the build is done. Outside a rebuild only a
+    missing alias is created, with the alias attached right away.
+
+    Returns:
+        str: The created index, or None if the alias already exists
+    """
+    if _build_version is not None:
+        index_name = versioned_name(alias, _build_version)
+        es.indices.create(index=index_name, body=body)
+        return index_name
+    # exists() also resolves aliases
+    if es.indices.exists(index=alias):
+        print(f"[INFO] {alias} already exists, run build.py to rebuild it")
+        return None
+    index_name = versioned_name(alias, time.strftime(VERSION_FORMAT))
+    es.indices.create(index=index_name, body={**body, "aliases": {alias: {}}})
+    return index_name
+
+def swap_aliases(es, targets):
+    """
+    Point aliases to new physical indices in one atomic update_aliases call
+
+    Search sees either all old or all new generations, never a mix or a
+    gap. An unversioned index that has the alias's name is removed in the
+    same call, as an alias cannot share its name with an index.
+
+    Args:
+        es: Elasticsearch client
+        targets: {alias: physical index name}
+    Returns:
+        dict: {alias: previous physical index or None}
+    """
+    layout = index_layout(es)
+    previous = {alias: None for alias in targets}
+    actions = []
+    for index, aliases in layout.items():
+        if index in targets and not VERSIONED_INDEX.match(index):
+            print(f"[WARNING] Replacing unversioned index {index} by an alias, it cannot be rolled back to")
+            actions.append({"remove_index": {"index": index}})
+            previous[index] = index
+            continue
+        for alias in aliases:
+            if alias in targets and targets[alias] != index:
+                actions.append({"remove": {"index": index, "alias": alias}})
+                previous[alias] = index
+    for alias, index_name in targets.items():
+        if alias not in layout.get(index_name, []):
+            actions.append({"add": {"index": index_name, "alias": alias}})
+    if actions:
+        es.indices.update_aliases(actions=actions)
+    for alias, index_name in targets.items():
+        print(f"[INFO] {alias} -> {index_name} (was {previous[alias] or 'unset'})")
+    return previous
+
+def publish_build(es):
+    """Swap the aliases to the indices of the running rebuild and end it"""
+    if _build_version is None:
+        raise RuntimeError("No rebuild is running")
+    targets = target_indices(es)
+    end_build()
+    if not targets:
+        print("[WARNING] The rebuild created no indices, nothing to publish")
+        return {}
+    return swap_aliases(es, targets)
+
+def discard_build(es, manifest_dir=MANIFEST_DIR):
+    """Delete the indices of the running rebuild and end it, the live generation stays untouched"""
+    if _build_version is None:
+        return []
+    targets = list(target_indices(es).values())
+    end_build()
+    for index_name in targets:
+        es.indices.delete(index=index_name)
+        shutil.rmtree(os.path.join(manifest_dir, index_name), ignore_errors=True)
+        print(f"[INFO] Deleted unfinished generation {index_name}")
+    return targets
+
+def versions(es, layout=None):
+    """Physical generations of every alias, as {alias: [index, ...]} oldest first"""
+    layout = index_layout(es) if layout is None else layout
+    generations = {}
+    for index in layout:
+        match = VERSIONED_INDEX.match(index)
+        if match:
+            generations.setdefault(match["alias"], []).append(index)
+    return {alias: sorted(indices) for alias, indices in sorted(generations.items())}
+
+def rollback(es, aliases=None):
+    """
+    Point aliases back to the generation before the live one, in one atomic swap
+
+    Args:
+        es: Elasticsearch client
+        aliases: Optional aliases to roll back, all by default
+    Returns:
+        dict: {alias: previous physical index} of the aliases that were swapped
+    """
+    layout = index_layout(es)
+    targets = {}
+    for alias, indices in versions(es, layout).items():
+        if aliases is not None and alias not in aliases:
+            continue
+        live = [index for index in indices if alias in layout[index]]
+        if not live:
+            continue
+        older = indices[:indices.index(live[-1])]
+        if not older:
+            print(f"[WARNING] {alias} has no previous generation to roll back to")
+            continue
+        targets[alias] = older[-1]
+    if not targets:
+        return {}
+    return swap_aliases(es, targets)
+
+def prune_versions(es, keep=KEEP_VERSIONS, manifest_dir=MANIFEST_DIR):
+    """
+    Delete generations older than the newest `keep` up to the live one
+
+    Generations newer than the live one (a rebuild that failed or is still
+    running, or one that was rolled back) are left alone.
+
+    Returns:
+        list: Deleted physical indices
+    """
+    layout = index_layout(es)
+    deleted = []
+    for alias, indices in versions(es, layout).items():
+        live = [index for index in indices if alias in layout[index]]
+        if not live:
+            continue
+        older = indices[:indices.index(live[-1]) + 1]
+        for index in older[:-max(1, keep)]:
+            if layout[index]:
+                continue
+            es.indices.delete(index=index)
+            shutil.rmtree(os.path.join(manifest_dir, index), ignore_errors=True)
+            deleted.append(index)
+            print(f"[INFO] Deleted old generation {index}")
+    return deleted
+
+def drop_versions(es, alias, manifest_dir=MANIFEST_DIR):
+    """
+    Delete the generations of an alias that nothing points to any more, e.g. after it was renamed
+
+    Generations that still carry an alias are left alone.
+
+    Returns:
+        list: Deleted physical indices
+    """
+    layout = index_layout(es)
+    deleted = []
+    for index in versions(es, layout).get(alias, []):
+        if layout[index]:
+            continue
+        es.indices.delete(index=index)
+        shutil.rmtree(os.path.join(manifest_dir, index), ignore_errors=True)
+        deleted.append(index)
+        print(f"[INFO] Deleted old generation {index}")
+    return deleted
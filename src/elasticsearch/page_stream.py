@@ -0,0 +1,121 @@
+import json
+
+# Crawl result files: a JSON array of pages (crawler output) or one page per line
+PAGE_FILE_EXTENSIONS = (".json", ".jsonl")
+READ_CHUNK = 1 << 20  # characters
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+def iter_json_array(f, chunk_size=READ_CHUNK):
+    """
+    Decode the elements of a top-level JSON array one at a time
+
+    Only the element being decoded and one read chunk are held in memory.
+    When an element spans more than the buffer, the next read grows with
+    the buffer, so a huge page is re-scanned a logarithmic number of times.
+
+    Args:
+        f: Text file positioned at the opening bracket (leading whitespace is skipped)
+        chunk_size: Characters per read
+    Yields:
+        Decoded array elements
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON array
+    """
+    buffer = f.read(chunk_size)
+    pos = 0
+    eof = not buffer
+
+    def skip_whitespace(buffer, pos):
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def refill(buffer, pos, eof):
+        if eof:
+            return buffer, pos, eof
+        chunk = f.read(max(chunk_size, len(buffer) - pos))
+        return buffer[pos:] + chunk, 0, not chunk
+
+    # Opening bracket
+    while True:
+        pos = skip_whitespace(buffer, pos)
+        if pos < len(buffer) or eof:
+            break
+        buffer, pos, eof = refill(buffer, pos, eof)
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+
+    expect_value = None  # None: first element or ']', True: value after ',', False: ',' or ']'
+    while True:
+        pos = skip_whitespace(buffer, pos)
+        if pos >= len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            buffer, pos, eof = refill(buffer, pos, eof)
+            continue
+
+        if expect_value is False:
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+        if expect_value is None and buffer[pos] == "]":
+            return
+
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer, pos, eof = refill(buffer, pos, eof)
+            continue
+        if not eof and isinstance(value, (int, float)) and not buffer[end:].lstrip(_NUMBER_CHARS):
+            # A number cut off by the end of the buffer may continue in the next chunk
+            buffer, pos, eof = refill(buffer, pos, eof)
+            continue
+        pos = end
+        expect_value = False
+        yield value
+        # Drop decoded text so the buffer stays around one chunk
+        if pos >= chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+def iter_json_lines(f):
+    """Decode one JSON value per non-blank line"""
+    for line_number, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {str(e)}") from e
+
+def iter_pages(file_path, chunk_size=READ_CHUNK):
+    """
+    Stream the pages of a crawl result file
+
+    A file starting with '[' is read as a JSON array, anything else as JSON
+    lines, whatever its extension.
+
+    Args:
+        file_path: Crawl result file
+        chunk_size: Characters per read of a JSON array
+    Yields:
+        dict: One page at a time
+    """
+    # utf-8-sig drops a byte order mark
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        first = f.read(1)
+        while first and first in _WHITESPACE:
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from iter_json_array(f, chunk_size)
+        elif first:
+            yield from iter_json_lines(f)
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    In-process LRU/TTL cache for rendered search result pages
+
+    Entries are dropped when they exceed `ttl` seconds, when the cache grows past
+    `max_entries` (least recently used first), or all at once when the index
+    generation reported by `generation` changes.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300, generation=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = generation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = generation.current() if generation else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query_term, query_type, selected_indices, page):
+        """Build a cache key from the request parameters that affect the result page"""
+        query = " ".join(query_term.split())
+        # query_string syntax is case sensitive (AND/OR), the analyzed queries are not
+        if query_type != "wildcard":
+            query = query.lower()
+        return (query, query_type, tuple(sorted(selected_indices or [])), page)
+
+    def _check_generation(self):
+        if self.generation is None:
+            return
+        current = self.generation.current()
+        if current != self._generation:
+            self._entries.clear()
+            self._generation = current
+            self.invalidations += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if needed"""
+        with self._lock:
+            self._check_generation()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Return hit/miss counters and sizing information"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "generation": self._generation
+            }
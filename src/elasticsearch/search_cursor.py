@@ -0,0 +1,306 @@
+import base64
+import json
+import zlib
+
+from elasticsearch import NotFoundError
+
+# Point-in-times are only opened past the from/size window and renewed by every cursor hop,
+# so a short keep-alive is enough and abandoned ones free their search contexts quickly
+PIT_KEEP_ALIVE = "1m"
+MAX_RESULT_WINDOW = 10000  # index.max_result_window
+TAIL_PAGES = 3  # pages at the end of the result list that get a direct link
+FORWARD_SORT = [{"_score": {"order": "desc"}}, {"_shard_doc": {"order": "asc"}}]
+REVERSE_SORT = [{"_score": {"order": "asc"}}, {"_shard_doc": {"order": "desc"}}]
+CURSOR_DIRECTIONS = ("prev", "next", "tail")
+# Collapsed groups (URLs) are counted with a cardinality aggregation, exact up to this many
+GROUP_COUNT_PRECISION = 40000
+# Hits per hop of reads that look up the best hit of every group, keeps the lookup within one response
+LOOKUP_HOP = 1000
+
+def encode_cursor(cursor):
+    """Encode a cursor dict into a URL-safe token"""
+    raw = json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(zlib.compress(raw)).decode("ascii").rstrip("=")
+
+def _valid_cursor(cursor):
+    if not isinstance(cursor, dict) or cursor.get("dir") not in CURSOR_DIRECTIONS:
+        return False
+    if not isinstance(cursor.get("page"), int) or cursor["page"] < 1:
+        return False
+    if not isinstance(cursor.get("total"), int) or cursor["total"] < 0:
+        return False
+    if "pit" in cursor and not isinstance(cursor["pit"], str):
+        return False
+    if cursor["dir"] == "tail":
+        return True
+    # search_after continues from a sort value of the same point-in-time
+    return isinstance(cursor.get("pit"), str) and isinstance(cursor.get("after"), list) and bool(cursor["after"])
+
+def decode_cursor(token):
+    """Decode a cursor token, returning None if it is missing, malformed or incomplete"""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor = json.loads(zlib.decompress(base64.urlsafe_b64decode(padded)))
+    except (ValueError, zlib.error):
+        return None
+    return cursor if _valid_cursor(cursor) else None
+
+def _pit_search(body, pit_id, sort, **params):
+    request_body = dict(body)
+    request_body.update(params)
+    request_body["sort"] = sort
+    request_body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+    response = yield ("search", request_body, None)
+    return response
+
+def _collapse_field(body):
+    return body.get("collapse", {}).get("field")
+
+def _with_group_count(body):
+    # hits.total counts every hit, pages count collapsed groups
+    field = _collapse_field(body)
+    if field:
+        body["aggs"] = {"groups": {"cardinality": {"field": field, "precision_threshold": GROUP_COUNT_PRECISION}}}
+    return body
+
+def _total(response):
+    groups = response.get("aggregations", {}).get("groups")
+    return groups["value"] if groups else response["hits"]["total"]["value"]
+
+def _read_body(body):
+    # search_after cannot be combined with collapse unless sorting on the collapse field,
+    # so reads on a point-in-time fetch the field and collapse client side
+    field = _collapse_field(body)
+    body = dict(body)
+    body.pop("collapse", None)
+    body.pop("aggs", None)
+    body["track_total_hits"] = False
+    if field:
+        body["docvalue_fields"] = [field]
+    return body, field
+
+def _group_of(hit, field):
+    values = hit.get("fields", {}).get(field)
+    return values[0] if values else hit["_id"]
+
+def _first_of_groups(hits, field, seen):
+    first = []
+    for hit in hits:
+        group = _group_of(hit, field)
+        if group not in seen:
+            seen.add(group)
+            first.append(hit)
+    return first
+
+def _best_hits(body, pit_id, field, hits):
+    # Keep the hits that are the best (first in FORWARD_SORT) hit of their group, the one collapse returns
+    groups = sorted({_group_of(hit, field) for hit in hits})
+    lookup = {key: value for key, value in body.items() if key not in ("query", "highlight")}
+    lookup["query"] = {"bool": {"must": [body["query"]], "filter": [{"terms": {field: groups}}]}}
+    response = yield from _pit_search(lookup, pit_id, FORWARD_SORT, size=MAX_RESULT_WINDOW, _source=False)
+    best = {}
+    for hit in response["hits"]["hits"]:
+        best.setdefault(_group_of(hit, field), hit["sort"])
+    return [hit for hit in hits if best.get(_group_of(hit, field), hit["sort"]) == hit["sort"]]
+
+def _read(body, pit_id, sort, after, skip, count):
+    """
+    Read collapsed hits on a point-in-time in `sort` order
+
+    Starts after the sort values `after` (or at the top), skips `skip`
+    collapsed hits with id-only hops and returns the next `count`. A forward
+    read from the top keeps the first hit of every group it sees; other reads
+    check the best hit of every group with an extra lookup, so they number
+    results the same way as the collapsed from/size pages.
+
+    Returns:
+        tuple: (hits in read order, pit_id)
+    """
+    body, field = _read_body(body)
+    hop_body = dict(body)
+    hop_body.pop("highlight", None)
+    seen = set() if after is None and sort is FORWARD_SORT else None
+    hop_size = MAX_RESULT_WINDOW if field is None or seen is not None else LOOKUP_HOP
+    hits = []
+    while len(hits) < count:
+        skipping = skip > 0
+        size = min(hop_size, skip) if skipping else count - len(hits)
+        params = {"size": size}
+        if skipping:
+            params["_source"] = False
+        if after is not None:
+            params["search_after"] = after
+        response = yield from _pit_search(hop_body if skipping else body, pit_id, sort, **params)
+        pit_id = response.get("pit_id", pit_id)
+        batch = response["hits"]["hits"]
+        if not batch:
+            break
+        after = batch[-1]["sort"]
+        if field is not None and seen is not None:
+            batch = _first_of_groups(batch, field, seen)
+        elif field is not None:
+            batch = yield from _best_hits(body, pit_id, field, batch)
+        if skipping:
+            skip -= len(batch)
+        else:
+            hits.extend(batch[:count - len(hits)])
+    return hits, pit_id
+
+def _count(body, pit_id):
+    response = yield from _pit_search(body, pit_id, FORWARD_SORT, size=0)
+    return _total(response), response.get("pit_id", pit_id)
+
+def _cursor_page(body, cursor, page_size):
+    if cursor["dir"] == "prev":
+        hits, pit_id = yield from _read(body, cursor["pit"], REVERSE_SORT, cursor["after"], 0, page_size)
+        hits.reverse()
+    else:
+        hits, pit_id = yield from _read(body, cursor["pit"], FORWARD_SORT, cursor["after"], 0, page_size)
+    return hits, pit_id
+
+def _deep_page(body, pit_id, page, page_size, total=None):
+    if total is None:
+        total, pit_id = yield from _count(body, pit_id)
+    total_pages = max(1, (total + page_size - 1) // page_size)
+    page = min(page, total_pages)
+    start = (page - 1) * page_size
+    end = min(page * page_size, total)
+    if total - start <= MAX_RESULT_WINDOW:
+        # Read the page backwards from the end of the result list
+        hits, pit_id = yield from _read(body, pit_id, REVERSE_SORT, None, total - end, end - start)
+        hits.reverse()
+    else:
+        hits, pit_id = yield from _read(body, pit_id, FORWARD_SORT, None, start, page_size)
+    return {"response": {"hits": {"hits": hits}}, "page": page, "total": total, "pit_id": pit_id}
+
+def page_plan(query_body, indices, page, page_size, cursor=None):
+    """
+    Plan the requests needed to fetch one result page
+
+    Pages inside the first MAX_RESULT_WINDOW hits are plain from/size searches
+    with field collapsing and no point-in-time. Deeper pages are read on a
+    point-in-time through the cursor links built by page_cursors():
+    next/previous pages continue from the neighbouring page with search_after,
+    and the last pages are read backwards from the end. A cursor's
+    point-in-time is reused, one is only opened when there is none or it
+    expired.
+
+    Every page is numbered by collapsed groups (one hit per URL) and the
+    total counts groups, so deep pages continue exactly where the from/size
+    pages stop. The group count is a cardinality aggregation, exact up to
+    GROUP_COUNT_PRECISION groups; beyond that the last pages may be off by
+    the aggregation error.
+
+    The plan is a generator that yields ("open_pit", indices) or
+    ("search", body, indices) requests (indices is None for searches on a
+    point-in-time) and is sent the responses, so the same logic drives the
+    blocking and the asyncio clients (see run_plan() and async_run_plan()).
+
+    Returns:
+        dict: response (hits in display order), page, total and pit_id (None without a point-in-time)
+    """
+    body = dict(query_body)
+    body.pop("from", None)
+    body.pop("size", None)
+    body["track_total_hits"] = True
+    _with_group_count(body)
+
+    cursor = cursor if cursor and cursor.get("page") == page else None
+    pit_id = cursor.get("pit") if cursor else None
+    if cursor and cursor["dir"] != "tail":
+        try:
+            hits, pit_id = yield from _cursor_page(body, cursor, page_size)
+            return {"response": {"hits": {"hits": hits}}, "page": page, "total": cursor["total"], "pit_id": pit_id}
+        except NotFoundError:
+            pit_id = None  # point-in-time expired, locate the page by position instead
+
+    start = (page - 1) * page_size
+    if start + page_size <= MAX_RESULT_WINDOW:
+        response = yield ("search", {**body, "from": start, "size": page_size}, indices)
+        return {"response": response, "page": page, "total": _total(response), "pit_id": None}
+
+    if pit_id is not None:
+        try:
+            # A tail cursor knows the total of its point-in-time, no count needed
+            result = yield from _deep_page(body, pit_id, page, page_size, cursor["total"])
+            return result
+        except NotFoundError:
+            pass
+    pit_id = yield ("open_pit", indices)
+    result = yield from _deep_page(body, pit_id, page, page_size)
+    return result
+
+def run_plan(es, plan):
+    """Drive a request plan (see page_plan()) with a blocking Elasticsearch client, returning its result"""
+    response, error = None, None
+    while True:
+        try:
+            request = plan.throw(error) if error else plan.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response, error = None, None
+        try:
+            if request[0] == "open_pit":
+                response = es.open_point_in_time(index=request[1], keep_alive=PIT_KEEP_ALIVE)["id"]
+            else:
+                response = dict(es.search(index=request[2], body=request[1]))
+        except NotFoundError as e:
+            error = e
+
+async def async_run_plan(es, plan):
+    """Drive a request plan (see page_plan()) with an AsyncElasticsearch client, returning its result"""
+    response, error = None, None
+    while True:
+        try:
+            request = plan.throw(error) if error else plan.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response, error = None, None
+        try:
+            if request[0] == "open_pit":
+                response = (await es.open_point_in_time(index=request[1], keep_alive=PIT_KEEP_ALIVE))["id"]
+            else:
+                response = dict(await es.search(index=request[2], body=request[1]))
+        except NotFoundError as e:
+            error = e
+
+def search_page(es, query_body, indices, page, page_size, cursor=None):
+    """Fetch one result page with a blocking Elasticsearch client (see page_plan())"""
+    return run_plan(es, page_plan(query_body, indices, page, page_size, cursor))
+
+async def async_search_page(es, query_body, indices, page, page_size, cursor=None):
+    """Fetch one result page with an AsyncElasticsearch client (see page_plan())"""
+    return await async_run_plan(es, page_plan(query_body, indices, page, page_size, cursor))
+
+def page_cursors(hits, pit_id, page, page_size, total):
+    """
+    Build cursor tokens for the previous, next and last pages past the from/size window
+
+    Previous/next cursors continue on the point-in-time of a deep page; pages
+    read without one get tail cursors only, the neighbouring deep page is
+    located by position.
+    """
+    total_pages = (total + page_size - 1) // page_size
+
+    def beyond_window(target):
+        return target * page_size > MAX_RESULT_WINDOW
+
+    def cursor(target, **fields):
+        fields.update(page=target, total=total)
+        if pit_id:
+            fields["pit"] = pit_id
+        return encode_cursor(fields)
+
+    cursors = {}
+    for target in range(max(1, total_pages - TAIL_PAGES + 1), total_pages + 1):
+        if beyond_window(target):
+            cursors[target] = cursor(target, dir="tail")
+    if not pit_id or not hits or "sort" not in hits[0]:
+        return cursors
+    if page > 1 and beyond_window(page - 1):
+        cursors[page - 1] = cursor(page - 1, dir="prev", after=hits[0]["sort"])
+    if page < total_pages and beyond_window(page + 1):
+        cursors[page + 1] = cursor(page + 1, dir="next", after=hits[-1]["sort"])
+    return cursors
@@ -0,0 +1,367 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_versions import logical_name
+from src.elasticsearch.search_cursor import page_cursors, page_plan
+
+IDX_SEARCH_MAP = {
+    "webpages_uiuc": "UIUC",
+    "webpages_uiuc_grainger": "Grainger College",
+    "webpages_uiuc_cs": "CS Department",
+    "webpages_uiuc_ece": "ECE Department",
+    "uiuc_professors": "Faculty"
+}
+
+PAGE_SIZE = 15
+WEBPAGE_INDEX_PREFIX = "webpages_"
+SEARCH_TYPES = ("standard", "phrase", "wildcard", "index", "professor")
+MSEARCH_MAX_QUERIES = 100
+# "rank_feature" fuses the indexed pagerank field natively, "script" uses the Painless script_score
+FUSION_MODE = "rank_feature"
+RELEVANCE_WEIGHT = 0.9
+PAGERANK_WEIGHT = 10.0  # pagerank * 100.0 * 0.1
+# "lean" fetches title/url/pagerank plus a highlighted snippet, "full" fetches the whole _source
+RESULT_MODE = "lean"
+LEAN_SOURCE_FIELDS = ["title", "url", "pagerank", "pagerank_topics"]
+SNIPPET_LENGTH = 200
+MAX_RESULTS_SIZE = 100  # cap for the non-paginated search helpers
+
+def scope_topics(query_type, selected_indices):
+    """Topic-sensitive PageRank vectors matching the scope of an index search"""
+    if query_type != "index":
+        return []
+    return [index[len(WEBPAGE_INDEX_PREFIX):] for index in selected_indices if index.startswith(WEBPAGE_INDEX_PREFIX)]
+
+def build_fusion_query(match_query, topics=None):
+    """Combine a text query with PageRank according to FUSION_MODE"""
+    if FUSION_MODE == "rank_feature":
+        # final = es_score * 0.9 + pagerank * 10, scored natively from the rank_feature field
+        if topics:
+            # Scoped searches average the topic vectors of the selected indices
+            fields = [f"pagerank_topics.{topic}" for topic in topics]
+        else:
+            fields = ["pagerank"]
+        return {
+            "bool": {
+                "must": [{"bool": {"must": [match_query], "boost": RELEVANCE_WEIGHT}}],
+                "should": [
+                    {
+                        "rank_feature": {
+                            "field": field,
+                            "linear": {},
+                            "boost": PAGERANK_WEIGHT / len(fields)
+                        }
+                    }
+                    for field in fields
+                ]
+            }
+        }
+
+    return {
+        "function_score": {
+            "query": match_query,
+            "functions": [
+                {
+                    "filter": {"match_all": {}},
+                    "script_score": {
+                        "script": {
+                            "source": """
+                            double es_score = _score;
+                            double pagerank = 0.0;
+
+                            try {
+                                def pagerank_doc = doc['pagerank_score'];
+                                if (pagerank_doc != null) {
+                                    pagerank = pagerank_doc.value;
+                                }
+                            } catch (Exception e) {}
+
+                            double weighted_pr = pagerank * 100.0;
+                            double final_score = (weighted_pr * 0.1 + es_score * 0.9);
+
+                            return final_score;
+                            """
+                        }
+                    }
+                }
+            ],
+            "boost_mode": "replace"
+        }
+    }
+
+def apply_result_mode(query_body, query_type, mode=None):
+    """Limit a webpage search to the fields the result page renders"""
+    if (mode or RESULT_MODE) != "lean" or query_type == "professor":
+        return query_body
+    # content and outlinks stay on the server, the snippet comes from the highlighter
+    query_body["_source"] = LEAN_SOURCE_FIELDS
+    if "collapse" in query_body:
+        query_body["collapse"]["inner_hits"]["_source"] = False
+    query_body["highlight"] = {
+        "fields": {
+            "content": {
+                "fragment_size": SNIPPET_LENGTH,
+                "number_of_fragments": 1,
+                "no_match_size": SNIPPET_LENGTH
+            }
+        },
+        # Templates escape the snippet, so return plain text
+        "pre_tags": [""],
+        "post_tags": [""]
+    }
+    return query_body
+
+def snippet_of(hit):
+    """Snippet of a webpage hit, from the highlighter when available"""
+    fragments = hit.get("highlight", {}).get("content")
+    if fragments:
+        return fragments[0] + "..."
+    return hit["_source"].get("content", "")[:SNIPPET_LENGTH] + "..."
+
+def build_search_body(query_term, query_type, start, result_mode=None, selected_indices=None):
+    """Build the scored search body used by /search"""
+    if query_type == "professor":
+        match_query = {
+            "multi_match": {
+                "query": query_term,
+                "fields": ["fullName^3", "department^2"],
+                "type": "best_fields",
+                "tie_breaker": 0.3
+            }
+        }
+    elif query_type == "phrase":
+        match_query = {"match_phrase": {"content": {"query": query_term, "slop": 0}}}
+    elif query_type == "wildcard":
+        match_query = {
+            "query_string": {
+                "query": query_term,
+                "fields": ["title^3", "content^2", "anchor_texts"],
+                "default_operator": "AND",
+                "analyze_wildcard": True
+            }
+        }
+    else:
+        match_query = {
+            "multi_match": {
+                "query": query_term,
+                "fields": ["title^3", "content^2", "anchor_texts"],
+                "type": "best_fields",
+                "tie_breaker": 0.3
+            }
+        }
+
+    query_body = {
+        "track_scores": True,
+        "query": build_fusion_query(match_query, scope_topics(query_type, selected_indices or [])),
+        "size": PAGE_SIZE,
+        "from": start
+    }
+
+    # Add collapse field only for non-professor searches
+    if query_type != "professor":
+        query_body["collapse"] = {
+            "field": "url",
+            "inner_hits": {
+                "name": "most_relevant",
+                "size": 1,
+                "sort": [{"_score": "desc"}]
+            }
+        }
+    return apply_result_mode(query_body, query_type, result_mode)
+
+def resolve_target_indices(query_type, selected_indices, indices):
+    """Pick the indices a search type runs against"""
+    if query_type == "professor":
+        # Professor search using professors index
+        return ["uiuc_professors"]
+    if query_type == "index":
+        return list(selected_indices)
+    return list(indices)
+
+def format_results(query_type, hits, indices, pagerank_lookup, topics=None):
+    """Turn search hits into the result dicts rendered by the templates"""
+    results = []
+    if query_type == "professor":
+        # Check for duplicate professor names
+        seen_names = set()
+        for hit in hits:
+            name = hit["_source"].get("fullName", "")
+            if name not in seen_names:
+                seen_names.add(name)
+                results.append({
+                    "title": name,
+                    "department": hit["_source"].get("department", ""),
+                    "rating": hit["_source"].get("avgRating", 0.0),
+                    "reviews": hit["_source"].get("numRatings", 0),
+                    "difficulty": hit["_source"].get("avgDifficulty", 0.0),
+                    "would_take_again": "No Data" if hit["_source"].get("wouldTakeAgainPercent", 0.0) == -1
+                                      else hit["_source"].get("wouldTakeAgainPercent", 0.0) / 100.0,
+                    "final_score": hit["_score"],
+                    "tags": hit["_source"].get("tags", [])
+                })
+        return results
+
+    # Check for duplicate URLs
+    seen_urls = set()
+    for hit in hits:
+        url = hit["_source"].get("url", "")
+        # Hits name the physical generation, the catalog knows the alias
+        index = logical_name(hit["_index"])
+        if url not in seen_urls:
+            seen_urls.add(url)
+            result = {
+                "title": hit["_source"].get("title", ""),
+                "url": url,
+                "relevance_score": hit["_score"],
+                "pagerank": pagerank_lookup(url),
+                "final_score": hit["_score"],
+                "snippet": snippet_of(hit),
+                "index": index,
+                "index_name": indices.get(index, index)
+            }
+            if FUSION_MODE == "rank_feature":
+                # Elasticsearch already fused the scores, recover the parts for display
+                if topics:
+                    topic_scores = hit["_source"].get("pagerank_topics", {})
+                    pr_score = sum(topic_scores.get(topic, 0.0) for topic in topics) / len(topics)
+                else:
+                    pr_score = hit["_source"].get("pagerank", 0.0)
+                result["pagerank"] = pr_score
+                result["relevance_score"] = (hit["_score"] - pr_score * PAGERANK_WEIGHT) / RELEVANCE_WEIGHT
+            else:
+                pr_score = result["pagerank"]
+                es_score = result["relevance_score"]
+                result["final_score"] = (pr_score * PAGERANK_WEIGHT + es_score * RELEVANCE_WEIGHT)
+            results.append(result)
+
+    # Script fusion only knows the PageRank of the current page
+    if FUSION_MODE != "rank_feature":
+        results.sort(key=lambda x: x["final_score"], reverse=True)
+    return results
+
+def search_plan(query_term, query_type, selected_indices, page, indices, pagerank_lookup, result_cache,
+                pagination_mode="cursor", cursor=None):
+    """
+    Plan one /search result page, the flow main.py and main_async.py share
+
+    Serves repeated queries from the result cache, runs the search (again on
+    the last page when `page` is past the end), builds the cursor links and
+    formats the hits. Like search_cursor.page_plan() it yields Elasticsearch
+    requests and is sent the responses, so each app only drives it with its
+    own client (search_cursor.run_plan() or async_run_plan()).
+
+    Args:
+        pagination_mode: "cursor" pages past the from/size window on a point-in-time, "offset" only uses from/size
+        cursor: Decoded cursor token of the requested page, if any
+    Returns:
+        dict: results, total_results, page and cursors for the result template
+    """
+    cache_key = result_cache.make_key(query_term, query_type, selected_indices, page)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query_body = build_search_body(query_term, query_type, (page - 1) * PAGE_SIZE, selected_indices=selected_indices)
+    target_indices = resolve_target_indices(query_type, selected_indices, indices)
+    if pagination_mode == "cursor":
+        response = yield from page_plan(query_body, target_indices, page, PAGE_SIZE, cursor)
+        page = response["page"]
+        total_results = response["total"]
+        hits = response["response"]["hits"]["hits"]
+    else:
+        response = yield ("search", query_body, target_indices)
+        total_results = response.get("hits", {}).get("total", {}).get("value", 0)
+        hits = response.get("hits", {}).get("hits", [])
+
+    # Calculate total pages and adjust if needed
+    total_pages = (total_results + PAGE_SIZE - 1) // PAGE_SIZE
+    if total_pages and page > total_pages:
+        page = total_pages
+        if pagination_mode == "cursor":
+            response = yield from page_plan(query_body, target_indices, page, PAGE_SIZE)
+            hits = response["response"]["hits"]["hits"]
+        else:
+            query_body["from"] = (page - 1) * PAGE_SIZE
+            response = yield ("search", query_body, target_indices)
+            hits = response.get("hits", {}).get("hits", [])
+
+    cursors = {}
+    if pagination_mode == "cursor":
+        cursors = page_cursors(hits, response["pit_id"], page, PAGE_SIZE, total_results)
+
+    result_page = {
+        "results": format_results(query_type, hits, indices, pagerank_lookup, scope_topics(query_type, selected_indices)),
+        "total_results": total_results,
+        "page": page,
+        "cursors": cursors
+    }
+    result_cache.put(cache_key, result_page)
+    return result_page
+
+def build_msearch_request(queries, indices):
+    """
+    Validate an /api/msearch payload and build the _msearch request lines
+
+    Args:
+        queries: List of {"q", "type", "selected_indices", "page"} dicts
+        indices: Current index catalog snapshot
+    Returns:
+        tuple: (entries, searches) where entries describes every query in order
+            (invalid ones carry an "error") and searches holds the header/body
+            pairs for the valid ones
+    """
+    entries = []
+    searches = []
+    for item in queries:
+        if not isinstance(item, dict):
+            entries.append({"error": "Query must be an object"})
+            continue
+        query_term = str(item.get("q", "")).strip()
+        query_type = item.get("type", "standard")
+        selected_indices = item.get("selected_indices") or []
+        entry = {"q": query_term, "type": query_type, "selected_indices": selected_indices}
+        entries.append(entry)
+        try:
+            page = max(1, int(item.get("page", 1)))
+        except (TypeError, ValueError):
+            entry["error"] = "Invalid page"
+            continue
+        entry["page"] = page
+
+        if not isinstance(selected_indices, list) or not all(isinstance(name, str) for name in selected_indices):
+            entry["error"] = "selected_indices must be a list of index names"
+        elif not query_term:
+            entry["error"] = "Missing query term"
+        elif query_type not in SEARCH_TYPES:
+            entry["error"] = f"Unknown search type: {query_type}"
+        elif query_type == "index" and not selected_indices:
+            entry["error"] = "Please select at least one index"
+        else:
+            entry["slot"] = len(searches) // 2
+            searches.append({"index": resolve_target_indices(query_type, selected_indices, indices)})
+            searches.append(build_search_body(query_term, query_type, (page - 1) * PAGE_SIZE,
+                                              selected_indices=selected_indices))
+    return entries, searches
+
+def format_msearch_results(entries, responses, indices, pagerank_lookup):
+    """Attach the _msearch responses to their queries, in request order"""
+    results = []
+    for entry in entries:
+        slot = entry.pop("slot", None)
+        if slot is None:
+            results.append(entry)
+            continue
+        response = responses[slot]
+        if "error" in response:
+            error = response["error"]
+            entry["error"] = error.get("reason", str(error)) if isinstance(error, dict) else str(error)
+            results.append(entry)
+            continue
+        hits_data = response.get("hits", {})
+        entry["total_results"] = hits_data.get("total", {}).get("value", 0)
+        entry["took_ms"] = response.get("took", 0)
+        entry["results"] = format_results(entry["type"], hits_data.get("hits", []), indices, pagerank_lookup,
+                                          scope_topics(entry["type"], entry["selected_indices"]))
+        results.append(entry)
+    return results
@@ -0,0 +1,276 @@
+import hashlib
+import os
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional, fall back to gzip
+    zstandard = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.common.url_hash import url_hash
+
+SNAPSHOT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "snapshots"
+)
+BLOB_FILE = "blobs.dat"
+INDEX_FILE = "index.npy"
+# Compaction rewrites the live blobs into a new segment once this much of the blob file is unreferenced
+COMPACT_DEAD_FRACTION = 0.3
+COMPACT_MIN_DEAD_BYTES = 16 * 2**20
+COPY_CHUNK_SIZE = 2**20
+
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+
+RECORD_DTYPE = np.dtype([
+    ("url_hash", "<u8"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("raw_length", "<u4"),
+    ("codec", "u1"),
+    ("digest", "u1", (16,)),
+    ("segment", "<u2")
+])
+
+def segment_file(segment):
+    """Blob file of a segment, segment 0 is the original blobs.dat"""
+    return BLOB_FILE if segment == 0 else f"blobs.{segment}.dat"
+
+def _with_segments(index):
+    # Indices written before compaction have no segment column, all their blobs are in blobs.dat
+    if "segment" in index.dtype.names:
+        return index
+    upgraded = np.zeros(len(index), dtype=RECORD_DTYPE)
+    for name in index.dtype.names:
+        upgraded[name] = index[name]
+    return upgraded
+
+def _blob_keys(index):
+    # (segment, offset) of every record, deduplicated pages share one blob
+    return np.column_stack((index["segment"].astype(np.uint64), index["offset"]))
+
+def _compress(data, codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9, wbits=31)  # gzip container
+
+def _decompressor(codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Snapshot was written with zstd but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(wbits=31)
+
+class SnapshotWriter:
+    """
+    Append raw HTML snapshots to the on-disk store
+
+    Blobs are compressed and appended to the current blob segment. Identical
+    pages are stored once, keyed by a content digest. close() merges the new
+    entries into the sorted offset index (later writes win), drops the URLs
+    passed to remove() and atomically replaces index.npy.
+
+    When enough of the segment is no longer referenced, close() first copies
+    the live blobs into a new segment file. Records name their segment, so
+    readers holding the old index keep reading the old file; it is deleted
+    when the next writer opens the store.
+    """
+
+    def __init__(self, store_dir=SNAPSHOT_DIR, codec=None):
+        self.store_dir = store_dir
+        self.codec = codec or (CODEC_ZSTD if zstandard is not None else CODEC_GZIP)
+        os.makedirs(store_dir, exist_ok=True)
+        index_path = os.path.join(store_dir, INDEX_FILE)
+        self._existing = _with_segments(np.load(index_path)) if os.path.exists(index_path) \
+            else np.empty(0, RECORD_DTYPE)
+        # New blobs go to the newest segment, every live record is in it after a compaction
+        self.segment = int(self._existing["segment"].max()) if len(self._existing) else 0
+        self._remove_stale_segments()
+        self._blobs = {
+            r["digest"].tobytes(): (r["offset"], r["length"], r["raw_length"], r["codec"], r["digest"], r["segment"])
+            for r in self._existing
+        }
+        self._records = {}
+        self._removed = set()
+        self._file = open(os.path.join(store_dir, segment_file(self.segment)), "ab")
+        self.added = 0
+        self.deduplicated = 0
+
+    def _remove_stale_segments(self):
+        # Segments left behind by the previous compaction, no published index references them
+        referenced = {segment_file(segment) for segment in np.unique(self._existing["segment"]).tolist()}
+        referenced.add(segment_file(self.segment))
+        for name in os.listdir(self.store_dir):
+            if name.startswith("blobs.") and name.endswith((".dat", ".dat.tmp")) and name not in referenced:
+                os.remove(os.path.join(self.store_dir, name))
+                print(f"[INFO] Snapshot store: removed old segment {name}")
+
+    def add(self, url, html):
+        """Store the snapshot of a URL"""
+        if not url or not html:
+            return
+        data = html.encode("utf-8") if isinstance(html, str) else html
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        record = self._blobs.get(digest)
+        if record is None:
+            blob = _compress(data, self.codec)
+            offset = self._file.tell()
+            self._file.write(blob)
+            record = (offset, len(blob), len(data), self.codec, np.frombuffer(digest, dtype="u1"), self.segment)
+            self._blobs[digest] = record
+        else:
+            self.deduplicated += 1
+        key = url_hash(url)
+        self._records[key] = (key,) + tuple(record)
+        self._removed.discard(key)
+        self.added += 1
+
+    def remove(self, key):
+        """Drop the snapshot of a url_hash() key on close(), unless this writer stored the URL"""
+        if key not in self._records:
+            self._removed.add(key)
+
+    def _dead_bytes(self, index):
+        total = sum(os.path.getsize(os.path.join(self.store_dir, segment_file(segment)))
+                    for segment in set(np.unique(index["segment"]).tolist()) | {self.segment})
+        _, first = np.unique(_blob_keys(index), axis=0, return_index=True)
+        return total - int(index["length"][first].sum(dtype=np.uint64)), total
+
+    def _compact(self, index):
+        """Copy the blobs an index references into a new segment, returns the index pointing there"""
+        segment = self.segment + 1
+        path = os.path.join(self.store_dir, segment_file(segment))
+        blobs, inverse = np.unique(_blob_keys(index), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        lengths = np.zeros(len(blobs), dtype=np.uint64)
+        lengths[inverse] = index["length"]
+        offsets = np.zeros(len(blobs), dtype=np.uint64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+
+        sources = {}
+        try:
+            with open(path + ".tmp", "wb") as out:
+                for (source, offset), length in zip(blobs.tolist(), lengths.tolist()):
+                    if source not in sources:
+                        sources[source] = open(os.path.join(self.store_dir, segment_file(source)), "rb")
+                    f = sources[source]
+                    f.seek(offset)
+                    while length > 0:
+                        chunk = f.read(min(COPY_CHUNK_SIZE, length))
+                        if not chunk:
+                            raise IOError(f"Snapshot blob at {offset} in {segment_file(source)} is truncated")
+                        out.write(chunk)
+                        length -= len(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for f in sources.values():
+                f.close()
+        os.replace(path + ".tmp", path)
+
+        compacted = index.copy()
+        compacted["offset"] = offsets[inverse]
+        compacted["segment"] = segment
+        self.segment = segment
+        return compacted
+
+    def close(self):
+        """Flush blobs, compact when needed and publish the merged index"""
+        self._file.close()
+        new_records = np.array(list(self._records.values()), dtype=RECORD_DTYPE)
+        merged = np.concatenate([new_records, self._existing])
+        # Stable sort + unique keeps the first (newest) record for every URL
+        merged = merged[np.argsort(merged["url_hash"], kind="stable")]
+        _, first = np.unique(merged["url_hash"], return_index=True)
+        merged = merged[first]
+        removed = 0
+        if self._removed:
+            keep = ~np.isin(merged["url_hash"], np.fromiter(self._removed, dtype=np.uint64, count=len(self._removed)))
+            removed = len(merged) - int(keep.sum())
+            merged = merged[keep]
+
+        dead, total = self._dead_bytes(merged)
+        if dead >= COMPACT_MIN_DEAD_BYTES and dead >= COMPACT_DEAD_FRACTION * total:
+            merged = self._compact(merged)
+            print(f"[INFO] Snapshot store: compacted into {segment_file(self.segment)}, "
+                  f"{dead / 2**20:.1f} of {total / 2**20:.1f} MB reclaimed")
+
+        index_path = os.path.join(self.store_dir, INDEX_FILE)
+        tmp_path = index_path + ".tmp.npy"
+        np.save(tmp_path, merged)
+        os.replace(tmp_path, index_path)
+        print(f"[INFO] Snapshot store: {self.added} pages written ({self.deduplicated} deduplicated), "
+              f"{removed} removed, {len(merged)} URLs indexed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class SnapshotStore:
+    """Read side of the snapshot store, with a memory-mapped offset index"""
+
+    def __init__(self, store_dir=SNAPSHOT_DIR):
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._index = np.empty(0, RECORD_DTYPE)
+        self._keys = self._index["url_hash"]
+
+    def _current_index(self):
+        # Reopen the index when an import has replaced it
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                self._mtime = mtime
+                if mtime is None:
+                    self._index = np.empty(0, RECORD_DTYPE)
+                else:
+                    self._index = _with_segments(np.load(self.index_path, mmap_mode="r"))
+                # searchsorted copies strided input on every call, keep a contiguous key column
+                self._keys = np.ascontiguousarray(self._index["url_hash"])
+            return self._index, self._keys
+
+    def lookup(self, url):
+        """Return the index record for a URL, or None"""
+        index, keys = self._current_index()
+        key = np.uint64(url_hash(url))
+        pos = np.searchsorted(keys, key)
+        if pos < len(keys) and keys[pos] == key:
+            return index[pos]
+        return None
+
+    @staticmethod
+    def etag(record):
+        """Content digest used as the HTTP ETag"""
+        return record["digest"].tobytes().hex()
+
+    def stream(self, record, chunk_size=64 * 1024):
+        """Yield the decompressed HTML of a record in chunks"""
+        decompressor = _decompressor(int(record["codec"]))
+        remaining = int(record["length"])
+        with open(os.path.join(self.store_dir, segment_file(int(record["segment"]))), "rb") as f:
+            f.seek(int(record["offset"]))
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        if hasattr(decompressor, "flush"):
+            tail = decompressor.flush()
+            if tail:
+                yield tail
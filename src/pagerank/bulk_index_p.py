@@ -1,11 +1,18 @@
-import json
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, helpers
 from tqdm import tqdm
+import numpy as np
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.bulk_engine import bulk_index
+from src.elasticsearch.bulk_load import bulk_load_mode
+from src.elasticsearch.index_generation import bump_generation
+from src.elasticsearch.index_manifest import load_manifest
+from src.elasticsearch.index_versions import target_indices
+from src.pagerank.pagerank_artifact import load_artifact, pagerank_fields
 
 
 es = Elasticsearch(
@@ -15,47 +22,76 @@ es = Elasticsearch(
     ssl_show_warn=False
 )
 
-index_name = "pagerank"
-pagerank_file = "data/pagerank/pagerank_scores.json"
 batch_size = 1000
 
-# Read PageRank results
-print(f"Reading file: {pagerank_file}")
-with open(pagerank_file, 'r', encoding='utf-8') as f:
-    pagerank_scores = json.load(f)
-
-# Convert to list and sort
-print("Sorting data...")
-scores_list = [(url, score) for url, score in pagerank_scores.items()]
-scores_list.sort(key=lambda x: x[1], reverse=True)
-
-# Prepare bulk import
-print("Starting bulk import...")
-actions = []
-total_imported = 0
-
-for url, score in tqdm(scores_list, desc="Import progress"):
-    # Add action metadata
-    actions.append({
-        "index": {
-            "_index": index_name
+def url_fields(url, table, topic_tables):
+    """PageRank fields of the webpage document of a URL"""
+    return pagerank_fields(table.get(url), {topic: topic_table.get(url) for topic, topic_table in topic_tables.items()})
+
+def update_actions(index_name, table, topic_tables):
+    """Partial update of every document of an index, keyed on its url"""
+    hits = helpers.scan(es, index=index_name, query={"query": {"match_all": {}}}, _source=["url"], size=batch_size)
+    for hit in hits:
+        url = hit["_source"].get("url")
+        if not url:
+            continue
+        yield {
+            "_op_type": "update",
+            "_index": index_name,
+            "_id": hit["_id"],
+            "doc": url_fields(url, table, topic_tables)
+        }
+
+def update_actions_by_id(index_name, ids, table, topic_tables):
+    """Partial update of every document of an index manifest, addressed by its URL-hash id without a scan"""
+    scores = table.get_hashes(ids).tolist()
+    topic_scores = {topic: topic_table.get_hashes(ids).tolist() for topic, topic_table in topic_tables.items()}
+    for i, key in enumerate(np.asarray(ids).tolist()):
+        fields = pagerank_fields(scores[i], {topic: values[i] for topic, values in topic_scores.items()})
+        yield {
+            "_op_type": "update",
+            "_index": index_name,
+            "_id": f"{key:016x}",
+            "doc": fields
         }
-    })
-    # Add document data
-    actions.append({
-        "url": url,
-        "pagerank_score": score
-    })
-    
-    # Bulk import
-    if len(actions) >= batch_size * 2:  # Multiply by 2 because each document has 2 lines
-        es.bulk(body=actions)
-        total_imported += len(actions) // 2  # Divide by 2 to get actual document count
-        actions = []
-
-# Import remaining data
-if actions:
-    es.bulk(body=actions)
-    total_imported += len(actions) // 2
-
-print(f"Successfully imported {total_imported} PageRank records") 
\ No newline at end of file
+
+def main():
+    artifact = load_artifact(verify=True)
+    if artifact is None:
+        print("Run pagerank_pipeline.py first")
+        return
+    table = artifact.lookup()
+    topic_tables = {topic: artifact.lookup(topic) for topic in artifact.topics}
+    print(f"Loaded PageRank artifact with {len(artifact)} scores, topics: {', '.join(topic_tables) or 'none'}")
+
+    indices = list(target_indices(es, lambda alias: alias.startswith("webpages_")).values())
+    if not indices:
+        print("No webpages_* indices found")
+        return
+
+    # Unchanged documents are no-ops in Elasticsearch, so rerunning after a recompute only rewrites what moved
+    total_updated = 0
+    total_failed = 0
+    for index_name in indices:
+        doc_count = es.count(index=index_name)["count"]
+        index_uuid = es.indices.get_settings(index=index_name)[index_name]["settings"]["index"]["uuid"]
+        manifest = load_manifest(index_name, index_uuid, doc_count)
+        if manifest is not None:
+            # Documents imported by bulk_index_data.py have ids derived from their URL hash
+            actions = update_actions_by_id(index_name, manifest.ids, table, topic_tables)
+        else:
+            print(f"[INFO] No index manifest for {index_name}, scanning it for document urls")
+            actions = update_actions(index_name, table, topic_tables)
+        # Updates are reindexed documents, so a new generation profits from bulk-load mode as much as
+        # from the first import; live indices keep their replicas and refresh
+        with bulk_load_mode(es, index_name), tqdm(total=doc_count, desc=f"Updating {index_name}") as progress:
+            stats = bulk_index(es, actions, progress=progress)
+        stats.log(f"Updated PageRank in {index_name}")
+        total_updated += stats.succeeded
+        total_failed += stats.rejected
+
+    print(f"Successfully updated {total_updated} documents, {total_failed} failed")
+    bump_generation("bulk_index_p.py")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.es_config as es_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_versions import target_indices
 
 # Connect to Elasticsearch
 es = Elasticsearch(
@@ -13,21 +15,29 @@ es = Elasticsearch(
     ssl_show_warn=False
 )
 
-index_name = "pagerank"
-
-# Define mapping
+# PageRank lives on the webpage documents themselves: rank_feature fields for
+# native fusion, a plain float for the script_score fusion mode
 mapping = {
-    "mappings": {
-        "properties": {
-            "url": {"type": "keyword"},
-            "pagerank_score": {"type": "float"}
-        }
+    "properties": {
+        "pagerank":        {"type": "rank_feature"},
+        "pagerank_topics": {"type": "rank_features"},
+        "pagerank_score":  {"type": "float"}
     }
 }
 
-if es.indices.exists(index=index_name):
-    es.indices.delete(index=index_name)
-    print(f"Deleted existing index: {index_name}")
+def webpage_indices():
+    """Physical indices of all webpages_* aliases, the new generation during a rebuild"""
+    return list(target_indices(es, lambda alias: alias.startswith("webpages_")).values())
+
+def main():
+    indices = webpage_indices()
+    if not indices:
+        print("No webpages_* indices found, run create_index_data.py first")
+        return
+    for index_name in indices:
+        # Adding fields that already exist with the same type is a no-op
+        es.indices.put_mapping(index=index_name, body=mapping)
+        print(f"Added PageRank fields to index: {index_name}")
 
-es.indices.create(index=index_name, body=mapping)
-print(f"Created index: {index_name}") 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.page_stream import PAGE_FILE_EXTENSIONS, iter_pages
+
+class UrlInterner:
+    """Assign dense int32 ids to URLs in first-seen order"""
+
+    def __init__(self):
+        self.ids = {}
+        self.urls = []
+
+    def __len__(self):
+        return len(self.urls)
+
+    def intern(self, url):
+        """Return the id of a URL, assigning the next id if it is new"""
+        node = self.ids.get(url)
+        if node is None:
+            node = len(self.urls)
+            self.ids[url] = node
+            self.urls.append(url)
+        return node
+
+class EdgeBuffer:
+    """Growable pair of int32 arrays holding (src, dst) edges"""
+
+    def __init__(self, capacity=1 << 16):
+        self.src = np.empty(capacity, dtype=np.int32)
+        self.dst = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.src):
+            return
+        capacity = max(needed, 2 * len(self.src))
+        for name in ("src", "dst"):
+            grown = np.empty(capacity, dtype=np.int32)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+
+    def extend(self, src, dsts):
+        """Append edges from one source to a list of destinations"""
+        count = len(dsts)
+        self._reserve(count)
+        self.src[self.size:self.size + count] = src
+        self.dst[self.size:self.size + count] = dsts
+        self.size += count
+
+    def extend_arrays(self, src, dst):
+        """Append parallel src/dst id arrays"""
+        count = len(src)
+        self._reserve(count)
+        self.src[self.size:self.size + count] = src
+        self.dst[self.size:self.size + count] = dst
+        self.size += count
+
+class CSRGraph:
+    """
+    Link graph in compressed sparse row form
+
+    Row i lists the sorted, de-duplicated targets of urls[i]. A sequential
+    build numbers nodes in the order networkx would have added them, so
+    PageRank results are identical to the DiGraph path. Bit k of topic_mask[i] is set when urls[i]
+    was crawled in the directory of topics[k].
+    """
+
+    def __init__(self, urls, indptr, indices, topics=None, topic_mask=None):
+        self.urls = urls
+        self.indptr = indptr
+        self.indices = indices
+        self.topics = topics or []
+        self.topic_mask = topic_mask if topic_mask is not None else np.zeros(len(urls), dtype=np.uint32)
+
+    @property
+    def num_nodes(self):
+        return len(self.urls)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def to_matrix(self):
+        """Adjacency matrix with M[src, dst] = 1"""
+        data = np.ones(self.num_edges)
+        return csr_matrix((data, self.indices, self.indptr), shape=(self.num_nodes, self.num_nodes))
+
+    def topic_members(self, topic):
+        """Node ids crawled in the directory of a topic"""
+        bit = np.uint32(1 << self.topics.index(topic))
+        return np.flatnonzero(self.topic_mask & bit)
+
+def edges_to_csr(num_nodes, src, dst):
+    """
+    Sort and de-duplicate an edge list into CSR arrays
+
+    Args:
+        num_nodes: Number of nodes
+        src: int32 source ids
+        dst: int32 destination ids
+    Returns:
+        tuple: (indptr int64, indices int32)
+    """
+    keys = src.astype(np.int64) * num_nodes + dst
+    keys = np.unique(keys)
+    rows = keys // num_nodes
+    indices = (keys - rows * num_nodes).astype(np.int32)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return indptr, indices
+
+MAX_TOPICS = 32  # bits of topic_mask
+# Files parsed or waiting to be merged per worker process; bounds the exported edge arrays held at once
+PARSE_WINDOW = 2
+
+class GraphBuilder:
+    """
+    Build the link graph straight into CSR while reading crawl files
+
+    Matches build_graph_from_directories(): pages without a URL are skipped,
+    self-loops are dropped, duplicate links collapse to one edge and a page
+    only becomes a node once it has an edge. Crawled pages remember the
+    topic (crawl directory) they came from for topic-sensitive PageRank.
+    """
+
+    def __init__(self):
+        self.interner = UrlInterner()
+        self.edges = EdgeBuffer()
+        self.is_source = np.zeros(1 << 12, dtype=bool)  # crawled page, not only a link target
+        self.topic_mask = np.zeros(1 << 12, dtype=np.uint32)
+        self.topics = []
+        self.edgeless_sources = set()  # crawled pages without links so far
+        self.total_links = 0
+
+    def _reserve_nodes(self):
+        needed = len(self.interner)
+        if needed <= len(self.is_source):
+            return
+        capacity = max(needed, 2 * len(self.is_source))
+        for name in ("is_source", "topic_mask"):
+            grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            grown[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def topic_bit(self, topic):
+        """Bit of a topic in topic_mask, registering new topics"""
+        if topic not in self.topics:
+            if len(self.topics) == MAX_TOPICS:
+                raise ValueError(f"At most {MAX_TOPICS} topics are supported")
+            self.topics.append(topic)
+        return np.uint32(1 << self.topics.index(topic))
+
+    def add_page(self, page, topic_bit=0):
+        """Add the outlinks of one crawled page"""
+        src = page.get('url')
+        if not src:
+            return
+        dsts = [dst for dst in page.get('outlinks', []) if dst != src]
+        if not dsts:
+            self.edgeless_sources.add(src)
+            return
+        intern = self.interner.intern
+        src_id = intern(src)
+        self.edges.extend(src_id, [intern(dst) for dst in dsts])
+        self._reserve_nodes()
+        self.is_source[src_id] = True
+        self.topic_mask[src_id] |= topic_bit
+        self.total_links += len(dsts)
+
+    def add_file(self, file_path, topic=None):
+        """Add every page of one crawl result file (JSON array or JSON lines), decoded one page at a time"""
+        topic_bit = self.topic_bit(topic) if topic is not None else 0
+        for page in iter_pages(file_path):
+            self.add_page(page, topic_bit)
+
+    def export(self):
+        """Edges of this builder with its local URL table, for merge()"""
+        size = len(self.edges)
+        nodes = len(self.interner)
+        return (self.interner.urls, self.edges.src[:size].copy(), self.edges.dst[:size].copy(),
+                self.is_source[:nodes].copy(), self.topics, self.topic_mask[:nodes].copy(),
+                list(self.edgeless_sources), self.total_links)
+
+    def merge(self, exported):
+        """Add the edges exported by another builder, re-interning its URLs"""
+        urls, src, dst, is_source, topics, topic_mask, edgeless_sources, total_links = exported
+        intern = self.interner.intern
+        mapping = np.fromiter((intern(url) for url in urls), dtype=np.int32, count=len(urls))
+        self.edges.extend_arrays(mapping[src], mapping[dst])
+        self._reserve_nodes()
+        self.is_source[mapping[is_source]] = True
+        # Local topic bits -> topic bits of this builder
+        remapped = np.zeros(len(urls), dtype=np.uint32)
+        for local_bit, topic in enumerate(topics):
+            remapped |= ((topic_mask >> np.uint32(local_bit)) & np.uint32(1)) * self.topic_bit(topic)
+        self.topic_mask[mapping] |= remapped
+        self.edgeless_sources.update(edgeless_sources)
+        self.total_links += total_links
+
+    @property
+    def unique_pages(self):
+        """Number of distinct crawled page URLs"""
+        ids = self.interner.ids
+        edgeless = sum(1 for url in self.edgeless_sources if url not in ids or not self.is_source[ids[url]])
+        return int(self.is_source.sum()) + edgeless
+
+    def build(self):
+        """Emit the CSR graph"""
+        num_nodes = len(self.interner)
+        indptr, indices = edges_to_csr(num_nodes, self.edges.src[:len(self.edges)], self.edges.dst[:len(self.edges)])
+        return CSRGraph(self.interner.urls, indptr, indices, list(self.topics), self.topic_mask[:num_nodes].copy())
+
+def parse_file(task):
+    """
+    Parse one crawl file into local edge arrays (runs in a worker process)
+
+    Args:
+        task: (file path, topic or None)
+    Returns:
+        tuple: GraphBuilder.export() of the file, or None if it could not be read
+    """
+    file_path, topic = task
+    builder = GraphBuilder()
+    try:
+        builder.add_file(file_path, topic)
+    except Exception as e:
+        print(f"[ERROR] Failed to process {file_path}: {str(e)}")
+        return None
+    return builder.export()
+
+def list_json_files(input_dirs, topics=None):
+    """All (crawl result file, topic) pairs of the input directories, in processing order"""
+    files = []
+    for i, input_dir in enumerate(input_dirs):
+        json_files = [f for f in os.listdir(input_dir) if f.endswith(PAGE_FILE_EXTENSIONS)]
+        if not json_files:
+            print(f"[WARNING] No JSON files found in {input_dir}")
+        topic = topics[i] if topics else None
+        files.extend((os.path.join(input_dir, json_file), topic) for json_file in json_files)
+    return files
+
+def merge_parsed(builder, futures):
+    """Merge finished parse_file() results into a builder"""
+    for future in futures:
+        exported = future.result()
+        if exported is not None:
+            builder.merge(exported)
+
+def build_csr_from_directories(input_dirs, workers=1, topics=None, stage=None):
+    """
+    Build the web graph as CSR from all JSON files in multiple directories
+
+    With workers > 1 the files are parsed by a process pool. At most
+    PARSE_WINDOW files per worker are in flight, and each result is merged
+    as soon as it completes, so memory does not grow with the number of
+    files. Node ids then follow completion order; the graph and the
+    scores per URL are the same as the sequential build.
+
+    Args:
+        input_dirs: List of directories containing crawler result JSON files
+        workers: Number of parser processes
+        topics: Optional topic name of every input directory
+        stage: Optional hook like the one of pagerank_pipeline.process_main_directory(),
+            entered around reading the files ("load") and the CSR sort ("graph_build")
+    Returns:
+        CSRGraph: Link graph with interned URLs
+    """
+    stage = stage or (lambda name: nullcontext())
+    with stage("load"):
+        builder = read_files(input_dirs, workers, topics)
+    with stage("graph_build"):
+        graph = builder.build()
+    print(f"[INFO] Web graph construction completed:")
+    print(f"      - Total unique pages: {builder.unique_pages}")
+    print(f"      - Total links: {builder.total_links}")
+    print(f"      - Graph nodes: {graph.num_nodes}")
+    print(f"      - Graph edges: {graph.num_edges}")
+    return graph
+
+def read_files(input_dirs, workers=1, topics=None):
+    """Parse the crawl files of build_csr_from_directories() into a GraphBuilder"""
+    builder = GraphBuilder()
+    files = list_json_files(input_dirs, topics)
+    print(f"[INFO] Parsing {len(files)} files with {workers} worker(s)")
+    if workers > 1 and len(files) > 1:
+        # Topic bits follow directory order, not completion order
+        for _, topic in files:
+            if topic is not None:
+                builder.topic_bit(topic)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for task in files:
+                if len(pending) >= PARSE_WINDOW * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    merge_parsed(builder, done)
+                pending.add(executor.submit(parse_file, task))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                merge_parsed(builder, done)
+    else:
+        for file_path, topic in files:
+            try:
+                builder.add_file(file_path, topic)
+            except Exception as e:
+                print(f"[ERROR] Failed to process {file_path}: {str(e)}")
+    return builder
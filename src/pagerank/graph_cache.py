@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+from contextlib import nullcontext
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.pagerank.graph_builder import CSRGraph, build_csr_from_directories, list_json_files
+
+GRAPH_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "pagerank", "graph_cache"
+)
+# Bump when GraphBuilder changes what it emits, so old caches are rebuilt
+CACHE_VERSION = 1
+
+def source_fingerprint(files):
+    """
+    Fingerprint of the crawl files a graph is built from
+
+    Covers path, size, modification time and topic of every file in
+    processing order, so any added, removed, rewritten or moved file
+    changes it without reading file contents.
+
+    Args:
+        files: (path, topic) pairs from list_json_files()
+    Returns:
+        str: Hex SHA-256
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode("utf-8"))
+    for path, topic in files:
+        stat = os.stat(path)
+        digest.update(f"\0{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{topic}".encode("utf-8"))
+    return digest.hexdigest()
+
+def save_graph(graph, fingerprint, cache_dir=GRAPH_CACHE_DIR):
+    """
+    Persist a CSR graph with the fingerprint of its sources
+
+    Args:
+        graph: CSRGraph to store
+        fingerprint: source_fingerprint() of the files it was built from
+        cache_dir: Output directory, replaced as a whole
+    """
+    tmp_dir = cache_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "indptr.npy"), graph.indptr)
+    np.save(os.path.join(tmp_dir, "indices.npy"), graph.indices)
+    np.save(os.path.join(tmp_dir, "topic_mask.npy"), graph.topic_mask)
+    with open(os.path.join(tmp_dir, "urls.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(graph.urls))
+    # Written last: a cache without meta.json is never loaded
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": CACHE_VERSION,
+            "fingerprint": fingerprint,
+            "num_nodes": graph.num_nodes,
+            "num_edges": graph.num_edges,
+            "topics": graph.topics
+        }, f, indent=2)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    print(f"[INFO] Link graph cache with {graph.num_nodes} nodes saved to: {cache_dir}")
+
+def load_graph(cache_dir=GRAPH_CACHE_DIR, fingerprint=None):
+    """
+    Memory-map a cached CSR graph
+
+    Args:
+        cache_dir: Cache directory written by save_graph()
+        fingerprint: Expected source fingerprint, None accepts any cached graph
+    Returns:
+        CSRGraph: The cached graph, or None if there is no matching cache
+    """
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"[WARNING] Ignoring unreadable link graph cache in {cache_dir}: {str(e)}")
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        print(f"[INFO] Link graph cache version {meta.get('version')} is outdated, rebuilding")
+        return None
+    if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+        print("[INFO] Crawl files changed since the link graph was cached, rebuilding")
+        return None
+
+    try:
+        with open(os.path.join(cache_dir, "urls.txt"), "r", encoding="utf-8") as f:
+            content = f.read()
+        urls = content.split("\n") if content else []
+        indptr = np.load(os.path.join(cache_dir, "indptr.npy"), mmap_mode="r")
+        indices = np.load(os.path.join(cache_dir, "indices.npy"), mmap_mode="r")
+        topic_mask = np.load(os.path.join(cache_dir, "topic_mask.npy"), mmap_mode="r")
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Ignoring unreadable link graph cache in {cache_dir}: {str(e)}")
+        return None
+    if len(urls) != meta["num_nodes"] or len(indptr) != len(urls) + 1 or len(indices) != meta["num_edges"]:
+        print(f"[WARNING] Ignoring inconsistent link graph cache in {cache_dir}")
+        return None
+    return CSRGraph(urls, indptr, indices, meta["topics"], topic_mask)
+
+def cached_csr_from_directories(input_dirs, workers=1, topics=None, cache_dir=GRAPH_CACHE_DIR, stage=None):
+    """
+    build_csr_from_directories() that reuses the cached graph while the crawl files are unchanged
+
+    Args:
+        stage: Optional stage hook, see build_csr_from_directories(); mapping the cache
+            counts as "load", writing it as "save"
+    Returns:
+        CSRGraph: Link graph with interned URLs
+    """
+    stage = stage or (lambda name: nullcontext())
+    with stage("load"):
+        fingerprint = source_fingerprint(list_json_files(input_dirs, topics))
+        graph = load_graph(cache_dir, fingerprint)
+    if graph is not None:
+        print(f"[INFO] Loaded cached link graph: {graph.num_nodes} nodes, {graph.num_edges} edges")
+        return graph
+    graph = build_csr_from_directories(input_dirs, workers=workers, topics=topics, stage=stage)
+    with stage("save"):
+        save_graph(graph, fingerprint, cache_dir)
+    return graph
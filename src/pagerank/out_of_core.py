@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.pagerank.solvers import SolverResult
+
+BLOCK_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "pagerank", "blocks"
+)
+MEMORY_BUDGET_MB = 1024
+BLOCK_FORMAT_VERSION = 1
+# Working set per edge of the block in flight: memory-mapped int32 src + int32 dst, the float64
+# gathered rank and the intp copy of dst that np.bincount makes
+BYTES_PER_EDGE = 24
+# Resident float64 N x K arrays of power_out_of_core(): r, r_new, the teleport matrix v and one
+# scratch buffer that holds r * scale, the teleport term and the residual in turn
+VECTORS_PER_COLUMN = 4
+# Resident bytes per node besides the rank columns: 1/outdeg (float64), outdeg (int32), dangling (bool)
+# and the float64 bincount result of a block
+BYTES_PER_NODE = 8 + 4 + 1 + 8
+
+def edges_per_block(num_nodes, budget_mb=MEMORY_BUDGET_MB, columns=1):
+    """
+    Largest block that fits the memory budget next to the resident arrays of power_out_of_core()
+
+    The budget covers the iteration only: the graph build and the caller's
+    CSRGraph (URL list, and the CSR arrays unless they are memory-mapped)
+    are not counted.
+
+    Raises:
+        ValueError: If the resident arrays alone exceed the budget
+    """
+    resident = num_nodes * (8 * VECTORS_PER_COLUMN * columns + BYTES_PER_NODE)
+    available = budget_mb * 2**20 - resident
+    if available < BYTES_PER_EDGE * 1024:
+        raise ValueError(f"Memory budget of {budget_mb} MB is too small for the rank vectors of {num_nodes} nodes "
+                         f"({resident / 2**20:.0f} MB)")
+    return min(available // BYTES_PER_EDGE, 2**31 - 1)
+
+def block_bounds(in_degree, max_edges):
+    """Split the destination range so every block holds at most max_edges in-links"""
+    cumulative = np.cumsum(in_degree)
+    bounds = [0]
+    N = len(in_degree)
+    while bounds[-1] < N:
+        start = bounds[-1]
+        base = cumulative[start - 1] if start > 0 else 0
+        end = int(np.searchsorted(cumulative, base + max_edges, side="right"))
+        # A single page with more in-links than a block allows gets a block of its own
+        bounds.append(min(max(end, start + 1), N))
+    return bounds
+
+def partition_graph(indptr, indices, out_dir=BLOCK_DIR, budget_mb=MEMORY_BUDGET_MB, columns=1):
+    """
+    Write a CSR link graph as edge blocks partitioned by destination range
+
+    Block b holds the in-links of pages bounds[b] to bounds[b + 1] - 1, sized
+    by in-degree to fit the memory budget. Within a block edges stay in source
+    order, so each iteration gathers from the rank vector sequentially. The CSR
+    arrays are read in chunks, so they can be memory-mapped (e.g. from
+    graph_cache.load_graph()) and never need to fit in memory.
+
+    Args:
+        indptr: CSR row pointers, row = source page
+        indices: CSR column indices, column = destination page
+        out_dir: Output directory, replaced as a whole
+        budget_mb: Memory budget the blocks are sized for
+        columns: Rank vectors iterated together (topics)
+    Returns:
+        BlockGraph: Reader of the written blocks
+    """
+    N, E = len(indptr) - 1, len(indices)
+    max_edges = edges_per_block(N, budget_mb, columns)
+    # Bucketing temporaries take about 4x the per-edge bytes of an iteration
+    chunk = max(1, min(max_edges // 4, E))
+    start_time = time.time()
+
+    in_degree = np.zeros(N, dtype=np.int64)
+    for start in range(0, E, chunk):
+        in_degree += np.bincount(indices[start:start + chunk], minlength=N)
+    bounds = block_bounds(in_degree, max_edges)
+    del in_degree
+
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    num_blocks = len(bounds) - 1
+    bounds_array = np.asarray(bounds, dtype=np.int64)
+
+    # Bucket edges by destination block, appending to one int32 file pair per block.
+    # Chunks are read in CSR order and bucketed stably, so blocks come out in source order.
+    block_edges = [0] * num_blocks
+    for start in range(0, E, chunk):
+        end = min(start + chunk, E)
+        src = (np.searchsorted(indptr, np.arange(start, end), side="right") - 1).astype(np.int32)
+        dst = np.asarray(indices[start:end], dtype=np.int32)
+        block = np.searchsorted(bounds_array, dst, side="right") - 1
+        order = np.argsort(block, kind="stable")
+        src, dst, block = src[order], dst[order], block[order]
+        splits = np.searchsorted(block, np.arange(1, num_blocks))
+        for b, (block_src, block_dst) in enumerate(zip(np.split(src, splits), np.split(dst, splits))):
+            if len(block_src):
+                with open(os.path.join(tmp_dir, f"block_{b:05d}.src"), "ab") as f:
+                    block_src.tofile(f)
+                with open(os.path.join(tmp_dir, f"block_{b:05d}.dst"), "ab") as f:
+                    (block_dst - bounds[b]).tofile(f)
+                block_edges[b] += len(block_src)
+
+    np.save(os.path.join(tmp_dir, "out_degree.npy"), np.diff(indptr).astype(np.int32))
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": BLOCK_FORMAT_VERSION,
+            "num_nodes": N,
+            "num_edges": E,
+            "budget_mb": budget_mb,
+            "bounds": bounds,
+            "block_edges": block_edges
+        }, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    print(f"[INFO] Partitioned {E} edges into {num_blocks} blocks of at most {max_edges} edges "
+          f"in {time.time() - start_time:.2f}s: {out_dir}")
+    return BlockGraph(out_dir)
+
+class BlockGraph:
+    """Edge blocks written by partition_graph(), memory-mapped on access"""
+
+    def __init__(self, path=BLOCK_DIR):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != BLOCK_FORMAT_VERSION:
+            raise ValueError(f"Unsupported edge block version in {path}: {meta.get('version')}")
+        self.num_nodes = meta["num_nodes"]
+        self.num_edges = meta["num_edges"]
+        self.bounds = meta["bounds"]
+        self.block_edges = meta["block_edges"]
+
+    @property
+    def num_blocks(self):
+        return len(self.bounds) - 1
+
+    def out_degree(self):
+        return np.load(os.path.join(self.path, "out_degree.npy"), mmap_mode="r")
+
+    def blocks(self):
+        """Yield (first node, end node, src ids, local dst ids) of every block"""
+        for b in range(self.num_blocks):
+            count = self.block_edges[b]
+            if not count:
+                continue
+            src = np.memmap(os.path.join(self.path, f"block_{b:05d}.src"), dtype=np.int32, mode="r", shape=(count,))
+            dst = np.memmap(os.path.join(self.path, f"block_{b:05d}.dst"), dtype=np.int32, mode="r", shape=(count,))
+            yield self.bounds[b], self.bounds[b + 1], src, dst
+
+def block_matvec(blocks, x):
+    """P @ x for the unweighted adjacency streamed block by block (x already scaled by 1/outdeg)"""
+    y = np.zeros_like(x)
+    for lo, hi, src, dst in blocks.blocks():
+        if x.ndim == 1:
+            y[lo:hi] = np.bincount(dst, weights=x[src], minlength=hi - lo)
+        else:
+            for k in range(x.shape[1]):
+                y[lo:hi, k] = np.bincount(dst, weights=x[src, k], minlength=hi - lo)
+    return y
+
+def power_out_of_core(blocks, r=None, alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    Power iteration streaming the edge blocks from disk
+
+    Same iteration as solvers.power(), dangling mass is redistributed along
+    the teleport vector. r and teleport may be N x K matrices.
+
+    Args:
+        blocks: BlockGraph from partition_graph()
+        r: Optional start vector, uniform by default
+        teleport: Optional teleport distribution, uniform by default
+    Returns:
+        SolverResult: Raw rank vector and per-iteration L1 residuals
+    """
+    start_time = time.time()
+    N = blocks.num_nodes
+    out_degree = np.asarray(blocks.out_degree())
+    dangling = out_degree == 0
+    inverse = np.zeros(N)
+    inverse[~dangling] = 1.0 / out_degree[~dangling]
+    del out_degree
+    if r is None:
+        r = np.ones(N) / N
+    v = np.full(N, 1.0 / N) if teleport is None else teleport
+    scale = inverse if r.ndim == 1 else inverse[:, None]
+    dangling = dangling if r.ndim == 1 else dangling[:, None]
+
+    # Temporaries go through one scratch buffer, so the iteration keeps the
+    # VECTORS_PER_COLUMN arrays edges_per_block() sized the blocks for
+    scratch = np.empty_like(r)
+    residuals = []
+    converged = False
+    for _ in range(max_iter):
+        np.multiply(r, dangling, out=scratch)
+        dangling_mass = scratch.sum(axis=0)
+        np.multiply(r, scale, out=scratch)
+        r_new = block_matvec(blocks, scratch)
+        r_new *= alpha
+        np.multiply(v, alpha * dangling_mass + (1 - alpha), out=scratch)
+        r_new += scratch
+        np.subtract(r_new, r, out=scratch)
+        np.abs(scratch, out=scratch)
+        residuals.append(float(scratch.sum(axis=0).max()))
+        r = r_new
+        if residuals[-1] < tol:
+            converged = True
+            break
+    return SolverResult("out_of_core", r, residuals, converged, time.time() - start_time)
@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.pagerank.pagerank_table import TABLE_FILE, PageRankTable, url_hashes, write_hashed_table
+
+ARTIFACT_DIR = os.path.dirname(TABLE_FILE)
+FORMAT_VERSION = 1
+# rank_feature only accepts strictly positive values, so the lowest page gets this instead of 0
+PAGERANK_FLOOR = 1e-6
+
+def pagerank_fields(score, topic_scores):
+    """
+    PageRank fields of a webpages document
+
+    Shared by the data import (full documents) and bulk_index_p.py (partial
+    updates), so both write the same values: every field is always present,
+    a partial update leaves no stale topic behind.
+
+    Args:
+        score: Global PageRank of the page, 0 if it is not in the graph
+        topic_scores: {topic: score} of every topic vector
+    """
+    fields = {
+        "pagerank": max(score, PAGERANK_FLOOR),
+        "pagerank_score": score
+    }
+    if topic_scores:
+        fields["pagerank_topics"] = {topic: max(value, PAGERANK_FLOOR) for topic, value in topic_scores.items()}
+    return fields
+
+def file_sha256(path):
+    """Hex SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_artifact(urls, scores, raw=None, topic_scores=None, stats=None, out_dir=ARTIFACT_DIR):
+    """
+    Write a PageRank run as a binary artifact directory
+
+    Layout: urls.txt (one URL per line), scores.npy (float32, node order),
+    raw.npy (float64 raw rank vector), topics/<topic>.npy, a sorted-hash
+    lookup table (table.bin, topics/<topic>.bin) and manifest.json with the
+    graph stats and the SHA-256 of every file.
+
+    Args:
+        urls: URL of every node
+        scores: Normalized score of every node
+        raw: Optional raw rank vector
+        topic_scores: Optional topic name to normalized score vector
+        stats: Optional dict of graph and solver statistics for the manifest
+        out_dir: Output directory, replaced as a whole
+    Returns:
+        dict: The manifest
+    """
+    topic_scores = topic_scores or {}
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, "topics"))
+
+    with open(os.path.join(tmp_dir, "urls.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(urls))
+    np.save(os.path.join(tmp_dir, "scores.npy"), np.asarray(scores, dtype=np.float32))
+    if raw is not None:
+        np.save(os.path.join(tmp_dir, "raw.npy"), np.asarray(raw, dtype=np.float64))
+    # Hash the URLs once for the global and every topic table
+    hashes = url_hashes(urls)
+    write_hashed_table(hashes, scores, os.path.join(tmp_dir, "table.bin"))
+    for topic, vector in topic_scores.items():
+        np.save(os.path.join(tmp_dir, "topics", f"{topic}.npy"), np.asarray(vector, dtype=np.float32))
+        write_hashed_table(hashes, vector, os.path.join(tmp_dir, "topics", f"{topic}.bin"))
+
+    files = {}
+    for root, _, names in os.walk(tmp_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, tmp_dir).replace(os.sep, "/")] = file_sha256(path)
+    manifest = {
+        "version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "num_nodes": len(urls),
+        "topics": list(topic_scores),
+        "stats": stats or {},
+        "files": files
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Move the old artifact aside first so readers only miss it for a rename
+    old_dir = out_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"[INFO] PageRank artifact with {len(urls)} nodes saved to: {out_dir}")
+    return manifest
+
+class PageRankArtifact:
+    """
+    Reader of an artifact written by write_artifact()
+
+    Score vectors are memory-mapped, URL lookups go through the sorted-hash
+    tables, so nothing is parsed beyond the manifest until it is used.
+    """
+
+    def __init__(self, path=ARTIFACT_DIR):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported PageRank artifact version in {path}: {self.manifest.get('version')}")
+        self._urls = None
+
+    def __len__(self):
+        return self.manifest["num_nodes"]
+
+    @property
+    def topics(self):
+        return self.manifest["topics"]
+
+    @property
+    def stats(self):
+        return self.manifest["stats"]
+
+    @property
+    def urls(self):
+        if self._urls is None:
+            with open(os.path.join(self.path, "urls.txt"), "r", encoding="utf-8") as f:
+                content = f.read()
+            self._urls = content.split("\n") if content else []
+        return self._urls
+
+    def verify(self):
+        """Check every file against the manifest checksums"""
+        for name, expected in self.manifest["files"].items():
+            if file_sha256(os.path.join(self.path, name)) != expected:
+                raise ValueError(f"Checksum mismatch for {name} in PageRank artifact {self.path}")
+        return True
+
+    def scores(self, topic=None):
+        """Memory-mapped float32 score vector in node order"""
+        name = "scores.npy" if topic is None else os.path.join("topics", f"{topic}.npy")
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    def raw(self):
+        """Raw rank vector, None when the run did not store it"""
+        path = os.path.join(self.path, "raw.npy")
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def lookup(self, topic=None):
+        """PageRankTable for score lookups by URL"""
+        name = "table.bin" if topic is None else os.path.join("topics", f"{topic}.bin")
+        return PageRankTable(os.path.join(self.path, name))
+
+    def sorted_items(self, topic=None):
+        """Iterator of (URL, score) pairs from the highest score down"""
+        scores = self.scores(topic)
+        urls = self.urls
+        order = np.argsort(-scores, kind="stable")
+        return zip([urls[i] for i in order.tolist()], scores[order].tolist())
+
+    def export_json(self, output_path, topic=None):
+        """Write {URL: score} as JSON, the format of the old pagerank_scores.json"""
+        scores = self.scores(topic)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({url: round(float(score), 8) for url, score in zip(self.urls, scores)}, f,
+                      indent=2, ensure_ascii=False)
+        print(f"[INFO] PageRank scores exported to: {output_path}")
+
+def load_artifact(path=ARTIFACT_DIR, verify=False):
+    """
+    Open the PageRank artifact of the last pipeline run
+
+    Returns:
+        PageRankArtifact: The artifact, or None if it is missing or invalid
+    """
+    try:
+        artifact = PageRankArtifact(path)
+        if verify:
+            artifact.verify()
+    except FileNotFoundError:
+        print(f"[WARNING] PageRank artifact not found at {path}")
+        return None
+    except (ValueError, KeyError) as e:
+        print(f"[ERROR] Invalid PageRank artifact: {str(e)}")
+        return None
+    return artifact
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, export or create a PageRank artifact")
+    parser.add_argument("--path", default=ARTIFACT_DIR, help="Artifact directory")
+    parser.add_argument("--from-json", help="Create the artifact from an existing pagerank_scores.json")
+    parser.add_argument("--export-json", help="Export the scores to a JSON file")
+    args = parser.parse_args()
+
+    if args.from_json:
+        with open(args.from_json, "r", encoding="utf-8") as f:
+            scores = json.load(f)
+        write_artifact(list(scores), np.fromiter(scores.values(), dtype=np.float32, count=len(scores)),
+                       out_dir=args.path)
+    artifact = load_artifact(args.path, verify=True)
+    if artifact is None:
+        sys.exit(1)
+    if args.export_json:
+        artifact.export_json(args.export_json)
+    print(json.dumps({key: value for key, value in artifact.manifest.items() if key != "files"}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,46 @@
 import json
 import os
+import sys
+import time
+from contextlib import nullcontext
 import numpy as np
-import networkx as nx
 from scipy.sparse import csr_matrix
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.page_stream import PAGE_FILE_EXTENSIONS, iter_pages
+from src.pagerank.graph_builder import build_csr_from_directories
+from src.pagerank.graph_cache import cached_csr_from_directories
+from src.pagerank.out_of_core import partition_graph, power_out_of_core
+from src.pagerank.pagerank_state import STATE_DIR, load_state, save_state
+from src.pagerank.pagerank_artifact import PageRankArtifact, write_artifact
+from src.pagerank.solvers import iterate, power, solver_matrix, transition_matrix
+
+# "csr" streams crawl files straight into a CSR matrix, "networkx" builds a DiGraph first
+GRAPH_BUILDER = "csr"
+# Parser processes for the csr builder
+GRAPH_WORKERS = os.cpu_count() or 1
+# Reuse the link graph in data/pagerank/graph_cache while the crawl files are unchanged (csr builder only)
+GRAPH_CACHE = True
+# Warm-start from the rank vector of the previous run (csr builder only). Off by default: it saves a few
+# iterations, but mapping the previous URLs onto the new graph costs more than they do at tol 1e-6
+INCREMENTAL = False
+# Converge the pages around changed links first, then finish with global iterations
+RESTRICT_TO_AFFECTED = False
+REGION_HOPS = 1
+MAX_REGION_FRACTION = 0.5
+# One teleport set per crawl directory (= webpages_<directory> index), csr builder only
+TOPIC_PAGERANK = True
+# One of solvers.SOLVERS: "power", "gauss_seidel", "aitken", "quadratic" or "legacy"
+PAGERANK_SOLVER = "power"
+# Stream edge blocks from data/pagerank/blocks instead of building the matrix in memory (csr builder,
+# power iteration only); the iteration stays within MEMORY_BUDGET_MB, the graph build is not covered
+OUT_OF_CORE = False
+MEMORY_BUDGET_MB = 1024
+# Also write the scores as data/pagerank/pagerank_scores.json (the binary artifact is always written)
+EXPORT_JSON = False
+# Stages of process_main_directory(), in order, for its stage hook
+PIPELINE_STAGES = ["load", "graph_build", "matrix_build", "iteration", "normalization", "save"]
+
 def get_all_json_dirs(main_dir):
     """
     Get all directories containing JSON files from main directory
@@ -15,7 +52,7 @@ def get_all_json_dirs(main_dir):
     """
     json_dirs = []
     for root, _, files in os.walk(main_dir):
-        if any(file.endswith('.json') for file in files):
+        if any(file.endswith(PAGE_FILE_EXTENSIONS) for file in files):
             json_dirs.append(root)
     return json_dirs
 
@@ -28,6 +65,8 @@ def build_graph_from_directories(input_dirs):
     Returns:
         networkx.DiGraph: Directed graph containing all page link relationships
     """
+    import networkx as nx  # only needed for the legacy builder
+    
     G = nx.DiGraph()
     total_pages = 0
     total_links = 0
@@ -38,7 +77,7 @@ def build_graph_from_directories(input_dirs):
         print(f"[INFO] Processing directory: {input_dir}")
         
         # Get all JSON files in current directory
-        json_files = [f for f in os.listdir(input_dir) if f.endswith('.json')]
+        json_files = [f for f in os.listdir(input_dir) if f.endswith(PAGE_FILE_EXTENSIONS)]
         
         if not json_files:
             print(f"[WARNING] No JSON files found in {input_dir}")
@@ -49,25 +88,22 @@ def build_graph_from_directories(input_dirs):
             file_path = os.path.join(input_dir, json_file)
             print(f"[INFO] Reading file: {file_path}")
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    pages = json.load(f)
-                    
-                    # Add all pages and links
-                    for page in pages:
-                        src = page.get('url')
-                        if not src:
-                            continue
-                            
-                        # 只统计未处理过的URL
-                        if src not in processed_urls:
-                            total_pages += 1
-                            processed_urls.add(src)
-                            
-                        outlinks = page.get('outlinks', [])
-                        for dst in outlinks:
-                            if dst != src:  # Avoid self-loops
-                                G.add_edge(src, dst)
-                                total_links += 1
+                # Add all pages and links, decoded one page at a time
+                for page in iter_pages(file_path):
+                    src = page.get('url')
+                    if not src:
+                        continue
+                        
+                    # 只统计未处理过的URL
+                    if src not in processed_urls:
+                        total_pages += 1
+                        processed_urls.add(src)
+                        
+                    outlinks = page.get('outlinks', [])
+                    for dst in outlinks:
+                        if dst != src:  # Avoid self-loops
+                            G.add_edge(src, dst)
+                            total_links += 1
             except Exception as e:
                 print(f"[ERROR] Failed to process {file_path}: {str(e)}")
     
@@ -79,70 +115,293 @@ def build_graph_from_directories(input_dirs):
     
     return G
 
-def pagerank(graph, alpha=0.85, tol=1e-6, max_iter=100):
+def pagerank(graph, alpha=0.85, tol=1e-6, max_iter=100, solver=PAGERANK_SOLVER, telemetry=None, stage=None):
     """
     PageRank algorithm implementation using sparse matrices
     """
-    nodes = list(graph.nodes())
+    stage = stage or (lambda name: nullcontext())
+    with stage("matrix_build"):
+        nodes = list(graph.nodes())
+        N = len(nodes)
+        
+        # Create node to index mapping
+        node_to_index = {node: i for i, node in enumerate(nodes)}
+        
+        # Create sparse adjacency matrix
+        rows, cols = [], []
+        for src, dst in graph.edges():
+            rows.append(node_to_index[src])
+            cols.append(node_to_index[dst])
+        
+        # Create sparse matrix
+        M = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(N, N))
+    return pagerank_matrix(M, nodes, alpha, tol, max_iter, solver, telemetry, stage)
+
+def pagerank_matrix(M, nodes, alpha=0.85, tol=1e-6, max_iter=100, solver=PAGERANK_SOLVER, telemetry=None,
+                    stage=None):
+    """
+    PageRank on a sparse adjacency matrix
+    
+    Args:
+        M: N x N csr_matrix with M[src, dst] = 1 for every link
+        nodes: URL of every row
+        solver: One of solvers.SOLVERS
+        telemetry: Optional dict, receives the solver summary under "global"
+        stage: Optional stage hook, see process_main_directory()
+    Returns:
+        dict: URL to normalized score
+    """
+    stage = stage or (lambda name: nullcontext())
+    with stage("matrix_build"):
+        P, dangling = solver_matrix(M, solver)
+    with stage("iteration"):
+        result = iterate(P, dangling, np.ones(M.shape[0]) / M.shape[0], solver, alpha, tol, max_iter)
+    log_result(result, "PageRank")
+    if telemetry is not None:
+        telemetry["global"] = result.summary()
+    with stage("normalization"):
+        return normalize_scores(result.rank, nodes)
+
+def log_result(result, label):
+    """
+    Print the convergence summary of a solver run
+    """
+    final_residual = result.residuals[-1] if result.residuals else 0.0
+    print(f"[INFO] {label} ({result.solver}): {result.iterations} iterations in {result.seconds:.2f}s, "
+          f"final residual {final_residual:.2e}")
+    if not result.converged:
+        print(f"[WARNING] {label} did not converge within {result.iterations} iterations")
+
+def save_convergence(telemetry, output_path):
+    """
+    Save the per-iteration residuals of the last run to a JSON file
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(telemetry, f, indent=2)
+    print(f"[INFO] PageRank convergence report saved to: {output_path}")
+
+def normalize_scores(r, nodes):
+    """
+    Map a raw rank vector to 0-1 scores keyed by URL
+    """
+    normalized_scores = normalize_vector(r)
+    return {nodes[i]: float(f"{normalized_scores[i]:.8f}") for i in range(len(nodes))}
+
+def normalize_vector(r):
+    """
+    Map a raw rank vector to 0-1 scores in node order
+    """
+    # Apply logarithmic normalization with scaling factor
+    scaling_factor = 10000
+    normalized_scores = np.log1p(r * scaling_factor)
+    
+    # Map scores to 0-1 range
+    min_score = np.min(normalized_scores)
+    max_score = np.max(normalized_scores)
+    if max_score > min_score:
+        normalized_scores = (normalized_scores - min_score) / (max_score - min_score)
+    return normalized_scores
+
+def warm_start_vector(prev, nodes, alpha=0.85):
+    """
+    Map the previous raw rank vector onto a new node set
+    
+    Args:
+        prev: State loaded by load_state()
+        nodes: URL of every node of the new graph
+    Returns:
+        tuple: (start vector, previous id of every node or -1 for new pages)
+    """
     N = len(nodes)
+    position = {url: i for i, url in enumerate(prev["urls"])}
+    prev_ids = np.fromiter((position.get(url, -1) for url in nodes), dtype=np.int64, count=N)
+    known = prev_ids >= 0
     
-    # Create node to index mapping
-    node_to_index = {node: i for i, node in enumerate(nodes)}
+    # New pages start from the teleport share, known pages keep their rank rescaled to the new N
+    r = np.full(N, (1 - alpha) / N)
+    r[known] = prev["rank"][prev_ids[known]] * (len(prev["urls"]) / N)
+    return r / r.sum(), prev_ids
+
+def affected_region(P, prev, prev_ids, hops=REGION_HOPS):
+    """
+    Find the pages whose rank is directly touched by a recrawl
     
-    # Create sparse adjacency matrix
-    rows, cols = [], []
-    for src, dst in graph.edges():
-        rows.append(node_to_index[src])
-        cols.append(node_to_index[dst])
+    Seeds are new pages and pages whose row of the transition matrix changed
+    (added or removed in-links, or linking pages whose out-degree changed). The region
+    grows by `hops` steps along the pages that depend on it.
+    
+    Returns:
+        numpy.ndarray: Sorted node ids of the region
+    """
+    N = P.shape[0]
+    prev_n = len(prev["urls"])
+    prev_graph = csr_matrix(
+        (np.ones(len(prev["indices"])), prev["indices"], prev["indptr"]), shape=(prev_n, prev_n)
+    )
+    prev_P = transition_matrix(prev_graph)[0].tocoo()
     
-    # Create sparse matrix
-    M = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(N, N))
+    # Previous transition matrix in the new numbering, pages that disappeared are dropped
+    new_ids = np.full(prev_n, -1, dtype=np.int64)
+    known = prev_ids >= 0
+    new_ids[prev_ids[known]] = np.nonzero(known)[0]
+    rows, cols = new_ids[prev_P.row], new_ids[prev_P.col]
+    keep = (rows >= 0) & (cols >= 0)
+    prev_P = csr_matrix((prev_P.data[keep], (rows[keep], cols[keep])), shape=(N, N))
     
-    # Normalize columns
-    col_sums = M.sum(axis=0)
-    col_sums[col_sums == 0] = 1  # Avoid division by zero
-    M = M.multiply(1 / col_sums)
+    diff = (P - prev_P).tocsr()
+    diff.eliminate_zeros()
+    region = (np.diff(diff.indptr) > 0) | ~known
     
-    # Initialize rank vector
-    r = np.ones(N) / N
+    frontier = region
+    for _ in range(hops):
+        frontier = ((P @ frontier.astype(np.float64)) > 0) & ~region
+        if not frontier.any():
+            break
+        region |= frontier
+    return np.nonzero(region)[0]
+
+def local_iteration(P, dangling, r, region, alpha=0.85, tol=1e-6, max_iter=100):
+    """
+    Iterate only the rows of a region, keeping every other page fixed
     
-    # Power iteration
+    Returns:
+        tuple: (rank vector, number of iterations)
+    """
+    N = P.shape[0]
+    P_region = P[region]
+    r = r.copy()
+    iterations = 0
     for _ in range(max_iter):
-        r_new = alpha * (M @ r) + (1 - alpha) / N
-        if np.linalg.norm(r_new - r, 1) < tol:
+        iterations += 1
+        updated = alpha * (P_region @ r) + (alpha * r[dangling].sum() + 1 - alpha) / N
+        delta = np.abs(updated - r[region]).sum()
+        r[region] = updated
+        if delta < tol:
             break
-        r = r_new
+    return r, iterations
+
+def rank_graph(graph, incremental=INCREMENTAL, restrict=RESTRICT_TO_AFFECTED, state_dir=STATE_DIR,
+               alpha=0.85, tol=1e-6, max_iter=100, solver=PAGERANK_SOLVER, telemetry=None, blocks=None, stage=None):
+    """
+    Compute PageRank for a CSR graph, warm-starting from the previous run
     
-    # Apply logarithmic normalization with scaling factor
-    scaling_factor = 10000
-    normalized_scores = np.log1p(r * scaling_factor)
+    Args:
+        graph: CSRGraph from build_csr_from_directories()
+        incremental: Warm-start from the state saved by the previous incremental run and save this one
+        restrict: Converge the affected region before the global iterations
+        state_dir: Directory of the saved state
+        solver: One of solvers.SOLVERS, "legacy" always starts cold
+        telemetry: Optional dict, receives the solver summary under "global"
+        blocks: Optional BlockGraph of the graph, iterates out of core with the power solver
+        stage: Optional stage hook, see process_main_directory()
+    Returns:
+        numpy.ndarray: Raw rank vector in node order
+    """
+    stage = stage or (lambda name: nullcontext())
+    N = graph.num_nodes
+    start_time = time.time()
+    r, prev = None, None
+    if incremental and solver != "legacy":
+        with stage("load"):
+            prev = load_state(state_dir)
+            if prev is not None:
+                r, prev_ids = warm_start_vector(prev, graph.urls, alpha)
+        if prev is not None:
+            print(f"[INFO] PageRank warm start: {int((prev_ids >= 0).sum())} of {N} pages known from the previous run")
     
-    # Map scores to 0-1 range
-    min_score = np.min(normalized_scores)
-    max_score = np.max(normalized_scores)
-    if max_score > min_score:
-        normalized_scores = (normalized_scores - min_score) / (max_score - min_score)
+    if blocks is not None:
+        if solver != "power":
+            print(f"[WARNING] Solver {solver} needs the matrix in memory, using power iteration out of core")
+        with stage("iteration"):
+            result = power_out_of_core(blocks, r, alpha, tol, max_iter)
+        log_result(result, f"PageRank out of core ({blocks.num_blocks} blocks)")
+    else:
+        with stage("matrix_build"):
+            P, dangling = solver_matrix(graph.to_matrix(), solver)
+        with stage("iteration"):
+            if prev is not None and restrict:
+                region = affected_region(P, prev, prev_ids)
+                if len(region) <= MAX_REGION_FRACTION * N:
+                    local_start = time.time()
+                    r, local_iterations = local_iteration(P, dangling, r, region, alpha, tol, max_iter)
+                    print(f"[INFO] PageRank affected region: {len(region)} pages, {local_iterations} local iterations "
+                          f"in {time.time() - local_start:.2f}s")
+                else:
+                    print(f"[INFO] PageRank affected region covers {len(region)} of {N} pages, skipping local iterations")
+            result = iterate(P, dangling, np.ones(N) / N if r is None else r, solver, alpha, tol, max_iter)
+        log_result(result, "PageRank cold start" if prev is None else "PageRank warm start")
+    if prev is not None:
+        print(f"[INFO] PageRank warm start: {time.time() - start_time:.2f}s in total")
     
-    # Return normalized scores
-    return {nodes[i]: float(f"{normalized_scores[i]:.8f}") for i in range(N)}
+    if telemetry is not None:
+        telemetry["global"] = result.summary()
+    # Only a warm start reads the state, so cold runs skip writing a copy of the graph
+    if incremental:
+        with stage("save"):
+            save_state(graph.urls, result.rank, graph.indptr, graph.indices, state_dir)
+    return result.rank
 
-def save_pagerank_to_json(pagerank_scores, output_path):
+def topic_pagerank(graph, alpha=0.85, tol=1e-6, max_iter=100, telemetry=None, blocks=None, stage=None):
     """
-    Save PageRank results to JSON file
+    Topic-sensitive PageRank for every topic of a graph
+    
+    Each topic teleports uniformly to the pages crawled in its directory,
+    dangling pages jump to the same set. All K vectors are iterated together
+    by the power solver as one sparse N x N times dense N x K product per step.
+    
+    Args:
+        graph: CSRGraph with topics
+        telemetry: Optional dict, receives the solver summary under "topics"
+        blocks: Optional BlockGraph of the graph, iterates out of core
+        stage: Optional stage hook, see process_main_directory()
+    Returns:
+        dict: Topic name to normalized score vector in node order
     """
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(pagerank_scores, f, indent=2, ensure_ascii=False)
-    print(f"[INFO] PageRank scores saved to: {output_path}")
+    stage = stage or (lambda name: nullcontext())
+    N, K = graph.num_nodes, len(graph.topics)
+    
+    with stage("matrix_build"):
+        # Teleport matrix, one column per topic
+        V = np.zeros((N, K))
+        for k, topic in enumerate(graph.topics):
+            members = graph.topic_members(topic)
+            if len(members):
+                V[members, k] = 1.0 / len(members)
+        if blocks is None:
+            P, dangling = transition_matrix(graph.to_matrix())
+    
+    with stage("iteration"):
+        if blocks is not None:
+            result = power_out_of_core(blocks, np.ones((N, K)) / N, alpha, tol, max_iter, teleport=V)
+        else:
+            result = power(P, dangling, np.ones((N, K)) / N, alpha, tol, max_iter, teleport=V)
+    log_result(result, f"Topic PageRank for {K} topics")
+    if telemetry is not None:
+        telemetry["topics"] = result.summary()
+    
+    with stage("normalization"):
+        return {topic: normalize_vector(result.rank[:, k]) for k, topic in enumerate(graph.topics)}
+
+def topic_of(input_dir, main_dir):
+    """
+    Topic of a crawl directory: its top-level folder below main_dir
+    """
+    relative = os.path.relpath(input_dir, main_dir)
+    return None if relative == "." else relative.split(os.sep)[0]
 
-def process_main_directory(main_dir, output_dir):
+def process_main_directory(main_dir, output_dir, stage=None):
     """
     Process all JSON files in main directory and its subdirectories
     
     Args:
         main_dir: Main directory path containing all data
         output_dir: Output directory path for saving PageRank results
+        stage: Optional hook, stage(name) returns a context manager entered around the
+            work of every stage of PIPELINE_STAGES (used to time the pipeline); a stage
+            can be entered several times, e.g. "iteration" for the global and topic vectors
     """
+    stage = stage or (lambda name: nullcontext())
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
@@ -151,25 +410,78 @@ def process_main_directory(main_dir, output_dir):
     print(f"[INFO] Found {len(input_dirs)} directories with JSON files")
     
     # Build graph from all directories
-    G = build_graph_from_directories(input_dirs)
+    if GRAPH_BUILDER == "networkx":
+        # Parses and adds edges in one pass, so reading the files counts as graph build
+        with stage("graph_build"):
+            G = build_graph_from_directories(input_dirs)
+        num_nodes = G.number_of_nodes()
+    else:
+        topics = [topic_of(input_dir, main_dir) for input_dir in input_dirs]
+        if GRAPH_CACHE:
+            graph = cached_csr_from_directories(input_dirs, workers=GRAPH_WORKERS, topics=topics,
+                                                cache_dir=os.path.join(output_dir, 'graph_cache'), stage=stage)
+        else:
+            graph = build_csr_from_directories(input_dirs, workers=GRAPH_WORKERS, topics=topics, stage=stage)
+        num_nodes = graph.num_nodes
     
     # Check if graph is empty
-    if G.number_of_nodes() == 0:
+    if num_nodes == 0:
         print("[ERROR] Built graph is empty, please check if input path is correct")
         print(f"Current input path: {main_dir}")
         exit(1)
     
     # Calculate PageRank
-    scores = pagerank(G)
+    telemetry = {}
+    topic_scores = {}
+    if GRAPH_BUILDER == "networkx":
+        scores = pagerank(G, solver=PAGERANK_SOLVER, telemetry=telemetry, stage=stage)
+        with stage("normalization"):
+            urls, raw = list(scores), None
+            normalized = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        stats = {"num_edges": G.number_of_edges()}
+    else:
+        blocks = None
+        if OUT_OF_CORE:
+            with stage("matrix_build"):
+                # Blocks are sized for the topic iteration, which keeps K rank vectors resident
+                columns = len(graph.topics) if TOPIC_PAGERANK and graph.topics else 1
+                blocks = partition_graph(graph.indptr, graph.indices, os.path.join(output_dir, 'blocks'),
+                                         MEMORY_BUDGET_MB, columns)
+        raw = rank_graph(graph, incremental=INCREMENTAL, restrict=RESTRICT_TO_AFFECTED,
+                         state_dir=os.path.join(output_dir, 'state'), solver=PAGERANK_SOLVER,
+                         telemetry=telemetry, blocks=blocks, stage=stage)
+        with stage("normalization"):
+            urls, normalized = graph.urls, normalize_vector(raw)
+        stats = {
+            "num_edges": graph.num_edges,
+            "dangling_nodes": int((np.diff(graph.indptr) == 0).sum()),
+            "topic_members": {topic: len(graph.topic_members(topic)) for topic in graph.topics}
+        }
+        # One vector per topic, indexed as pagerank_topics.<topic>
+        if TOPIC_PAGERANK and graph.topics:
+            topic_scores = topic_pagerank(graph, telemetry=telemetry, blocks=blocks, stage=stage)
+    stats["solver"] = {
+        name: {key: value for key, value in summary.items() if key != "residuals"}
+        for name, summary in telemetry.items()
+    }
     
-    # Save results
-    output_file = os.path.join(output_dir, 'pagerank_scores.json')
-    save_pagerank_to_json(scores, output_file)
+    # Save results: score vectors plus the lookup tables memory-mapped by the web process
+    with stage("save"):
+        artifact_dir = os.path.join(output_dir, 'artifact')
+        write_artifact(urls, normalized, raw, topic_scores, stats, artifact_dir)
+        if EXPORT_JSON:
+            PageRankArtifact(artifact_dir).export_json(os.path.join(output_dir, 'pagerank_scores.json'))
+        
+        # Residual of every iteration, to compare solvers on the real graph
+        save_convergence(telemetry, os.path.join(output_dir, 'convergence.json'))
 
-if __name__ == "__main__":
+def main():
     # Main directory containing all data
     main_dir = './data/raw/website'
     output_dir = './data/pagerank'
     
     # Process all directories
     process_main_directory(main_dir, output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+
+import numpy as np
+
+STATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "pagerank", "state"
+)
+
+def save_state(urls, rank, indptr, indices, state_dir=STATE_DIR):
+    """
+    Save the raw rank vector and link graph of a PageRank run
+
+    Args:
+        urls: URL of every node
+        rank: Raw (pre-normalization) rank vector
+        indptr: CSR row pointers of the link graph
+        indices: CSR column indices of the link graph
+        state_dir: Output directory, replaced as a whole
+    """
+    tmp_dir = state_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "rank.npy"), np.asarray(rank, dtype=np.float64))
+    np.save(os.path.join(tmp_dir, "indptr.npy"), indptr)
+    np.save(os.path.join(tmp_dir, "indices.npy"), indices)
+    with open(os.path.join(tmp_dir, "urls.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(urls))
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.replace(tmp_dir, state_dir)
+    print(f"[INFO] PageRank state for {len(urls)} nodes saved to: {state_dir}")
+
+def load_state(state_dir=STATE_DIR):
+    """
+    Load the state saved by the previous run
+
+    Returns:
+        dict: urls, rank, indptr and indices, or None when there is no usable state
+    """
+    try:
+        with open(os.path.join(state_dir, "urls.txt"), "r", encoding="utf-8") as f:
+            content = f.read()
+        state = {
+            "urls": content.split("\n") if content else [],
+            "rank": np.load(os.path.join(state_dir, "rank.npy")),
+            "indptr": np.load(os.path.join(state_dir, "indptr.npy"), mmap_mode="r"),
+            "indices": np.load(os.path.join(state_dir, "indices.npy"), mmap_mode="r")
+        }
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable PageRank state in {state_dir}: {str(e)}")
+        return None
+    if len(state["urls"]) != len(state["rank"]) or len(state["indptr"]) != len(state["urls"]) + 1:
+        print(f"[WARNING] Ignoring inconsistent PageRank state in {state_dir}")
+        return None
+    return state
@@ -0,0 +1,147 @@
+import mmap
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# One URL key for the PageRank table, the snapshot store and the webpage document ids
+from src.common.url_hash import url_hash
+
+# Lookup table of the PageRank artifact written by the pipeline (see pagerank_artifact.py)
+TABLE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "pagerank", "artifact", "table.bin"
+)
+MAGIC = b"PRTABLE1"
+HEADER_SIZE = 16  # magic + uint64 entry count
+CHECK_INTERVAL = 1.0  # seconds between checks for a replaced table file
+
+def url_hashes(urls):
+    """uint64 keys of a sequence of URLs"""
+    return np.fromiter((url_hash(url) for url in urls), dtype="<u8", count=len(urls))
+
+def write_table(pagerank_scores, path=TABLE_FILE):
+    """
+    Write PageRank scores as a sorted hash table file
+
+    Args:
+        pagerank_scores: Mapping of URL to score
+        path: Output file path
+    Returns:
+        int: Number of entries written
+    """
+    scores = np.fromiter(pagerank_scores.values(), dtype="<f4", count=len(pagerank_scores))
+    return write_hashed_table(url_hashes(pagerank_scores), scores, path)
+
+def write_hashed_table(hashes, scores, path=TABLE_FILE):
+    """
+    Write a sorted hash table file from URL hashes computed by url_hashes()
+
+    Layout: 16 byte header, N sorted uint64 URL hashes, N float32 scores.
+
+    Returns:
+        int: Number of entries written
+    """
+    hashes = np.asarray(hashes, dtype="<u8")
+    scores = np.asarray(scores, dtype="<f4")
+    order = np.argsort(hashes, kind="stable")
+    hashes, scores = hashes[order], scores[order]
+    # A 64-bit collision is unlikely at crawl scale, keep the first entry if it happens
+    hashes, first = np.unique(hashes, return_index=True)
+    scores = scores[first]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(hashes)).tobytes())
+        f.write(hashes.tobytes())
+        f.write(scores.tobytes())
+    os.replace(tmp_path, path)
+    print(f"[INFO] PageRank table with {len(hashes)} entries saved to: {path}")
+    return len(hashes)
+
+class PageRankTable:
+    """
+    Memory-mapped URL -> PageRank lookup
+
+    Hashes and scores are mapped read-only, so every worker process shares
+    the same page cache instead of holding its own dict (12 bytes per URL
+    instead of 100+). The file is reopened when the pipeline replaces it.
+    """
+
+    def __init__(self, path=TABLE_FILE, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = None
+        self._mtime = None
+        self._arrays = (np.empty(0, dtype="<u8"), np.empty(0, dtype="<f4"))
+
+    def _current(self):
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.check_interval:
+            return self._arrays
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            self._checked = now
+            if mtime is None and self._mtime is not None:
+                # The artifact directory is being swapped, keep serving the loaded table
+                return self._arrays
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._arrays = self._open()
+            return self._arrays
+
+    def _open(self):
+        empty = np.empty(0, dtype="<u8"), np.empty(0, dtype="<f4")
+        if self._mtime is None:
+            print(f"[WARNING] PageRank table not found at {self.path}")
+            return empty
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[:8] != MAGIC:
+                print(f"[ERROR] {self.path} is not a PageRank table")
+                return empty
+            count = int(np.frombuffer(header, dtype="<u8", count=1, offset=8)[0])
+            if count == 0:
+                return empty
+            # Plain ndarray views over one shared read-only mapping (np.memmap scalars are slow)
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        hashes = np.frombuffer(mapping, dtype="<u8", count=count, offset=HEADER_SIZE)
+        scores = np.frombuffer(mapping, dtype="<f4", count=count, offset=HEADER_SIZE + 8 * count)
+        print(f"[INFO] Loaded PageRank table with {count} entries")
+        return hashes, scores
+
+    def __len__(self):
+        return len(self._current()[0])
+
+    def get(self, url, default=0.0):
+        """Return the PageRank score of a URL"""
+        hashes, scores = self._current()
+        key = np.uint64(url_hash(url))
+        pos = int(hashes.searchsorted(key))
+        if pos < len(hashes) and hashes[pos] == key:
+            return float(scores[pos])
+        return default
+
+    def get_many(self, urls, default=0.0):
+        """Return the PageRank scores of several URLs with one vectorized search"""
+        keys = np.fromiter((url_hash(url) for url in urls), dtype="<u8", count=len(urls))
+        return self.get_hashes(keys, default).tolist()
+
+    def get_hashes(self, keys, default=0.0):
+        """PageRank scores of url_hashes() keys as a float64 array"""
+        hashes, scores = self._current()
+        keys = np.asarray(keys, dtype="<u8")
+        if not len(hashes):
+            return np.full(len(keys), default, dtype=np.float64)
+        pos = np.minimum(hashes.searchsorted(keys), len(hashes) - 1)
+        found = hashes[pos] == keys
+        return np.where(found, scores[pos].astype(np.float64), default)
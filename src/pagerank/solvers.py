@@ -0,0 +1,234 @@
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags, tril, triu
+from scipy.sparse.linalg import spsolve_triangular
+
+SOLVERS = ["power", "gauss_seidel", "aitken", "quadratic", "legacy"]
+EXTRAPOLATION_PERIOD = 10  # power steps between two extrapolations
+
+class SolverResult:
+    """Rank vector of a solver run plus its convergence telemetry"""
+
+    def __init__(self, solver, rank, residuals, converged, seconds):
+        self.solver = solver
+        self.rank = rank
+        self.residuals = residuals
+        self.converged = converged
+        self.seconds = seconds
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    def summary(self):
+        """JSON-serializable telemetry"""
+        return {
+            "solver": self.solver,
+            "converged": self.converged,
+            "iterations": self.iterations,
+            "seconds": self.seconds,
+            "final_residual": self.residuals[-1] if self.residuals else None,
+            "residuals": self.residuals
+        }
+
+def transition_matrix(M):
+    """
+    Column-stochastic transition matrix of a link graph
+
+    Args:
+        M: N x N adjacency matrix with M[src, dst] = 1 for every link
+    Returns:
+        tuple: (P with P[dst, src] = 1 / outdeg(src) as csr_matrix, boolean dangling-page mask)
+    """
+    out_degree = np.asarray(M.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inverse = np.zeros_like(out_degree, dtype=np.float64)
+    inverse[~dangling] = 1.0 / out_degree[~dangling]
+    return csr_matrix((diags(inverse) @ M).T), dangling
+
+def legacy_transition_matrix(M):
+    """
+    Matrix of the original pipeline: M normalized by column sums (in-degree)
+
+    Iterating r = alpha * P @ r + (1 - alpha) / N with this matrix lets a page
+    collect rank from the pages it links to and drops dangling mass. Kept so
+    old and new rankings can be compared.
+    """
+    col_sums = M.sum(axis=0)
+    col_sums[col_sums == 0] = 1  # Avoid division by zero
+    return M.multiply(1 / col_sums).tocsr()
+
+def solver_matrix(M, solver="power"):
+    """
+    Transition matrix and dangling mask a solver iterates on
+
+    Returns:
+        tuple: legacy_transition_matrix(M) and None for "legacy", transition_matrix(M) otherwise
+    """
+    if solver == "legacy":
+        return legacy_transition_matrix(M), None
+    return transition_matrix(M)
+
+def _teleport(N, teleport):
+    return np.full(N, 1.0 / N) if teleport is None else teleport
+
+def _step(P, dangling, r, alpha, v):
+    # Dangling pages jump like teleports, so every column keeps summing to 1
+    dangling_mass = r[dangling].sum(axis=0)
+    return alpha * (P @ r) + (alpha * dangling_mass + (1 - alpha)) * v
+
+def _residual(r_new, r):
+    return float(np.abs(r_new - r).sum(axis=0).max())
+
+def power(P, dangling, r, alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    Power iteration with dangling mass redistributed along the teleport vector
+
+    r and teleport may be N x K matrices to iterate K vectors together.
+    """
+    start_time = time.time()
+    v = _teleport(P.shape[0], teleport)
+    residuals = []
+    converged = False
+    for _ in range(max_iter):
+        r_new = _step(P, dangling, r, alpha, v)
+        residuals.append(_residual(r_new, r))
+        r = r_new
+        if residuals[-1] < tol:
+            converged = True
+            break
+    return SolverResult("power", r, residuals, converged, time.time() - start_time)
+
+def gauss_seidel(P, dangling, r, alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    Gauss-Seidel sweeps on the linear system (I - alpha * P) x = v
+
+    With dangling columns left empty, the normalized solution of this system
+    is the PageRank vector. Each sweep solves the lower triangular part with
+    the previous iterate on the strictly upper part, so updated ranks are
+    used within the same sweep.
+    """
+    start_time = time.time()
+    N = P.shape[0]
+    v = _teleport(N, teleport)
+    system = csr_matrix(diags(np.ones(N)) - alpha * P)
+    lower = csr_matrix(tril(system, format="csr"))
+    upper = csr_matrix(triu(system, k=1, format="csr"))
+    residuals = []
+    converged = False
+    x = r
+    for _ in range(max_iter):
+        x = spsolve_triangular(lower, v - upper @ x, lower=True)
+        r_new = x / x.sum(axis=0)
+        residuals.append(_residual(r_new, r))
+        r = r_new
+        if residuals[-1] < tol:
+            converged = True
+            break
+    return SolverResult("gauss_seidel", r, residuals, converged, time.time() - start_time)
+
+def _aitken(history):
+    # Component-wise Aitken delta-squared on the last three iterates
+    x0, x1, x2 = history[-3:]
+    d1, d2 = x1 - x0, x2 - x1
+    denominator = d2 - d1
+    safe = np.abs(denominator) > 1e-15
+    x = x2.copy()
+    x[safe] = x2[safe] - d2[safe] ** 2 / denominator[safe]
+    return x
+
+def _quadratic(history):
+    # Quadratic extrapolation (Kamvar et al.) on the last four iterates
+    x0, x1, x2, x3 = history[-4:]
+    Y = np.column_stack([x1 - x0, x2 - x0])
+    gamma, *_ = np.linalg.lstsq(Y, -(x3 - x0), rcond=None)
+    g1, g2, g3 = gamma[0], gamma[1], 1.0
+    return (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+
+def extrapolated(P, dangling, r, alpha=0.85, tol=1e-6, max_iter=100, teleport=None, method="quadratic"):
+    """
+    Power iteration accelerated by periodic Aitken or quadratic extrapolation
+    """
+    start_time = time.time()
+    v = _teleport(P.shape[0], teleport)
+    extrapolate, needed = (_aitken, 3) if method == "aitken" else (_quadratic, 4)
+    history = [r]
+    residuals = []
+    converged = False
+    for iteration in range(1, max_iter + 1):
+        r_new = _step(P, dangling, r, alpha, v)
+        history = (history + [r_new])[-needed:]
+        if iteration % EXTRAPOLATION_PERIOD == 0 and len(history) == needed:
+            candidate = np.abs(extrapolate(history))
+            if np.isfinite(candidate).all() and candidate.sum() > 0:
+                r_new = candidate / candidate.sum()
+                history = [r_new]
+        residuals.append(_residual(r_new, r))
+        r = r_new
+        if residuals[-1] < tol:
+            converged = True
+            break
+    return SolverResult(method, r, residuals, converged, time.time() - start_time)
+
+def legacy(P, dangling, r, alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    The original iteration on legacy_transition_matrix(), unchanged
+
+    On convergence it returns the iterate before the last step, like the
+    original loop did.
+    """
+    start_time = time.time()
+    N = P.shape[0]
+    residuals = []
+    converged = False
+    for _ in range(max_iter):
+        r_new = alpha * (P @ r) + (1 - alpha) / N
+        residuals.append(_residual(r_new, r))
+        if residuals[-1] < tol:
+            converged = True
+            break
+        r = r_new
+    return SolverResult("legacy", r, residuals, converged, time.time() - start_time)
+
+def iterate(P, dangling, r, solver="power", alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    Run a solver on a transition matrix from solver_matrix()
+
+    Args:
+        P: Column-stochastic transition matrix, dangling columns empty
+        dangling: Boolean dangling-page mask
+        r: Start vector
+        solver: One of SOLVERS
+    Returns:
+        SolverResult: Raw rank vector and per-iteration L1 residuals
+    """
+    if solver == "legacy":
+        return legacy(P, dangling, r, alpha, tol, max_iter)
+    if solver == "power":
+        return power(P, dangling, r, alpha, tol, max_iter, teleport)
+    if solver == "gauss_seidel":
+        return gauss_seidel(P, dangling, r, alpha, tol, max_iter, teleport)
+    if solver in ("aitken", "quadratic"):
+        return extrapolated(P, dangling, r, alpha, tol, max_iter, teleport, method=solver)
+    raise ValueError(f"Unknown PageRank solver: {solver}")
+
+def solve(M, solver="power", r=None, alpha=0.85, tol=1e-6, max_iter=100, teleport=None):
+    """
+    Compute PageRank of an adjacency matrix with the selected solver
+
+    Args:
+        M: N x N adjacency matrix with M[src, dst] = 1 for every link
+        solver: One of SOLVERS
+        r: Optional start vector, uniform by default
+        teleport: Optional teleport distribution, uniform by default
+    Returns:
+        SolverResult: Raw rank vector and per-iteration L1 residuals
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown PageRank solver: {solver}")
+    N = M.shape[0]
+    if r is None:
+        r = np.ones(N) / N
+    P, dangling = solver_matrix(M, solver)
+    return iterate(P, dangling, r, solver, alpha, tol, max_iter, teleport)
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+from elasticsearch import Elasticsearch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+from src.config import es_config
+from src.elasticsearch.bulk_engine import bulk_index
+from src.elasticsearch.bulk_load import bulk_load_mode, create_settings
+from src.elasticsearch.create_index_data import mapping
+
+INDEX_PREFIX = "bulk_load_benchmark_"
+MODES = ["default", "bulk_load"]
+WORDS = ("campus research student course engineering computer science library admission graduate "
+         "faculty department lecture laboratory scholarship undergraduate seminar housing").split()
+
+def synthetic_pages(index_name, num_docs, content_words, seed):
+    """Webpage documents with random English-ish text"""
+    rng = random.Random(seed)
+    for i in range(num_docs):
+        yield {
+            "_index": index_name,
+            "_source": {
+                "title": " ".join(rng.choices(WORDS, k=6)),
+                "url": f"https://example.illinois.edu/{index_name}/{i}",
+                "anchor_texts": [" ".join(rng.choices(WORDS, k=3)) for _ in range(3)],
+                "content": " ".join(rng.choices(WORDS, k=content_words)),
+                "outlinks": [f"https://example.illinois.edu/{rng.randrange(num_docs)}" for _ in range(10)],
+                "pagerank_score": 0.0
+            }
+        }
+
+def run_mode(es, mode, num_docs, content_words, workers, force_merge, seed):
+    """Create a fresh index, import into it and make the result searchable"""
+    index_name = f"{INDEX_PREFIX}{mode}"
+    es.options(ignore_status=404).indices.delete(index=index_name)
+    es.indices.create(index=index_name, body={**mapping, "settings": create_settings(mode == "bulk_load")})
+
+    start = time.time()
+    with bulk_load_mode(es, index_name, enabled=mode == "bulk_load", force_merge_segments=force_merge):
+        stats = bulk_index(es, synthetic_pages(index_name, num_docs, content_words, seed), workers=workers)
+        import_seconds = time.time() - start
+    if mode == "default":
+        # Same end state as bulk-load mode: everything searchable (and merged)
+        es.indices.refresh(index=index_name)
+        if force_merge:
+            es.options(request_timeout=3600).indices.forcemerge(index=index_name, max_num_segments=force_merge)
+    total_seconds = time.time() - start
+
+    segments = es.indices.segments(index=index_name)["indices"][index_name]["shards"]
+    num_segments = sum(len(copy["segments"]) for shard in segments.values() for copy in shard if copy["routing"]["primary"])
+    count = es.count(index=index_name)["count"]
+    es.indices.delete(index=index_name)
+    return {
+        "mode": mode,
+        "docs": count,
+        "rejected": stats.rejected,
+        "import_seconds": import_seconds,
+        "total_seconds": total_seconds,
+        "docs_per_second": count / total_seconds if total_seconds else 0.0,
+        "segments": num_segments
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput with bulk-load mode on and off")
+    parser.add_argument("-n", "--num-docs", type=int, default=100_000)
+    parser.add_argument("--content-words", type=int, default=300, help="Words of page content per document")
+    parser.add_argument("--workers", type=int, default=4, help="Bulk engine worker threads")
+    parser.add_argument("--force-merge", type=int, help="Force-merge to this many segments after the import")
+    parser.add_argument("-r", "--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    es = Elasticsearch(
+        ["https://localhost:9200"],
+        basic_auth=("elastic", es_config.KEY),
+        verify_certs=False,
+        ssl_show_warn=False
+    )
+
+    rows = []
+    for repeat in range(args.repeats):
+        # Alternate the order so cache warmup and merges of the previous run do not favor one mode
+        for mode in (MODES if repeat % 2 == 0 else MODES[::-1]):
+            print(f"[INFO] Run {repeat + 1}/{args.repeats}: {mode}")
+            rows.append(run_mode(es, mode, args.num_docs, args.content_words, args.workers, args.force_merge, args.seed))
+
+    print(f"\n=== Bulk-load Benchmark ({args.num_docs} docs, {args.workers} workers) ===")
+    print(f"{'mode':>10}{'docs':>10}{'rejected':>10}{'import s':>10}{'total s':>10}{'docs/s':>10}{'segments':>10}")
+    for row in rows:
+        print(f"{row['mode']:>10}{row['docs']:>10}{row['rejected']:>10}{row['import_seconds']:>10.1f}"
+              f"{row['total_seconds']:>10.1f}{row['docs_per_second']:>10.0f}{row['segments']:>10}")
+    for mode in MODES:
+        throughput = sorted(row["docs_per_second"] for row in rows if row["mode"] == mode)
+        print(f"[INFO] {mode}: median {throughput[len(throughput) // 2]:.0f} docs/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_web import write_powerlaw_corpus
+
+# cache_miss builds and writes the graph cache, cache_hit memory-maps it
+BUILDERS = ["networkx", "csr", "parallel", "cache_miss", "cache_hit"]
+PAGES_PER_FILE = 500
+
+def peak_rss_mb():
+    """Peak resident set size of this process"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_builder(builder, input_dir, scores_path, workers, cache_dir):
+    """Build the graph and compute PageRank with one builder (runs in a child process)"""
+    from src.pagerank import pagerank_pipeline
+    from src.pagerank.graph_builder import build_csr_from_directories
+    from src.pagerank.graph_cache import cached_csr_from_directories
+
+    baseline = peak_rss_mb()
+    start_time = time.perf_counter()
+    if builder == "networkx":
+        G = pagerank_pipeline.build_graph_from_directories([input_dir])
+        build_time = time.perf_counter() - start_time
+        build_rss = peak_rss_mb()
+        nodes, edges = G.number_of_nodes(), G.number_of_edges()
+        scores = pagerank_pipeline.pagerank(G)
+    else:
+        if builder.startswith("cache"):
+            graph = cached_csr_from_directories([input_dir], workers=workers, cache_dir=cache_dir)
+        else:
+            graph = build_csr_from_directories([input_dir], workers=workers if builder == "parallel" else 1)
+        build_time = time.perf_counter() - start_time
+        build_rss = peak_rss_mb()
+        nodes, edges = graph.num_nodes, graph.num_edges
+        scores = pagerank_pipeline.pagerank_matrix(graph.to_matrix(), graph.urls)
+    total_time = time.perf_counter() - start_time
+
+    with open(scores_path, "w", encoding="utf-8") as f:
+        json.dump(scores, f)
+    return {
+        "builder": builder,
+        "nodes": nodes,
+        "edges": edges,
+        "build_s": build_time,
+        "build_and_rank_s": total_time,
+        "baseline_rss_mb": baseline,
+        "build_peak_rss_mb": build_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "scores_path": scores_path
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the networkx, CSR, parallel CSR and cached link graph builders")
+    parser.add_argument("-n", "--num-pages", type=int, default=50000)
+    parser.add_argument("--content-bytes", type=int, default=2000, help="Page text size of the synthetic corpus")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Processes for the parallel builder")
+    parser.add_argument("--input-dir", help="Existing crawl directory instead of a synthetic corpus")
+    parser.add_argument("--run", choices=BUILDERS, help=argparse.SUPPRESS)
+    parser.add_argument("--scores-out", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: print the measurements as the last line
+        result = run_builder(args.run, args.input_dir, args.scores_out, args.workers, args.cache_dir)
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dir = args.input_dir
+        if not input_dir:
+            input_dir = os.path.join(tmp_dir, "corpus")
+            print(f"[INFO] Writing synthetic corpus with {args.num_pages} pages")
+            write_powerlaw_corpus(input_dir, args.num_pages, content_bytes=args.content_bytes,
+                                  pages_per_file=PAGES_PER_FILE)
+
+        results = []
+        for builder in BUILDERS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", builder, "--input-dir", input_dir,
+                 "--scores-out", os.path.join(tmp_dir, f"scores_{builder}.json"), "--workers", str(args.workers),
+                 "--cache-dir", os.path.join(tmp_dir, "graph_cache")],
+                capture_output=True, text=True, check=True, cwd=REPO_ROOT
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        with open(results[0]["scores_path"], encoding="utf-8") as f:
+            expected = json.load(f)
+        # The parallel builder numbers nodes in completion order, so compare scores by URL
+        differences = {}
+        for row in results[1:]:
+            with open(row["scores_path"], encoding="utf-8") as f:
+                actual = json.load(f)
+            same_urls = expected.keys() == actual.keys()
+            max_diff = max((abs(expected[url] - actual[url]) for url in expected), default=0.0) if same_urls else None
+            differences[row["builder"]] = (same_urls, max_diff)
+
+    print("\n=== Graph Build Benchmark ===")
+    print(f"{'builder':<12}{'nodes':>10}{'edges':>12}{'build s':>10}{'total s':>10}{'build peak MB':>15}{'peak MB':>10}")
+    for row in results:
+        print(f"{row['builder']:<12}{row['nodes']:>10}{row['edges']:>12}{row['build_s']:>10.2f}"
+              f"{row['build_and_rank_s']:>10.2f}{row['build_peak_rss_mb'] - row['baseline_rss_mb']:>15.1f}"
+              f"{row['peak_rss_mb'] - row['baseline_rss_mb']:>10.1f}")
+    for builder, (same_urls, max_diff) in differences.items():
+        if same_urls:
+            print(f"\n{builder} vs networkx: same URLs, max score difference {max_diff:.2e}")
+        else:
+            print(f"\n{builder} vs networkx: URL sets differ")
+
+if __name__ == "__main__":
+    main()
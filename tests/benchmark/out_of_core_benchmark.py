@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_web import powerlaw_graph
+
+MODES = ["in_memory", "out_of_core"]
+SAMPLE_INTERVAL = 0.005  # seconds between memory samples
+
+class AnonymousPeak:
+    """
+    Peak anonymous memory of this process
+
+    Memory-mapped graph and block files show up in the RSS as page cache the
+    kernel can drop at any time, so the budget is checked against RssAnon.
+    """
+
+    def __init__(self):
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            with open("/proc/self/status", "r") as f:
+                for line in f:
+                    if line.startswith("RssAnon:"):
+                        self.peak_mb = max(self.peak_mb, int(line.split()[1]) / 1024)
+
+    def close(self):
+        self._stop.set()
+        self._sampler.join()
+        return self.peak_mb
+
+def write_powerlaw_graph(cache_dir, num_nodes, avg_outlinks=10, seed=42):
+    """Synthetic power-law graph, stored like the link graph cache"""
+    from src.pagerank.graph_builder import CSRGraph
+    from src.pagerank.graph_cache import save_graph
+
+    indptr, indices = powerlaw_graph(num_nodes, avg_outlinks, seed)
+    urls = [f"https://example.illinois.edu/page/{i}" for i in range(num_nodes)]
+    save_graph(CSRGraph(urls, indptr, indices), "benchmark", cache_dir)
+
+def run_mode(mode, cache_dir, budget_mb, max_iter):
+    """Rank the cached graph in memory or out of core (runs in a child process)"""
+    from src.pagerank.graph_builder import CSRGraph
+    from src.pagerank.out_of_core import partition_graph, power_out_of_core
+    from src.pagerank.solvers import power, transition_matrix
+
+    # The URL list is the same in both modes and not part of the iteration, so only the arrays are mapped
+    indptr = np.load(os.path.join(cache_dir, "indptr.npy"), mmap_mode="r")
+    indices = np.load(os.path.join(cache_dir, "indices.npy"), mmap_mode="r")
+    meter = AnonymousPeak()
+    start = time.perf_counter()
+    if mode == "in_memory":
+        graph = CSRGraph(range(len(indptr) - 1), indptr, indices)
+        P, dangling = transition_matrix(graph.to_matrix())
+        prepare_seconds = time.perf_counter() - start
+        result = power(P, dangling, np.ones(graph.num_nodes) / graph.num_nodes, max_iter=max_iter)
+        blocks = 1
+    else:
+        block_graph = partition_graph(indptr, indices, os.path.join(cache_dir, "blocks"), budget_mb)
+        prepare_seconds = time.perf_counter() - start
+        result = power_out_of_core(block_graph, max_iter=max_iter)
+        blocks = block_graph.num_blocks
+    np.save(os.path.join(cache_dir, f"rank_{mode}.npy"), result.rank)
+    return {
+        "mode": mode,
+        "blocks": blocks,
+        "prepare_seconds": prepare_seconds,
+        "iterations": result.iterations,
+        "seconds_per_iteration": result.seconds / max(result.iterations, 1),
+        "peak_anon_mb": meter.close()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and peak memory of in-memory vs out-of-core PageRank")
+    parser.add_argument("-n", "--nodes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--budget-mb", type=int, default=256, help="Memory budget of the out-of-core blocks")
+    parser.add_argument("--max-iter", type=int, default=100)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: print the measurements as the last line
+        print(json.dumps(run_mode(args.run, args.cache_dir, args.budget_mb, args.max_iter)))
+        return
+
+    rows = []
+    for num_nodes in args.nodes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = os.path.join(tmp_dir, "graph")
+            print(f"[INFO] Writing synthetic graph with {num_nodes} nodes")
+            write_powerlaw_graph(cache_dir, num_nodes)
+            for mode in MODES:
+                process = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run", mode, "--cache-dir", cache_dir,
+                     "--budget-mb", str(args.budget_mb), "--max-iter", str(args.max_iter)],
+                    capture_output=True, text=True, cwd=REPO_ROOT
+                )
+                if process.returncode != 0:
+                    print(f"[WARNING] {mode} failed on {num_nodes} nodes: {process.stderr.strip().splitlines()[-1]}")
+                    continue
+                row = json.loads(process.stdout.strip().splitlines()[-1])
+                row["nodes"] = num_nodes
+                rows.append(row)
+            if all(os.path.exists(os.path.join(cache_dir, f"rank_{mode}.npy")) for mode in MODES):
+                ranks = [np.load(os.path.join(cache_dir, f"rank_{mode}.npy")) for mode in MODES]
+                rows[-1]["max_diff"] = float(np.abs(ranks[0] - ranks[1]).max())
+
+    print(f"\n=== Out-of-core PageRank Benchmark (budget {args.budget_mb} MB) ===")
+    print(f"{'nodes':>10}{'mode':>13}{'blocks':>8}{'prepare s':>11}{'iters':>7}{'s/iter':>9}{'peak MB':>10}{'max diff':>11}")
+    for row in rows:
+        diff = f"{row['max_diff']:>11.1e}" if "max_diff" in row else f"{'':>11}"
+        print(f"{row['nodes']:>10}{row['mode']:>13}{row['blocks']:>8}{row['prepare_seconds']:>11.2f}"
+              f"{row['iterations']:>7}{row['seconds_per_iteration']:>9.3f}{row['peak_anon_mb']:>10.1f}" + diff)
+
+if __name__ == "__main__":
+    main()
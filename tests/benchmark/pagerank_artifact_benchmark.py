@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+from src.pagerank.pagerank_artifact import PageRankArtifact, write_artifact
+
+def synthetic_run(num_urls, seed):
+    """URLs and normalized scores shaped like a pipeline run"""
+    rng = random.Random(seed)
+    urls = [f"https://{rng.choice(['cs', 'ece', 'grainger', 'www'])}.illinois.edu/page/{i}/{rng.getrandbits(32):08x}"
+            for i in range(num_urls)]
+    scores = np.random.default_rng(seed).random(num_urls)
+    return urls, scores
+
+def dir_size(path):
+    """Total size of a file or directory in bytes"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the indented JSON scores file with the binary PageRank artifact")
+    parser.add_argument("-n", "--num-urls", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_urls in args.num_urls:
+            urls, scores = synthetic_run(num_urls, args.seed)
+            json_path = os.path.join(tmp_dir, "pagerank_scores.json")
+            artifact_dir = os.path.join(tmp_dir, "artifact")
+
+            def write_json():
+                as_dict = {url: float(f"{score:.8f}") for url, score in zip(urls, scores)}
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(as_dict, f, indent=2, ensure_ascii=False)
+
+            def read_json_sorted():
+                # What bulk_index_p.py used to do
+                with open(json_path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                return sorted(loaded.items(), key=lambda x: x[1], reverse=True)
+
+            def read_artifact_sorted():
+                artifact = PageRankArtifact(artifact_dir)
+                artifact.verify()
+                return list(artifact.sorted_items())
+
+            _, json_write = timed(write_json)
+            _, artifact_write = timed(lambda: write_artifact(urls, scores, raw=scores, out_dir=artifact_dir))
+            from_json, json_read = timed(read_json_sorted)
+            from_artifact, artifact_read = timed(read_artifact_sorted)
+            # Same ranking up to float32 precision (ties may order differently)
+            same_order = bool(np.allclose([score for _, score in from_json], [score for _, score in from_artifact],
+                                          atol=1e-6))
+
+            report.append({
+                "urls": num_urls,
+                "json_mb": dir_size(json_path) / 2**20,
+                "artifact_mb": dir_size(artifact_dir) / 2**20,
+                "json_write_s": json_write,
+                "artifact_write_s": artifact_write,
+                "json_read_sorted_s": json_read,
+                "artifact_read_sorted_s": artifact_read,
+                "same_order": same_order
+            })
+
+    print("\n=== PageRank Artifact Benchmark ===")
+    print(f"{'urls':>9}{'JSON MB':>10}{'artifact MB':>13}{'JSON write s':>14}{'artifact write s':>18}"
+          f"{'JSON read s':>13}{'artifact read s':>17}{'same order':>12}")
+    for row in report:
+        print(f"{row['urls']:>9}{row['json_mb']:>10.1f}{row['artifact_mb']:>13.1f}{row['json_write_s']:>14.2f}"
+              f"{row['artifact_write_s']:>18.2f}{row['json_read_sorted_s']:>13.2f}{row['artifact_read_sorted_s']:>17.2f}"
+              f"{str(row['same_order']):>12}")
+    print("\n(read = load, verify checksums where available, and iterate by descending score like bulk_index_p.py)")
+
+if __name__ == "__main__":
+    main()
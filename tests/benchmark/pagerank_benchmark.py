@@ -0,0 +1,242 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_web import PAGES_PER_FILE, write_powerlaw_corpus
+from src.pagerank import pagerank_pipeline
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]  # add 10000000 with enough disk (~10 GB of JSON)
+SAMPLE_INTERVAL = 0.005  # seconds between RSS samples
+STAGES = pagerank_pipeline.PIPELINE_STAGES
+
+def current_rss_mb():
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def children_rss_mb():
+    """Summed resident set size of the live child processes (the graph parser workers)"""
+    pages = 0
+    for path in glob.glob("/proc/self/task/*/children"):
+        try:
+            with open(path, "r") as f:
+                pids = f.read().split()
+        except OSError:
+            continue
+        for pid in pids:
+            try:
+                with open(f"/proc/{pid}/statm", "r") as f:
+                    pages += int(f.read().split()[1])
+            except OSError:
+                pass  # worker exited between the two reads
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+class StageMeter:
+    """Accumulate wall time and peak RSS per pipeline stage, of this process and of this process plus its workers"""
+
+    def __init__(self):
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self.peak_rss_mb = {stage: 0.0 for stage in STAGES}
+        self.peak_total_rss_mb = {stage: 0.0 for stage in STAGES}
+        self._stage = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def _record(self, stage):
+        rss = current_rss_mb()
+        self.peak_rss_mb[stage] = max(self.peak_rss_mb[stage], rss)
+        self.peak_total_rss_mb[stage] = max(self.peak_total_rss_mb[stage], rss + children_rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            stage = self._stage
+            if stage is not None:
+                self._record(stage)
+
+    def start(self, stage):
+        self._stage = stage
+        self._record(stage)
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.seconds[self._stage] += time.perf_counter() - self._started
+        self._record(self._stage)
+        self._stage = None
+
+    @contextmanager
+    def stage(self, stage):
+        """Measure the enclosed block as one stage, the stage hook of process_main_directory()"""
+        self.start(stage)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def close(self):
+        self._stop.set()
+        self._sampler.join()
+
+def run_pipeline(corpus_dir, output_dir, solver, incremental, workers):
+    """Run pagerank_pipeline.process_main_directory() with a timing hook on every stage (runs in a child process)"""
+    pagerank_pipeline.PAGERANK_SOLVER = solver
+    pagerank_pipeline.INCREMENTAL = incremental
+    pagerank_pipeline.GRAPH_WORKERS = workers
+    baseline = current_rss_mb()
+    meter = StageMeter()
+    pagerank_pipeline.process_main_directory(corpus_dir, output_dir, stage=meter.stage)
+    meter.close()
+
+    with open(os.path.join(output_dir, "artifact", "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    solver_stats = manifest["stats"]["solver"]
+    return {
+        "nodes": manifest["num_nodes"],
+        "edges": manifest["stats"]["num_edges"],
+        "topics": len(manifest["stats"].get("topic_members", {})),
+        "solver": solver,
+        "iterations": solver_stats["global"]["iterations"],
+        "converged": solver_stats["global"]["converged"],
+        "topic_iterations": solver_stats.get("topics", {}).get("iterations"),
+        "baseline_rss_mb": baseline,
+        "stages": {
+            stage: {"seconds": meter.seconds[stage], "peak_rss_mb": meter.peak_rss_mb[stage],
+                    "peak_total_rss_mb": meter.peak_total_rss_mb[stage]} for stage in STAGES
+        },
+        "total_seconds": sum(meter.seconds.values()),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        # Largest single worker, the sampled totals above add up the workers alive at the same time
+        "worker_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "peak_total_rss_mb": max(meter.peak_total_rss_mb.values())
+    }
+
+def git_revision():
+    """Commit of the benchmarked tree, with a dirty flag"""
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=REPO_ROOT).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def print_comparison(report, baseline_path):
+    """Per-stage time ratio against an earlier report"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(row["pages"], row.get("run", 1)): row for row in baseline["results"]}
+    print(f"\n=== Compared to {baseline['git']['commit']} (current / baseline time) ===")
+    print(f"{'pages':>10}{'run':>5}" + "".join(f"{stage:>15}" for stage in STAGES) + f"{'total':>10}")
+    for row in report["results"]:
+        old = previous.get((row["pages"], row["run"]))
+        if old is None:
+            continue
+        cells = []
+        for stage in STAGES:
+            old_stage = old["stages"].get(stage)
+            if old_stage is None or not old_stage["seconds"] or not row["stages"][stage]["seconds"]:
+                cells.append(f"{'-':>15}")
+            else:
+                cells.append(f"{row['stages'][stage]['seconds'] / old_stage['seconds']:>15.2f}")
+        total = row["total_seconds"] / max(old["total_seconds"], 1e-9)
+        print(f"{row['pages']:>10}{row['run']:>5}" + "".join(cells) + f"{total:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage time and memory of the PageRank pipeline on synthetic web graphs")
+    parser.add_argument("-n", "--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Corpus sizes in pages")
+    parser.add_argument("--solver", default="power", choices=["power", "gauss_seidel", "aitken", "quadratic"])
+    parser.add_argument("--content-bytes", type=int, default=200, help="Page text size of the synthetic corpus")
+    parser.add_argument("--topics", type=int, default=4, help="Crawl directories (topics) the corpus is spread over")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="Pipeline runs per corpus on one output directory; later runs reuse the graph cache")
+    parser.add_argument("--incremental", action="store_true", help="Warm-start later runs from the saved state")
+    parser.add_argument("--workers", type=int, default=pagerank_pipeline.GRAPH_WORKERS,
+                        help="Graph parser processes (GRAPH_WORKERS)")
+    parser.add_argument("--corpus-dir", help="Keep generated corpora here and reuse them across runs")
+    parser.add_argument("-o", "--output", default="pagerank_benchmark.json", help="JSON report path")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: print the measurements as the last line
+        print(json.dumps(run_pipeline(args.run, args.output_dir, args.solver, args.incremental, args.workers)))
+        return
+
+    report = {
+        "benchmark": "pagerank_pipeline",
+        "git": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "cpus": os.cpu_count()},
+        "config": {"solver": args.solver, "content_bytes": args.content_bytes, "pages_per_file": PAGES_PER_FILE,
+                   "topics": args.topics, "incremental": args.incremental,
+                   "graph_cache": pagerank_pipeline.GRAPH_CACHE, "graph_workers": args.workers,
+                   "out_of_core": pagerank_pipeline.OUT_OF_CORE},
+        "results": []
+    }
+    topics = [f"site_{k}" for k in range(args.topics)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_root = args.corpus_dir or os.path.join(tmp_dir, "corpora")
+        for num_pages in args.scales:
+            corpus_dir = os.path.join(corpus_root, f"pages_{num_pages}_content_{args.content_bytes}_topics_{args.topics}")
+            if not os.path.isdir(corpus_dir):
+                print(f"[INFO] Writing synthetic corpus with {num_pages} pages")
+                generate_start = time.perf_counter()
+                write_powerlaw_corpus(corpus_dir + ".tmp", num_pages, content_bytes=args.content_bytes, topics=topics)
+                os.replace(corpus_dir + ".tmp", corpus_dir)
+                print(f"[INFO] Corpus written in {time.perf_counter() - generate_start:.1f}s")
+            output_dir = os.path.join(tmp_dir, f"pagerank_{num_pages}")
+            for run in range(1, args.runs + 1):
+                print(f"[INFO] Running pipeline on {num_pages} pages (run {run})")
+                command = [sys.executable, os.path.abspath(__file__), "--run", corpus_dir, "--solver", args.solver,
+                           "--output-dir", output_dir, "--workers", str(args.workers)]
+                if args.incremental:
+                    command.append("--incremental")
+                output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_ROOT).stdout
+                row = json.loads(output.strip().splitlines()[-1])
+                row["pages"] = num_pages
+                row["run"] = run
+                report["results"].append(row)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n=== PageRank Pipeline Benchmark ===")
+    print(f"commit: {report['git']['commit']}{' (dirty)' if report['git']['dirty'] else ''}, solver: {args.solver}, "
+          f"topics: {args.topics}, incremental: {args.incremental}")
+    print(f"{'pages':>10}{'run':>5}{'edges':>12}{'iters':>7}" + "".join(f"{stage + ' s':>16}" for stage in STAGES)
+          + f"{'total s':>10}{'peak MB':>10}{'+workers MB':>13}{'worker MB':>11}")
+    for row in report["results"]:
+        print(f"{row['pages']:>10}{row['run']:>5}{row['edges']:>12}{row['iterations']:>7}"
+              + "".join(f"{row['stages'][stage]['seconds']:>16.2f}" for stage in STAGES)
+              + f"{row['total_seconds']:>10.2f}{row['peak_rss_mb']:>10.1f}{row['peak_total_rss_mb']:>13.1f}"
+              + f"{row['worker_peak_rss_mb']:>11.1f}")
+    print(f"\nPeak RSS per stage, this process / with its parser workers (MB)")
+    print(f"{'pages':>10}{'run':>5}" + "".join(f"{stage:>20}" for stage in STAGES))
+    for row in report["results"]:
+        print(f"{row['pages']:>10}{row['run']:>5}" + "".join(
+            f"{row['stages'][stage]['peak_rss_mb']:>11.1f} /{row['stages'][stage]['peak_total_rss_mb']:>7.1f}"
+            for stage in STAGES))
+    print(f"\n[INFO] Report saved to: {args.output}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+if __name__ == "__main__":
+    main()
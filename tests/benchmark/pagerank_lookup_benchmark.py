@@ -0,0 +1,108 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+from src.pagerank.pagerank_table import PageRankTable, write_table
+
+def synthetic_scores(num_urls, seed):
+    """URL -> score mapping shaped like pagerank_scores.json"""
+    rng = random.Random(seed)
+    return {
+        f"https://{rng.choice(['cs', 'ece', 'grainger', 'www'])}.illinois.edu/page/{i}/{rng.getrandbits(32):08x}":
+            float(f"{rng.random():.8f}")
+        for i in range(num_urls)
+    }
+
+def measure_load(load):
+    """Time a loader and return (object, seconds, traced Python heap bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    obj = load()
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, elapsed, peak
+
+def measure_lookups(lookup, urls):
+    """Mean lookup time in microseconds"""
+    start_time = time.perf_counter()
+    for url in urls:
+        lookup(url)
+    return (time.perf_counter() - start_time) / len(urls) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the JSON dict and the memory-mapped PageRank table")
+    parser.add_argument("-n", "--num-urls", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("-l", "--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_urls in args.num_urls:
+            scores = synthetic_scores(num_urls, args.seed)
+            json_path = os.path.join(tmp_dir, "pagerank_scores.json")
+            table_path = os.path.join(tmp_dir, "pagerank_table.bin")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(scores, f, indent=2)
+            write_table(scores, table_path)
+
+            rng = random.Random(args.seed)
+            known = rng.sample(list(scores), min(args.lookups, num_urls))
+            urls = [rng.choice(known) if rng.random() < 0.9 else f"https://missing.example/{i}"
+                    for i in range(args.lookups)]
+            del scores
+
+            def load_json():
+                with open(json_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            def load_table():
+                table = PageRankTable(table_path)
+                len(table)  # map the file
+                return table
+
+            as_dict, dict_load, dict_heap = measure_load(load_json)
+            table, table_load, table_heap = measure_load(load_table)
+
+            # Both structures must agree (float32 precision)
+            mismatches = sum(abs(as_dict.get(url, 0.0) - table.get(url)) > 1e-6 for url in urls[:10000])
+
+            row = {
+                "urls": num_urls,
+                "json_bytes": os.path.getsize(json_path),
+                "table_bytes": os.path.getsize(table_path),
+                "dict_load_s": dict_load,
+                "table_load_s": table_load,
+                "dict_heap_bytes": dict_heap,
+                "table_heap_bytes": table_heap,
+                "dict_lookup_us": measure_lookups(lambda url: as_dict.get(url, 0.0), urls),
+                "table_lookup_us": measure_lookups(table.get, urls),
+                "table_page_lookup_us": measure_lookups(table.get_many, [urls[i:i + 15] for i in range(0, len(urls), 15)]) / 15,
+                "mismatches": mismatches
+            }
+            report.append(row)
+            del as_dict, table
+
+    print("\n=== PageRank Lookup Benchmark ===")
+    print(f"{'urls':>9}{'json MB':>9}{'table MB':>10}{'dict load s':>13}{'table load s':>14}"
+          f"{'dict heap MB':>14}{'table heap MB':>15}{'dict us':>9}{'table us':>10}{'page us':>9}")
+    for row in report:
+        print(f"{row['urls']:>9}{row['json_bytes'] / 2**20:>9.1f}{row['table_bytes'] / 2**20:>10.1f}"
+              f"{row['dict_load_s']:>13.3f}{row['table_load_s']:>14.4f}"
+              f"{row['dict_heap_bytes'] / 2**20:>14.1f}{row['table_heap_bytes'] / 2**20:>15.2f}"
+              f"{row['dict_lookup_us']:>9.2f}{row['table_lookup_us']:>10.2f}{row['table_page_lookup_us']:>9.2f}")
+        if row["mismatches"]:
+            print(f"[ERROR] {row['mismatches']} lookups disagree for {row['urls']} URLs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from elasticsearch import Elasticsearch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+from src.config import es_config
+from src.elasticsearch.index_versions import index_layout, searchable_names
+from src.elasticsearch.search_service import IDX_SEARCH_MAP, build_search_body, resolve_target_indices
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERIES_FILE = os.path.join(REPO_ROOT, "tests", "data", "benchmark_queries.txt")
+QUERY_TYPES = ["standard", "phrase", "wildcard", "index", "professor"]
+LEGACY_SIZE = 1000
+
+# legacy: whole _source, size=1000 (the old search helpers)
+# full:   whole _source, one result page (the old /search)
+# lean:   title/url/pagerank + highlighted snippet, one result page
+VARIANTS = ["legacy", "full", "lean"]
+
+def build_body(query, query_type, variant):
+    """Search body of a query type for one result mode variant"""
+    if query_type == "wildcard":
+        query = f"{query.split()[0]}*"
+    body = build_search_body(query, query_type, 0, result_mode="lean" if variant == "lean" else "full")
+    if variant == "legacy":
+        body["size"] = LEGACY_SIZE
+        body.pop("collapse", None)
+    return body
+
+def run_query(es, indices, body):
+    """Run one search and return latency, server time and payload size"""
+    start_time = time.time()
+    response = es.search(index=indices, body=body)
+    latency = (time.time() - start_time) * 1000
+    return {
+        "latency_ms": latency,
+        "took_ms": response.get("took", 0),
+        "payload_bytes": len(json.dumps(response.body).encode("utf-8"))
+    }
+
+def summarize(samples):
+    """Aggregate the samples of one query type and variant"""
+    latencies = sorted(s["latency_ms"] for s in samples)
+    return {
+        "queries": len(samples),
+        "mean_payload_bytes": statistics.mean(s["payload_bytes"] for s in samples),
+        "mean_latency_ms": statistics.mean(latencies),
+        "p95_latency_ms": latencies[int(len(latencies) * 0.95)],
+        "mean_took_ms": statistics.mean(s["took_ms"] for s in samples)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare payload size and latency of the search result modes")
+    parser.add_argument("-n", "--num-queries", type=int, default=200, help="Queries per query type and variant")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    es = Elasticsearch(
+        ["https://localhost:9200"],
+        basic_auth=("elastic", es_config.KEY),
+        verify_certs=False,
+        ssl_show_warn=False
+    )
+    available = {index: IDX_SEARCH_MAP[index] for index in searchable_names(index_layout(es)) if index in IDX_SEARCH_MAP}
+    webpage_indices = [index for index in available if not index.endswith("_professors")]
+
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    rng = random.Random(args.seed)
+    sample = [rng.choice(queries) for _ in range(args.num_queries)]
+
+    report = {}
+    for query_type in QUERY_TYPES:
+        indices = resolve_target_indices(query_type, webpage_indices[:1], available)
+        report[query_type] = {}
+        for variant in VARIANTS:
+            samples = [run_query(es, indices, build_body(query, query_type, variant)) for query in sample]
+            report[query_type][variant] = summarize(samples)
+            logger.info(f"{query_type}/{variant}: {report[query_type][variant]}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_file = f"result_mode_benchmark_{timestamp}.json"
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump({"num_queries": args.num_queries, "results": report}, f, indent=2)
+
+    print("\n=== Result Mode Benchmark ===")
+    print(f"{'type':<10}{'variant':<8}{'payload KB':>12}{'mean ms':>10}{'p95 ms':>10}{'took ms':>10}")
+    for query_type, variants in report.items():
+        for variant, stats in variants.items():
+            print(f"{query_type:<10}{variant:<8}{stats['mean_payload_bytes'] / 1024:>12.1f}"
+                  f"{stats['mean_latency_ms']:>10.2f}{stats['p95_latency_ms']:>10.2f}{stats['mean_took_ms']:>10.2f}")
+        lean, full = variants["lean"], variants["full"]
+        if full["mean_payload_bytes"]:
+            print(f"{'':<10}lean payload is {lean['mean_payload_bytes'] / full['mean_payload_bytes']:.1%} of full")
+    print(f"\nDetailed results saved to: {results_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.pagerank.graph_builder import edges_to_csr
+
+PAGES_PER_FILE = 2000
+HOSTS = ["cs", "ece", "grainger", "www"]
+# Exponent of the Zipf distribution of link targets
+ZIPF_EXPONENT = 1.5
+
+def powerlaw_links(rng, num_sources, num_pages, popularity, avg_outlinks):
+    """
+    Out-links of num_sources pages
+
+    Out-degrees are geometric, link targets are Zipf-distributed over
+    popularity (a permutation of the page ids), so hubs are spread over
+    all ids and files.
+
+    Returns:
+        tuple: (out-degree of every source, concatenated target ids)
+    """
+    counts = np.minimum(rng.geometric(1 / (avg_outlinks + 1), num_sources) - 1, num_pages)
+    ranks = np.minimum(rng.zipf(ZIPF_EXPONENT, int(counts.sum())) - 1, num_pages - 1)
+    return counts, popularity[ranks]
+
+def write_powerlaw_corpus(out_dir, num_pages, avg_outlinks=20, content_bytes=200, topics=None,
+                          pages_per_file=PAGES_PER_FILE, seed=42):
+    """
+    Write crawl files in the crawler output schema with power-law in-degrees
+
+    Vectorized with numpy so 10^7 pages stay feasible.
+
+    Args:
+        out_dir: Corpus directory
+        num_pages: Number of crawled pages
+        content_bytes: Page text size, dominates JSON decoding time in real crawl files
+        topics: Optional crawl directory names, files are spread over out_dir/<topic> round-robin
+        pages_per_file: Pages per crawl file
+    """
+    rng = np.random.default_rng(seed)
+    hosts = np.array(HOSTS)[rng.integers(0, len(HOSTS), num_pages)]
+    urls = [f"https://{host}.illinois.edu/page/{i}" for i, host in enumerate(hosts.tolist())]
+    popularity = rng.permutation(num_pages)
+    content = ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes]
+    dirs = [os.path.join(out_dir, topic) for topic in topics] if topics else [out_dir]
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+    for start in range(0, num_pages, pages_per_file):
+        end = min(start + pages_per_file, num_pages)
+        counts, targets = powerlaw_links(rng, end - start, num_pages, popularity, avg_outlinks)
+        targets = targets.tolist()
+        pages = []
+        offset = 0
+        for i, count in zip(range(start, end), counts.tolist()):
+            pages.append({
+                "url": urls[i],
+                "title": f"Page {i}",
+                "content": content,
+                "outlinks": [urls[t] for t in targets[offset:offset + count]]
+            })
+            offset += count
+        file_number = start // pages_per_file
+        with open(os.path.join(dirs[file_number % len(dirs)], f"crawl_{file_number:05d}.json"), "w",
+                  encoding="utf-8") as f:
+            json.dump(pages, f)
+
+def powerlaw_graph(num_nodes, avg_outlinks=10, seed=42):
+    """
+    CSR link graph of the same model, without going through crawl files
+
+    Returns:
+        tuple: (indptr int64, indices int32), rows sorted and de-duplicated like GraphBuilder emits
+    """
+    rng = np.random.default_rng(seed)
+    popularity = rng.permutation(num_nodes).astype(np.int32)
+    counts, targets = powerlaw_links(rng, num_nodes, num_nodes, popularity, avg_outlinks)
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int32), counts)
+    return edges_to_csr(num_nodes, sources, targets)
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LOCUSTFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locustfile.py")
+
+# Start both servers before running the comparison:
+#   python main.py                                          (Flask, port 5000)
+#   uvicorn main_async:app --host 127.0.0.1 --port 8000     (ASGI, port 8000)
+SERVERS = {
+    "flask": "http://127.0.0.1:5000",
+    "asgi": "http://127.0.0.1:8000"
+}
+
+METRICS = [
+    ("Request Count", "requests"),
+    ("Failure Count", "failures"),
+    ("Requests/s", "rps"),
+    ("Median Response Time", "median_ms"),
+    ("Average Response Time", "mean_ms"),
+    ("95%", "p95_ms"),
+    ("99%", "p99_ms")
+]
+
+def run_locust(name, host, users, spawn_rate, run_time, out_dir):
+    """Run the search scenario headless against one server and return aggregated stats"""
+    prefix = os.path.join(out_dir, name)
+    cmd = [
+        sys.executable, "-m", "locust",
+        "-f", LOCUSTFILE,
+        "--headless",
+        "-u", str(users),
+        "-r", str(spawn_rate),
+        "-t", run_time,
+        "--host", host,
+        "--csv", prefix,
+        "--only-summary"
+    ]
+    logger.info(f"Running Locust against {name} ({host}) with {users} users for {run_time}")
+    subprocess.run(cmd, check=False)
+    return read_aggregated_stats(f"{prefix}_stats.csv")
+
+def read_aggregated_stats(path):
+    """Read the Aggregated row of a Locust stats CSV"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("Name") == "Aggregated":
+                return {key: float(row[column]) for column, key in METRICS if row.get(column) not in (None, "", "N/A")}
+    return {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI servers under the same Locust load")
+    parser.add_argument("-u", "--users", type=int, default=200)
+    parser.add_argument("-r", "--spawn-rate", type=int, default=20)
+    parser.add_argument("-t", "--run-time", default="2m")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--out-dir", default="locust_results")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    stats = {}
+    for name in args.servers:
+        stats[name] = run_locust(name, SERVERS[name], args.users, args.spawn_rate, args.run_time, args.out_dir)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_file = os.path.join(args.out_dir, f"server_comparison_{timestamp}.json")
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "users": args.users,
+            "spawn_rate": args.spawn_rate,
+            "run_time": args.run_time,
+            "servers": stats
+        }, f, indent=2)
+
+    print("\n=== Server Comparison ===")
+    print(f"{'metric':<12}" + "".join(f"{name:>14}" for name in args.servers))
+    for _, key in METRICS:
+        print(f"{key:<12}" + "".join(f"{stats[name].get(key, float('nan')):>14.2f}" for name in args.servers))
+    print(f"\nDetailed results saved to: {results_file}")
+
+if __name__ == "__main__":
+    main()
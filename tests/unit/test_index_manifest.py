@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.index_manifest import IndexManifest, ManifestUpdate, document_id, document_key
+
+def page(url, content):
+    return {"url": url, "title": "", "content": content}
+
+def previous_manifest(pages):
+    update = ManifestUpdate()
+    for source in pages:
+        update.check(source)
+    return IndexManifest("webpages_test", "uuid", update.entries())
+
+def test_document_key_round_trip():
+    assert document_key(document_id("https://cs.illinois.edu/")) is not None
+    assert document_key("Xk2mPZABc9vT_legacy1") is None
+    assert document_key("zzzzzzzzzzzzzzzz") is None
+
+def test_entries_ignores_rejected_legacy_ids():
+    update = ManifestUpdate()
+    doc_id = update.check(page("https://cs.illinois.edu/a", "a"))
+    entries = update.entries(["Xk2mPZABc9vT_legacy1"])
+    assert [f"{key:016x}" for key in entries["id"].tolist()] == [doc_id]
+
+def test_entries_keeps_previous_digest_of_rejected_write():
+    previous = previous_manifest([page("https://cs.illinois.edu/a", "old")])
+    update = ManifestUpdate(previous)
+    doc_id = update.check(page("https://cs.illinois.edu/a", "new"))
+    entries = update.entries([doc_id, "Xk2mPZABc9vT_legacy1"])
+    assert entries.tobytes() == previous.entries.tobytes()
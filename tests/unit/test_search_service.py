@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.elasticsearch.result_cache import ResultCache
+from src.elasticsearch.search_service import PAGE_SIZE, build_msearch_request, search_plan
+
+INDICES = {"webpages_uiuc_cs": "CS Department"}
+
+def hit(i):
+    return {"_index": "webpages_uiuc_cs", "_score": 1.0, "_source": {"url": f"https://cs.illinois.edu/{i}", "title": ""}}
+
+def drive(plan, total):
+    """Run a search plan against canned from/size responses, returning its result and the requested offsets"""
+    offsets = []
+    response = None
+    while True:
+        try:
+            request = plan.send(response)
+        except StopIteration as stop:
+            return stop.value, offsets
+        start = request[1].get("from", 0)
+        offsets.append(start)
+        hits = [hit(i) for i in range(start, min(start + PAGE_SIZE, total))]
+        response = {"hits": {"total": {"value": total}, "hits": hits}}
+
+def plan(page, cache):
+    return search_plan("robotics", "standard", [], page, INDICES, lambda url: 0.0, cache, pagination_mode="offset")
+
+def query(selected_indices):
+    return {"q": "robotics", "type": "index", "selected_indices": selected_indices}
+
+def test_msearch_rejects_malformed_selected_indices():
+    entries, searches = build_msearch_request([query("webpages_uiuc_cs"), query([1]), query([None])], INDICES)
+    assert searches == []
+    assert all(entry["error"] == "selected_indices must be a list of index names" for entry in entries)
+
+def test_msearch_keeps_valid_queries_next_to_rejected_ones():
+    entries, searches = build_msearch_request([query({"webpages_uiuc_cs": 1}), query(["webpages_uiuc_cs"])], INDICES)
+    assert "error" in entries[0]
+    assert "error" not in entries[1] and entries[1]["slot"] == 0
+    assert len(searches) == 2
+
+def test_search_plan_moves_a_page_past_the_end_to_the_last_page():
+    result, offsets = drive(plan(5, ResultCache()), PAGE_SIZE + 5)
+    assert result["page"] == 2 and result["total_results"] == PAGE_SIZE + 5
+    assert offsets == [4 * PAGE_SIZE, PAGE_SIZE]
+    assert len(result["results"]) == 5
+
+def test_search_plan_serves_repeated_queries_from_the_cache():
+    cache = ResultCache()
+    first, _ = drive(plan(1, cache), 3)
+    second, offsets = drive(plan(1, cache), 3)
+    assert offsets == [] and second == first